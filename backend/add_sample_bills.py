@@ -4,6 +4,8 @@
 import sqlite3
 from decimal import Decimal
 
+from app.services.bill_schedule import BillScheduleService
+
 def add_sample_bills():
     conn = sqlite3.connect('budget_planner.db')
     cursor = conn.cursor()
@@ -37,8 +39,9 @@ def add_sample_bills():
             cursor.execute("""
                 INSERT INTO bills (id, planner_id, name, include_toggle, scenario, 
                                  bill_amount, interval_months, monthly_average, monthly_amount,
+                                 first_due_month, due_month_mask,
                                  category_id, notes, created_at, updated_at)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'), datetime('now'))
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, datetime('now'), datetime('now'))
             """, (
                 str(uuid.uuid4()).replace('-', ''),
                 planner_id,
@@ -49,6 +52,8 @@ def add_sample_bills():
                 interval_months,
                 monthly_average,
                 monthly_average,  # Legacy field
+                1,  # First due in January
+                BillScheduleService.due_month_mask(1, interval_months),
                 category_id,
                 notes
             ))
@@ -1,6 +1,7 @@
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from fastapi import HTTPException, Request
 import os
 from dotenv import load_dotenv
 
@@ -16,7 +17,52 @@ engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False} i
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
 
-def get_db():
+# Optional per-household SQLite files (DATABASE_SHARDING=household); the database above
+# then serves as the planner -> household directory
+shard_router = None
+if os.getenv("DATABASE_SHARDING", "").lower() == "household":
+    from .sharding import ShardRouter
+    shard_router = ShardRouter(
+        engine,
+        os.getenv("SHARD_DIRECTORY", "./shards"),
+        max_engines=int(os.getenv("SHARD_MAX_ENGINES", "64")),
+        idle_seconds=float(os.getenv("SHARD_IDLE_SECONDS", "300")),
+    )
+
+async def get_db(request: Request):
+    """
+    Session for the request's planner data: the household's shard when sharding, where a
+    request naming no known household is rejected rather than served from the directory
+    """
+    if shard_router is None:
+        db = SessionLocal()
+    else:
+        household_id = await shard_router.household_for_request(request)
+        if household_id is None:
+            raise HTTPException(
+                status_code=400,
+                detail="Could not resolve the household: send X-Household-Id or X-Planner-Id, or a known planner or item id",
+            )
+        db = shard_router.session(household_id)
+    try:
+        yield db
+    finally:
+        db.close()
+
+def planner_session(planner_id) -> Session:
+    """
+    Session holding a planner's data, for work outside a request; with sharding, raises
+    ValueError for a planner of no known household
+    """
+    if shard_router is None:
+        return SessionLocal()
+    household_id = shard_router.household_for_planner(planner_id)
+    if household_id is None:
+        raise ValueError(f"Unknown planner {planner_id}")
+    return shard_router.session(household_id)
+
+def get_main_db():
+    """Session on the main database, for routes that reach the shards themselves"""
     db = SessionLocal()
     try:
         yield db
@@ -0,0 +1,238 @@
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session, sessionmaker
+from starlette.concurrency import run_in_threadpool
+from collections import OrderedDict
+from typing import Any, Iterator, Optional, Tuple
+import glob
+import os
+import threading
+import time
+import uuid
+
+from ..models import Base
+
+SHARD_PREFIX = "household_"
+
+# Path parameters that address a single row by id, and the tables of those rows
+ITEM_PATH_PARAMETERS = (
+    "asset_id", "liability_id", "income_id", "expense_id", "bill_id", "category_id", "scenario_id",
+)
+ITEM_TABLES = ("assets", "liabilities", "income", "expenses", "bills", "categories", "scenario_settings")
+
+def _key(value: Any) -> Optional[str]:
+    """Normalize a UUID (or its string forms) to the 32-char hex key used for shard files"""
+    if value is None:
+        return None
+    try:
+        return uuid.UUID(str(value)).hex
+    except ValueError:
+        return None
+
+class ShardRouter:
+    """
+    Routes each household to its own SQLite file so writes from different households
+    never wait on the same database lock.
+
+    The default database stays the directory: it holds users, households and planners,
+    and maps a planner to its household, and every row addressed by id alone to its
+    household (item_households, written before the row is created); it never serves
+    planner data. Lookups are cached in an LRU. Every shard file
+    has its own engine and connection pool. At most max_engines are kept open, and
+    shards idle for longer than idle_seconds are disposed on the next access.
+    """
+
+    def __init__(
+        self,
+        directory_engine: Engine,
+        shard_dir: str,
+        max_engines: int = 64,
+        idle_seconds: float = 300.0,
+        max_directory_entries: int = 100000,
+    ):
+        self.directory_engine = directory_engine
+        self.shard_dir = shard_dir
+        self.max_engines = max_engines
+        self.idle_seconds = idle_seconds
+        self.max_directory_entries = max_directory_entries
+        self._engines: "OrderedDict[str, Tuple[Engine, sessionmaker, float]]" = OrderedDict()
+        self._directory: "OrderedDict[Any, Optional[str]]" = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(shard_dir, exist_ok=True)
+
+    def shard_path(self, household_id: Any) -> str:
+        return os.path.join(self.shard_dir, f"{SHARD_PREFIX}{_key(household_id)}.db")
+
+    def household_for_planner(self, planner_id: Any) -> Optional[str]:
+        """Household key of a planner from the directory database (cached)"""
+        planner_key = _key(planner_id)
+        if planner_key is None:
+            return None
+        with self._lock:
+            if planner_key in self._directory:
+                self._directory.move_to_end(planner_key)
+                return self._directory[planner_key]
+        with self.directory_engine.connect() as connection:
+            household = connection.execute(
+                text("SELECT household_id FROM planners WHERE id = :planner_id"), {"planner_id": planner_key}
+            ).scalar()
+        household_key = _key(household)
+        # Unknown planners are not cached so a planner created later is found
+        if household_key is not None:
+            self.register_planner(planner_key, household_key)
+        return household_key
+
+    def household_exists(self, household_id: Any) -> bool:
+        """Whether the directory knows a household, so stray ids never create shard files"""
+        household_key = _key(household_id)
+        if household_key is None:
+            return False
+        with self._lock:
+            if ("household", household_key) in self._directory:
+                return True
+        with self.directory_engine.connect() as connection:
+            exists = connection.execute(
+                text("SELECT 1 FROM households WHERE id = :household_id"), {"household_id": household_key}
+            ).scalar() is not None
+        if exists:
+            with self._lock:
+                self._directory[("household", household_key)] = household_key
+        return exists
+
+    def household_for_item(self, item_id: Any) -> Optional[str]:
+        """Household key of the shard holding a row addressed by id, from the directory (cached)"""
+        item_key = _key(item_id)
+        if item_key is None:
+            return None
+        cache_key = ("item", item_key)
+        with self._lock:
+            if cache_key in self._directory:
+                self._directory.move_to_end(cache_key)
+                return self._directory[cache_key]
+        with self.directory_engine.connect() as connection:
+            household = connection.execute(
+                text("SELECT household_id FROM item_households WHERE id = :item_id"), {"item_id": item_key}
+            ).scalar()
+        household_key = _key(household)
+        # Unknown ids are not cached so a row created later is found
+        if household_key is not None:
+            self._remember(cache_key, household_key)
+        return household_key
+
+    def register_item(self, item_id: Any, planner_id: Any) -> None:
+        """
+        Record which household holds a row addressed by id; call before creating it, so
+        a failed insert leaves an unused entry rather than a row no route can reach.
+        Raises ValueError for a planner of no known household.
+        """
+        household_key = self.household_for_planner(planner_id)
+        if household_key is None:
+            raise ValueError(f"Unknown planner {planner_id}")
+        with self.directory_engine.begin() as connection:
+            connection.execute(
+                text("INSERT INTO item_households (id, household_id) VALUES (:item_id, :household_id)"),
+                {"item_id": _key(item_id), "household_id": household_key},
+            )
+        self._remember(("item", _key(item_id)), household_key)
+
+    def register_planner(self, planner_id: Any, household_id: Any) -> None:
+        self._remember(_key(planner_id), _key(household_id))
+
+    def _remember(self, key: Any, household_key: str) -> None:
+        with self._lock:
+            self._directory[key] = household_key
+            self._directory.move_to_end(key)
+            while len(self._directory) > self.max_directory_entries:
+                self._directory.popitem(last=False)
+
+    def engine(self, household_id: Any) -> Engine:
+        """Engine for a household's shard, creating the file and schema on first use"""
+        return self._open(household_id)[0]
+
+    def session(self, household_id: Any) -> Session:
+        return self._open(household_id)[1]()
+
+    def _open(self, household_id: Any) -> Tuple[Engine, sessionmaker]:
+        household_key = _key(household_id)
+        now = time.monotonic()
+        evicted = []
+        with self._lock:
+            entry = self._engines.get(household_key)
+            if entry is None:
+                path = self.shard_path(household_key)
+                is_new = not os.path.exists(path)
+                engine = create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+                if is_new:
+                    Base.metadata.create_all(bind=engine)
+                entry = (engine, sessionmaker(autocommit=False, autoflush=False, bind=engine), now)
+            self._engines[household_key] = (entry[0], entry[1], now)
+            self._engines.move_to_end(household_key)
+
+            # Least recently used shards first: drop idle ones and anything over the cap
+            for key in list(self._engines):
+                if key == household_key:
+                    continue
+                idle = now - self._engines[key][2] > self.idle_seconds
+                if idle or len(self._engines) > self.max_engines:
+                    evicted.append(self._engines.pop(key)[0])
+                else:
+                    break
+        for engine in evicted:
+            engine.dispose()
+        return entry[0], entry[1]
+
+    def household_keys(self) -> Iterator[str]:
+        for path in sorted(glob.glob(os.path.join(self.shard_dir, f"{SHARD_PREFIX}*.db"))):
+            yield os.path.basename(path)[len(SHARD_PREFIX):-len(".db")]
+
+    def iter_shards(self) -> Iterator[Tuple[str, Engine]]:
+        """
+        Yield (household key, engine) for every shard file, for admin tooling. Shards are
+        opened with a temporary engine so a sweep does not evict the serving LRU.
+        """
+        for household_key in self.household_keys():
+            engine = create_engine(f"sqlite:///{self.shard_path(household_key)}")
+            try:
+                yield household_key, engine
+            finally:
+                engine.dispose()
+
+    async def household_for_request(self, request) -> Optional[str]:
+        """
+        Household of a request: X-Household-Id header or household_id query parameter,
+        else the household of the planner from the X-Planner-Id header, the planner_id
+        query or path parameter or a JSON body's planner_id, else the household of the
+        row an id path parameter (ITEM_PATH_PARAMETERS) addresses. None when none of them
+        names a known household. Directory lookups run in the threadpool.
+        """
+        household = request.headers.get("x-household-id") or request.query_params.get("household_id")
+        if household:
+            exists = await run_in_threadpool(self.household_exists, household)
+            return _key(household) if exists else None
+
+        planner_id = (
+            request.headers.get("x-planner-id")
+            or request.query_params.get("planner_id")
+            or request.path_params.get("planner_id")
+        )
+        if not planner_id and request.method in ("POST", "PUT", "PATCH") \
+                and request.headers.get("content-type", "").startswith("application/json"):
+            try:
+                body = await request.json()
+                planner_id = body.get("planner_id") if isinstance(body, dict) else None
+            except ValueError:
+                planner_id = None
+        if planner_id:
+            return await run_in_threadpool(self.household_for_planner, planner_id)
+
+        for parameter in ITEM_PATH_PARAMETERS:
+            if parameter in request.path_params:
+                return await run_in_threadpool(self.household_for_item, request.path_params[parameter])
+        return None
+
+    def dispose(self) -> None:
+        with self._lock:
+            engines = [entry[0] for entry in self._engines.values()]
+            self._engines.clear()
+        for engine in engines:
+            engine.dispose()
@@ -0,0 +1,4 @@
+from .compression import CompressionMiddleware, compression_stats
+from .profiling import ProfilingMiddleware
+
+__all__ = ["CompressionMiddleware", "compression_stats", "ProfilingMiddleware"]
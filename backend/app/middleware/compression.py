@@ -0,0 +1,304 @@
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple
+import gzip
+import os
+import threading
+import time
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..services.metrics import metrics
+
+try:
+    import brotli
+except ImportError:  # brotli is optional; gzip is always available
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "application/xml")
+
+class CompressedBodyCache:
+    """Small LRU of compressed bodies for immutable responses, keyed by ETag and encoding"""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str, int], bytes]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Tuple[str, str, int]) -> Optional[bytes]:
+        with self._lock:
+            body = self._entries.get(key)
+            if body is not None:
+                self._entries.move_to_end(key)
+            return body
+
+    def put(self, key: Tuple[str, str, int], body: bytes) -> None:
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+class StreamCompressor:
+    """Compresses a streamed body chunk by chunk, flushing each chunk so it is delivered as it comes"""
+
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)  # 31: gzip container
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self.cpu_seconds = 0.0
+
+    def compress(self, chunk: bytes, more_body: bool) -> bytes:
+        cpu_start = time.thread_time()
+        if self.encoding == "br":
+            out = self._compressor.process(chunk) + (self._compressor.flush() if more_body else self._compressor.finish())
+        else:
+            out = self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH if more_body else zlib.Z_FINISH)
+        self.cpu_seconds += time.thread_time() - cpu_start
+        self.bytes_in += len(chunk)
+        self.bytes_out += len(out)
+        return out
+
+class CompressionMiddleware:
+    """
+    Compress response bodies with brotli (when installed) or gzip.
+
+    The decision is made on the first body chunk: a complete body is compressed at
+    once, a streamed one (more_body) chunk by chunk with a flush after each, so it is
+    never buffered. Responses below minimum_size (by Content-Length when streamed),
+    non-text content, responses that are already encoded and ETag-negotiated
+    responses (304 or a matching If-None-Match) are passed through untouched.
+    Every response of a compressible type carries Vary: Accept-Encoding, compressed
+    or not. Compressed bodies of responses marked `Cache-Control: immutable` are
+    cached by ETag.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        minimum_size: Optional[int] = None,
+        gzip_level: Optional[int] = None,
+        brotli_quality: Optional[int] = None,
+        enable_brotli: Optional[bool] = None,
+        cache_size: int = 256,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size if minimum_size is not None else int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+        self.gzip_level = gzip_level if gzip_level is not None else int(os.getenv("COMPRESSION_LEVEL", "6"))
+        self.brotli_quality = brotli_quality if brotli_quality is not None else int(os.getenv("BROTLI_QUALITY", "4"))
+        if enable_brotli is None:
+            enable_brotli = os.getenv("COMPRESSION_BROTLI", "on") == "on"
+        self.enable_brotli = enable_brotli and brotli is not None
+        self.cache = CompressedBodyCache(cache_size)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        scope = self._strip_encoding_from_validators(scope)
+        request_headers = Headers(scope=scope)
+        encoding = self._choose_encoding(request_headers.get("accept-encoding", ""))
+        start_message: Optional[Message] = None
+        stream: Optional[StreamCompressor] = None
+
+        async def compressing_send(message: Message) -> None:
+            nonlocal start_message, stream
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+            if start_message is not None:
+                # First body chunk: decide for the whole response
+                start, start_message = start_message, None
+                if not message.get("more_body", False):
+                    await self._send_response(scope, request_headers, encoding, start, message.get("body", b""), send)
+                    return
+                stream = await self._start_stream(scope, request_headers, encoding, start, send)
+            if stream is None:
+                await send(message)
+                return
+            more_body = message.get("more_body", False)
+            await send({"type": "http.response.body", "body": stream.compress(message.get("body", b""), more_body), "more_body": more_body})
+            if not more_body:
+                self._count(scope, stream.encoding, stream.bytes_in, stream.bytes_out, stream.cpu_seconds)
+
+        await self.app(scope, receive, compressing_send)
+
+    @staticmethod
+    def _strip_encoding_from_validators(scope: Scope) -> Scope:
+        """Map If-None-Match values like "abc-gzip" back to the application's "abc" ETag"""
+        raw_headers = scope.get("headers", [])
+        if not any(name == b"if-none-match" for name, _ in raw_headers):
+            return scope
+
+        rewritten = []
+        for name, value in raw_headers:
+            if name == b"if-none-match":
+                tags = []
+                for tag in value.decode("latin-1").split(","):
+                    tag = tag.strip()
+                    for suffix in ('-gzip"', '-br"'):
+                        if tag.endswith(suffix):
+                            tag = tag[:-len(suffix)] + '"'
+                    tags.append(tag)
+                value = ", ".join(tags).encode("latin-1")
+            rewritten.append((name, value))
+        return {**scope, "headers": rewritten}
+
+    def _choose_encoding(self, accept_encoding: str) -> Optional[str]:
+        """Pick the best supported encoding from an Accept-Encoding header"""
+        accepted: Dict[str, float] = {}
+        for part in accept_encoding.split(","):
+            token, _, params = part.strip().partition(";")
+            token = token.strip().lower()
+            if not token:
+                continue
+            quality = 1.0
+            params = params.strip()
+            if params.startswith("q="):
+                try:
+                    quality = float(params[2:])
+                except ValueError:
+                    quality = 0.0
+            accepted[token] = quality
+
+        if self.enable_brotli and accepted.get("br", 0) > 0:
+            return "br"
+        if accepted.get("gzip", 0) > 0:
+            return "gzip"
+        return None
+
+    @staticmethod
+    def _varies(headers: MutableHeaders) -> bool:
+        """Whether the response is one this middleware may encode, so its representation depends on Accept-Encoding"""
+        return "content-encoding" not in headers and headers.get("content-type", "").startswith(COMPRESSIBLE_TYPES)
+
+    def _should_compress(self, request_headers: Headers, start_message: Message, headers: MutableHeaders, size: Optional[int]) -> bool:
+        """size is the body length, None for a stream of unknown length"""
+        status = start_message["status"]
+        if status < 200 or status in (204, 206, 304):
+            return False
+        if not self._varies(headers) or (size is not None and size < self.minimum_size):
+            return False
+        etag = headers.get("etag")
+        if etag and etag in [tag.strip() for tag in request_headers.get("if-none-match", "").split(",")]:
+            # The client already holds this representation
+            return False
+        return True
+
+    def _compress(self, encoding: str, body: bytes) -> bytes:
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    @staticmethod
+    def _route_path(scope: Scope) -> str:
+        return getattr(scope.get("route"), "path", scope.get("path", ""))
+
+    @staticmethod
+    def _count(scope: Scope, encoding: str, bytes_in: int, bytes_out: int, cpu_seconds: float) -> None:
+        route_path = CompressionMiddleware._route_path(scope)
+        metrics.increment("compression_cpu_seconds", cpu_seconds, route=route_path, encoding=encoding)
+        metrics.increment("compression_responses", route=route_path, encoding=encoding)
+        metrics.increment("compression_bytes_in", bytes_in, route=route_path, encoding=encoding)
+        metrics.increment("compression_bytes_out", bytes_out, route=route_path, encoding=encoding)
+
+    @staticmethod
+    def _mark_encoded(headers: MutableHeaders, encoding: str) -> None:
+        headers["content-encoding"] = encoding
+        headers.add_vary_header("Accept-Encoding")
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            # Each encoding is a distinct representation and needs its own strong validator
+            headers["etag"] = f'{etag[:-1]}-{encoding}"' if etag.endswith('"') else f"{etag}-{encoding}"
+
+    async def _start_stream(
+        self,
+        scope: Scope,
+        request_headers: Headers,
+        encoding: Optional[str],
+        start_message: Message,
+        send: Send,
+    ) -> Optional[StreamCompressor]:
+        """Send the head of a streamed response; returns the compressor for its chunks, None to pass them through"""
+        headers = MutableHeaders(raw=start_message["headers"])
+        length = headers.get("content-length")
+        size = int(length) if length and length.isdigit() else None
+        if encoding is None or not self._should_compress(request_headers, start_message, headers, size):
+            if self._varies(headers):
+                headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            return None
+
+        self._mark_encoded(headers, encoding)
+        del headers["content-length"]
+        await send(start_message)
+        return StreamCompressor(encoding, self.gzip_level, self.brotli_quality)
+
+    async def _send_response(
+        self,
+        scope: Scope,
+        request_headers: Headers,
+        encoding: Optional[str],
+        start_message: Message,
+        body: bytes,
+        send: Send,
+    ) -> None:
+        headers = MutableHeaders(raw=start_message["headers"])
+        if encoding is None or not self._should_compress(request_headers, start_message, headers, len(body)):
+            if self._varies(headers):
+                headers.add_vary_header("Accept-Encoding")
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        etag = headers.get("etag")
+        cacheable = etag is not None and "immutable" in headers.get("cache-control", "")
+        level = self.brotli_quality if encoding == "br" else self.gzip_level
+        cache_key = (etag, encoding, level)
+
+        compressed = self.cache.get(cache_key) if cacheable else None
+        cpu_seconds = 0.0
+        if compressed is not None:
+            metrics.increment("compression_cache_hits", route=self._route_path(scope), encoding=encoding)
+        else:
+            cpu_start = time.thread_time()
+            compressed = self._compress(encoding, body)
+            cpu_seconds = time.thread_time() - cpu_start
+            if cacheable:
+                self.cache.put(cache_key, compressed)
+        self._count(scope, encoding, len(body), len(compressed), cpu_seconds)
+
+        self._mark_encoded(headers, encoding)
+        headers["content-length"] = str(len(compressed))
+
+        await send(start_message)
+        await send({"type": "http.response.body", "body": compressed})
+
+def compression_stats() -> List[Dict[str, Any]]:
+    """Per-route compression ratio and CPU time derived from the metrics registry"""
+    snapshot = metrics.snapshot()
+    rows: Dict[Tuple[str, str], Dict[str, Any]] = {}
+    for name in ("compression_responses", "compression_bytes_in", "compression_bytes_out",
+                 "compression_cpu_seconds", "compression_cache_hits"):
+        for entry in snapshot.get(name, []):
+            key = (entry["labels"]["route"], entry["labels"]["encoding"])
+            row = rows.setdefault(key, {"route": key[0], "encoding": key[1]})
+            row[name.replace("compression_", "")] = entry["value"]
+
+    for row in rows.values():
+        bytes_in = row.get("bytes_in", 0)
+        row["ratio"] = round(row.get("bytes_out", 0) / bytes_in, 4) if bytes_in else None
+    return sorted(rows.values(), key=lambda row: (row["route"], row["encoding"]))
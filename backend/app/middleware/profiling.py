@@ -0,0 +1,233 @@
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional, Set, Tuple
+import asyncio
+import hmac
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from ..services.metrics import metrics
+
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN", "")  # Empty disables profiling altogether
+PROFILE_HEADER = "x-profile"  # Carries the token on the request to profile
+PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", "0.001"))  # Seconds between stack samples
+PROFILE_TOP = int(os.getenv("PROFILE_TOP", "25"))  # Functions and statements listed in the summary
+
+# Innermost frames in these files mean the thread is waiting for work, not doing ours
+IDLE_FILES = ("selectors.py", "threading.py", "queue.py")
+
+# Source root of the backend, to list the application's own functions separately
+APP_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))) + os.sep
+
+FunctionKey = Tuple[str, int, str]
+
+_active: ContextVar[Optional["RequestProfile"]] = ContextVar("request_profile", default=None)
+
+class RequestProfile:
+    """
+    Samples the stacks of the threads serving one request and times its SQL statements.
+
+    The event loop thread is sampled from the start; a threadpool thread (plain def
+    endpoints) joins once it runs the request's first statement, which the SQL hooks
+    see through the copied context. Samples of a thread waiting in the selector or
+    its work queue are dropped. Other requests sharing those threads show up too, so
+    profile while the process is otherwise quiet.
+    """
+
+    def __init__(self, loop_thread: int):
+        self.threads: Set[int] = {loop_thread}
+        self.self_samples: Dict[FunctionKey, int] = defaultdict(int)
+        self.total_samples: Dict[FunctionKey, int] = defaultdict(int)
+        self.samples = 0
+        self.statements: Dict[str, List[float]] = defaultdict(list)
+        self._stop = threading.Event()
+        self._sampler = threading.Thread(target=self._sample, name="request-profiler", daemon=True)
+
+    def _sample(self) -> None:
+        while not self._stop.wait(PROFILE_SAMPLE_INTERVAL):
+            frames = sys._current_frames()
+            for ident in list(self.threads):
+                frame = frames.get(ident)
+                if frame is None or frame.f_code.co_filename.endswith(IDLE_FILES):
+                    continue
+                self.samples += 1
+                self.self_samples[self._key(frame)] += 1
+                seen = set()
+                while frame is not None:
+                    key = self._key(frame)
+                    if key not in seen:
+                        seen.add(key)
+                        self.total_samples[key] += 1
+                    frame = frame.f_back
+
+    @staticmethod
+    def _key(frame: Any) -> FunctionKey:
+        return frame.f_code.co_filename, frame.f_code.co_firstlineno, frame.f_code.co_name
+
+    def start(self) -> None:
+        self.started = time.perf_counter()
+        self._started_tracing = not tracemalloc.is_tracing()
+        if self._started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        self._memory_start = tracemalloc.get_traced_memory()[0]
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._sampler.join()
+        self.wall = time.perf_counter() - self.started
+        current, peak = tracemalloc.get_traced_memory()
+        self.memory = {
+            "peak_kb": round((peak - self._memory_start) / 1024, 1),
+            "retained_kb": round((current - self._memory_start) / 1024, 1),
+        }
+        if self._started_tracing:
+            tracemalloc.stop()
+
+    def record_statement(self, statement: str, seconds: float) -> None:
+        self.statements[" ".join(statement.split())].append(seconds)
+
+    @staticmethod
+    def _location(filename: str, line: int, name: str) -> str:
+        if filename.startswith(APP_ROOT):
+            filename = filename[len(APP_ROOT):]
+        elif "site-packages" + os.sep in filename:
+            filename = filename.split("site-packages" + os.sep, 1)[1]
+        return f"{filename}:{line} {name}"
+
+    def _functions(self, keys: List[FunctionKey], per_sample: float) -> List[Dict[str, Any]]:
+        return [
+            {
+                "function": self._location(*key),
+                "self_ms": round(self.self_samples.get(key, 0) * per_sample, 2),
+                "total_ms": round(self.total_samples[key] * per_sample, 2),
+            }
+            for key in keys[:PROFILE_TOP]
+        ]
+
+    def summary(self) -> Dict[str, Any]:
+        # A sample stands for the time between two samples, which is longer than the interval under load
+        per_sample = self.wall / self.samples * 1000 if self.samples else 0.0
+        hottest = sorted(self.self_samples, key=lambda key: -self.self_samples[key])
+        application = sorted(
+            (key for key in self.total_samples if key[0].startswith(APP_ROOT) and key[0] != __file__),
+            key=lambda key: -self.total_samples[key],
+        )
+        statements = sorted(self.statements.items(), key=lambda item: -sum(item[1]))
+        return {
+            "wall_ms": round(self.wall * 1000, 2),
+            "samples": self.samples,
+            # Where the time was spent, and which of our own functions it was spent under
+            "functions": self._functions(hottest, per_sample),
+            "app_functions": self._functions(application, per_sample),
+            "sql": {
+                "statements": sum(len(timings) for timings in self.statements.values()),
+                "total_ms": round(sum(sum(timings) for timings in self.statements.values()) * 1000, 2),
+                "top": [
+                    {
+                        "statement": statement,
+                        "count": len(timings),
+                        "total_ms": round(sum(timings) * 1000, 2),
+                        "max_ms": round(max(timings) * 1000, 2),
+                    }
+                    for statement, timings in statements[:PROFILE_TOP]
+                ],
+            },
+            "memory": self.memory,
+        }
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _active.get()
+    if profile is not None:
+        profile.threads.add(threading.get_ident())
+        conn.info.setdefault("profile_started", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _active.get()
+    if profile is not None and conn.info.get("profile_started"):
+        profile.record_statement(statement, time.perf_counter() - conn.info["profile_started"].pop())
+
+class ProfilingMiddleware:
+    """
+    Profile a single request on demand: with PROFILE_TOKEN set, a request carrying it in
+    an X-Profile header runs under a stack sampler, SQL timing and tracemalloc, and its
+    response becomes a 200 with {"status_code", "response", "profile"}. Profiled requests
+    run one at a time; tracemalloc slows the whole process while one is in flight.
+    Without PROFILE_TOKEN the middleware passes everything straight through.
+    """
+
+    def __init__(self, app: ASGIApp, token: Optional[str] = None):
+        self.app = app
+        self.token = token if token is not None else PROFILE_TOKEN
+        self._lock = asyncio.Lock()
+        if self.token and not event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+            # Engine-class listeners cover the main engine and every shard engine
+            event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+            event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not self.token:
+            await self.app(scope, receive, send)
+            return
+        supplied = Headers(scope=scope).get(PROFILE_HEADER)
+        if supplied is None:
+            await self.app(scope, receive, send)
+            return
+        if not hmac.compare_digest(supplied.encode(), self.token.encode()):
+            metrics.increment("profile_rejected")
+            await self.app(scope, receive, send)
+            return
+
+        start_message: Optional[Message] = None
+        chunks: List[bytes] = []
+
+        async def buffered_send(message: Message) -> None:
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                start_message = message
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            else:
+                await send(message)
+
+        async with self._lock:
+            profile = RequestProfile(threading.get_ident())
+            context_token = _active.set(profile)
+            profile.start()
+            try:
+                await self.app(scope, receive, buffered_send)
+            finally:
+                profile.stop()
+                _active.reset(context_token)
+        metrics.increment("requests_profiled")
+        await self._send_profile(start_message, b"".join(chunks), profile, send)
+
+    @staticmethod
+    async def _send_profile(start_message: Optional[Message], body: bytes, profile: RequestProfile, send: Send) -> None:
+        status = start_message["status"] if start_message else 500
+        original = Headers(raw=start_message["headers"] if start_message else [])
+        if original.get("content-type", "").startswith("application/json") and body:
+            response: Any = json.loads(body)
+        else:
+            response = body.decode("utf-8", errors="replace")
+        encoded = json.dumps(
+            {"status_code": status, "response": response, "profile": profile.summary()},
+            separators=(",", ":"), default=str,
+        ).encode("utf-8")
+
+        headers = MutableHeaders()
+        headers["content-type"] = "application/json"
+        headers["content-length"] = str(len(encoded))
+        headers["cache-control"] = "no-store"
+        await send({"type": "http.response.start", "status": 200, "headers": headers.raw})
+        await send({"type": "http.response.body", "body": encoded})
@@ -7,10 +7,19 @@ from .liabilities import Liability
 from .income import Income
 from .expenses import Expense
 from .bills import Bill
+from .changes import ChangeTombstone
+from .kpi_history import KpiHistory
+from .events import PlannerEvent, PlannerCheckpoint
+from .fx_rates import FxRate
+from .jobs import Job
+from .directory import ItemHousehold
+from .search import SEARCH_TABLES
 
 __all__ = [
     "Base",
     "AppUser", "Household", "HouseholdMember",
     "Planner", "PlannerSettings", "ScenarioSettings", "ScenarioItem",
-    "Category", "Asset", "Liability", "Income", "Expense", "Bill"
+    "Category", "Asset", "Liability", "Income", "Expense", "Bill",
+    "ChangeTombstone", "KpiHistory", "PlannerEvent", "PlannerCheckpoint", "FxRate", "Job", "ItemHousehold",
+    "SEARCH_TABLES"
 ]
@@ -1,9 +1,9 @@
-from sqlalchemy import Column, String, Text, ForeignKey, Numeric
+from sqlalchemy import Column, String, Text, ForeignKey, Numeric, BigInteger, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
 
-from .base import Base, TimestampMixin
+from .base import Base, TimestampMixin, cents_column
 
 class Asset(Base, TimestampMixin):
     __tablename__ = "assets"
@@ -12,8 +12,12 @@ class Asset(Base, TimestampMixin):
     planner_id = Column(UUID(as_uuid=True), ForeignKey("planners.id"), nullable=False)
     name = Column(Text, nullable=False)
     include_toggle = Column(String, nullable=False, default="off")  # 'on' or 'off'
-    scenario = Column(String, nullable=False, default="ALL")  # 'ALL', 'A', 'B', 'C'
+    scenario = Column(String, nullable=False, default="ALL")  # 'ALL' or a primary scenario identifier
+    scenario_mask = Column(BigInteger, nullable=False, default=0, server_default="0")  # Bits of additional scenarios (ScenarioSettings.scenario_bit)
+    scenario_exclude_mask = Column(BigInteger, nullable=False, default=0, server_default="0")  # Bits of forked scenarios that exclude this item
     sale_value = Column(Numeric(14, 2), nullable=False, default=0.00)
+    sale_value_cents = cents_column("sale_value")
+    currency_code = Column(String(3))  # ISO 4217; NULL means the planner's reporting currency
     notes = Column(Text)
     
     # Relationships
@@ -21,3 +25,5 @@ class Asset(Base, TimestampMixin):
     linked_liabilities = relationship("Liability", back_populates="linked_asset")
     linked_expenses = relationship("Expense", back_populates="linked_asset")
     linked_bills = relationship("Bill", back_populates="linked_asset")
+    
+    __table_args__ = (Index("ix_assets_planner_updated", "planner_id", "updated_at"),)
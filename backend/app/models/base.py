@@ -1,16 +1,29 @@
-from sqlalchemy import Column, DateTime, func
+from sqlalchemy import Column, DateTime, BigInteger, Computed, func
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import declared_attr
+from datetime import datetime, timezone
 
 Base = declarative_base()
 
+def utcnow() -> datetime:
+    """Application-side timestamp; keeps microseconds, which the change feed cursor relies on"""
+    return datetime.now(timezone.utc)
+
+def cents_column(amount_column: str) -> Column:
+    """
+    Generated int64 copy of a Numeric(14, 2) money column in minor units (cents).
+    SQLite keeps Numeric values as floating point; rounding once per row on write
+    lets every aggregate run as an exact integer SUM.
+    """
+    return Column(BigInteger, Computed(f"CAST(ROUND({amount_column} * 100) AS BIGINT)", persisted=True))
+
 class TimestampMixin:
     """Mixin to add created_at and updated_at timestamps to models"""
     
     @declared_attr
     def created_at(cls):
-        return Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+        return Column(DateTime(timezone=True), default=utcnow, server_default=func.now(), nullable=False)
     
     @declared_attr
     def updated_at(cls):
-        return Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+        return Column(DateTime(timezone=True), default=utcnow, server_default=func.now(), onupdate=utcnow, nullable=False)
@@ -1,9 +1,9 @@
-from sqlalchemy import Column, String, Text, ForeignKey, Numeric, Integer
+from sqlalchemy import Column, String, Text, ForeignKey, Numeric, BigInteger, Integer, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
 
-from .base import Base, TimestampMixin
+from .base import Base, TimestampMixin, cents_column
 
 class Bill(Base, TimestampMixin):
     __tablename__ = "bills"
@@ -12,12 +12,21 @@ class Bill(Base, TimestampMixin):
     planner_id = Column(UUID(as_uuid=True), ForeignKey("planners.id"), nullable=False)
     name = Column(Text, nullable=False)
     include_toggle = Column(String, nullable=False, default="on")  # 'on' or 'off'
-    scenario = Column(String, nullable=False, default="ALL")  # 'ALL', 'A', 'B', 'C'
+    scenario = Column(String, nullable=False, default="ALL")  # 'ALL' or a primary scenario identifier
+    scenario_mask = Column(BigInteger, nullable=False, default=0, server_default="0")  # Bits of additional scenarios (ScenarioSettings.scenario_bit)
+    scenario_exclude_mask = Column(BigInteger, nullable=False, default=0, server_default="0")  # Bits of forked scenarios that exclude this item
     
     # Enhanced billing fields
     bill_amount = Column(Numeric(14, 2), nullable=False, default=0.00)  # Total bill amount
     interval_months = Column(Integer, nullable=False, default=1)  # How often bill is paid (1=monthly, 3=quarterly, etc.)
     monthly_average = Column(Numeric(14, 2), nullable=False, default=0.00)  # Calculated monthly average
+    bill_amount_cents = cents_column("bill_amount")
+    monthly_average_cents = cents_column("monthly_average")
+    currency_code = Column(String(3))  # ISO 4217; NULL means the planner's reporting currency
+    
+    # Payment schedule: anchor month and precomputed 12-bit mask of due months (bit 0 = January)
+    first_due_month = Column(Integer, nullable=False, default=1, server_default="1")
+    due_month_mask = Column(Integer, nullable=False, default=0xFFF, server_default=str(0xFFF))
     
     # Legacy field for backward compatibility (will be calculated from bill_amount / interval_months)
     monthly_amount = Column(Numeric(14, 2), nullable=False, default=0.00)
@@ -32,3 +41,8 @@ class Bill(Base, TimestampMixin):
     category = relationship("Category", back_populates="bills")
     linked_asset = relationship("Asset", back_populates="linked_bills")
     linked_liability = relationship("Liability", back_populates="linked_bills")
+    
+    __table_args__ = (
+        Index("ix_bills_planner_updated", "planner_id", "updated_at"),
+        Index("ix_bills_planner_category", "planner_id", "category_id"),
+    )
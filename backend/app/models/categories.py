@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, ForeignKey, UniqueConstraint
+from sqlalchemy import Column, String, Text, ForeignKey, UniqueConstraint, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
@@ -18,4 +18,7 @@ class Category(Base, TimestampMixin):
     expenses = relationship("Expense", back_populates="category")
     bills = relationship("Bill", back_populates="category")
     
-    __table_args__ = (UniqueConstraint("planner_id", "kind", "name"),)
+    __table_args__ = (
+        UniqueConstraint("planner_id", "kind", "name"),
+        Index("ix_categories_planner_updated", "planner_id", "updated_at"),
+    )
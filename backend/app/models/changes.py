@@ -0,0 +1,17 @@
+from sqlalchemy import Column, String, ForeignKey, DateTime, Index
+from sqlalchemy.dialects.postgresql import UUID
+import uuid
+
+from .base import Base, utcnow
+
+class ChangeTombstone(Base):
+    """A deleted row, kept so the change feed can report deletes"""
+    __tablename__ = "change_tombstones"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    planner_id = Column(UUID(as_uuid=True), ForeignKey("planners.id"), nullable=False)
+    entity_type = Column(String, nullable=False)  # Table name of the deleted row, e.g. 'assets'
+    entity_id = Column(UUID(as_uuid=True), nullable=False)
+    deleted_at = Column(DateTime(timezone=True), nullable=False, default=utcnow)
+    
+    __table_args__ = (Index("ix_change_tombstones_planner_deleted", "planner_id", "deleted_at"),)
@@ -0,0 +1,15 @@
+from sqlalchemy import Column
+from sqlalchemy.dialects.postgresql import UUID
+
+from .base import Base
+
+class ItemHousehold(Base):
+    """
+    Directory entry of a sharded row addressed by id alone (items, categories, scenarios):
+    the household whose shard holds it. Used only in the directory database
+    (DATABASE_SHARDING=household); entries outlive deleted rows, since ids are never reused.
+    """
+    __tablename__ = "item_households"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True)
+    household_id = Column(UUID(as_uuid=True), nullable=False)
@@ -0,0 +1,36 @@
+from sqlalchemy import Column, String, ForeignKey, DateTime, Integer, LargeBinary, JSON, Index
+from sqlalchemy.dialects.postgresql import UUID
+
+from .base import Base, utcnow
+
+class PlannerEvent(Base):
+    """One row-level mutation of a planner; append-only"""
+    __tablename__ = "planner_events"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)  # Global order of events
+    planner_id = Column(UUID(as_uuid=True), ForeignKey("planners.id"), nullable=False)
+    transaction_id = Column(UUID(as_uuid=True), nullable=False)  # Events written by one request share it
+    undo_of = Column(UUID(as_uuid=True), nullable=True)  # transaction_id this transaction reverted
+    entity_type = Column(String, nullable=False)  # Change feed entity type, e.g. 'assets'
+    entity_id = Column(UUID(as_uuid=True), nullable=False)
+    op = Column(String, nullable=False)  # 'create', 'update' or 'delete'
+    before = Column(JSON, nullable=True)  # Row before the change (None for create)
+    after = Column(JSON, nullable=True)  # Row after the change (None for delete)
+    recorded_at = Column(DateTime(timezone=True), nullable=False, default=utcnow)
+    
+    __table_args__ = (
+        Index("ix_planner_events_planner_id", "planner_id", "id"),
+        Index("ix_planner_events_transaction", "transaction_id"),
+    )
+
+class PlannerCheckpoint(Base):
+    """Full state of a planner after event last_event_id, zlib-compressed JSON"""
+    __tablename__ = "planner_checkpoints"
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    planner_id = Column(UUID(as_uuid=True), ForeignKey("planners.id"), nullable=False)
+    last_event_id = Column(Integer, nullable=False)  # 0 for the baseline taken before the first event
+    state = Column(LargeBinary, nullable=False)
+    recorded_at = Column(DateTime(timezone=True), nullable=False, default=utcnow)
+    
+    __table_args__ = (Index("ix_planner_checkpoints_planner_recorded", "planner_id", "recorded_at"),)
@@ -1,9 +1,9 @@
-from sqlalchemy import Column, String, Text, ForeignKey, Numeric
+from sqlalchemy import Column, String, Text, ForeignKey, Numeric, BigInteger, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
 
-from .base import Base, TimestampMixin
+from .base import Base, TimestampMixin, cents_column
 
 class Expense(Base, TimestampMixin):
     __tablename__ = "expenses"
@@ -12,8 +12,12 @@ class Expense(Base, TimestampMixin):
     planner_id = Column(UUID(as_uuid=True), ForeignKey("planners.id"), nullable=False)
     name = Column(Text, nullable=False)
     include_toggle = Column(String, nullable=False, default="on")  # 'on' or 'off'
-    scenario = Column(String, nullable=False, default="ALL")  # 'ALL', 'A', 'B', 'C'
+    scenario = Column(String, nullable=False, default="ALL")  # 'ALL' or a primary scenario identifier
+    scenario_mask = Column(BigInteger, nullable=False, default=0, server_default="0")  # Bits of additional scenarios (ScenarioSettings.scenario_bit)
+    scenario_exclude_mask = Column(BigInteger, nullable=False, default=0, server_default="0")  # Bits of forked scenarios that exclude this item
     monthly_amount = Column(Numeric(14, 2), nullable=False, default=0.00)
+    monthly_amount_cents = cents_column("monthly_amount")
+    currency_code = Column(String(3))  # ISO 4217; NULL means the planner's reporting currency
     category_id = Column(UUID(as_uuid=True), ForeignKey("categories.id"))
     linked_asset_id = Column(UUID(as_uuid=True), ForeignKey("assets.id"))
     linked_liab_id = Column(UUID(as_uuid=True), ForeignKey("liabilities.id"))
@@ -24,3 +28,8 @@ class Expense(Base, TimestampMixin):
     category = relationship("Category", back_populates="expenses")
     linked_asset = relationship("Asset", back_populates="linked_expenses")
     linked_liability = relationship("Liability", back_populates="linked_expenses")
+    
+    __table_args__ = (
+        Index("ix_expenses_planner_updated", "planner_id", "updated_at"),
+        Index("ix_expenses_planner_category", "planner_id", "category_id"),
+    )
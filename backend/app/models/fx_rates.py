@@ -0,0 +1,11 @@
+from sqlalchemy import Column, String, Date, Numeric
+
+from .base import Base
+
+class FxRate(Base):
+    """Exchange rate of a currency on a date, as units of the currency per one FX_BASE_CURRENCY (ECB style)"""
+    __tablename__ = "fx_rates"
+    
+    currency_code = Column(String(3), primary_key=True)  # ISO 4217
+    rate_date = Column(Date, primary_key=True)
+    rate = Column(Numeric(20, 10), nullable=False)
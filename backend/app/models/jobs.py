@@ -0,0 +1,29 @@
+from sqlalchemy import Column, String, Text, Float, Boolean, DateTime, Index
+from sqlalchemy.dialects.postgresql import UUID
+import uuid
+
+from .base import Base, TimestampMixin
+
+class Job(Base, TimestampMixin):
+    """A background computation run by the in-process job queue (services.jobs)"""
+    __tablename__ = "jobs"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    planner_id = Column(UUID(as_uuid=True), nullable=False)  # No FK: jobs live in the main database, planners may be in a shard
+    kind = Column(String, nullable=False)  # Key of services.jobs.JOB_KINDS
+    status = Column(String, nullable=False, default="queued")  # 'queued', 'running', 'succeeded', 'failed' or 'cancelled'
+    params = Column(Text, nullable=False, default="{}")  # JSON
+    progress = Column(Float, nullable=False, default=0.0)  # 0..1
+    message = Column(Text)
+    cancel_requested = Column(Boolean, nullable=False, default=False)
+    result = Column(Text)  # JSON, once succeeded
+    error = Column(Text)
+    started_at = Column(DateTime(timezone=True))
+    worker_id = Column(String)  # Queue that claimed the running job (JobQueue.worker_id)
+    heartbeat_at = Column(DateTime(timezone=True))  # Last stamp of that queue while the job runs
+    finished_at = Column(DateTime(timezone=True))
+    
+    __table_args__ = (
+        Index("ix_jobs_status_created", "status", "created_at"),
+        Index("ix_jobs_planner_created", "planner_id", "created_at"),
+    )
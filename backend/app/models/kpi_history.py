@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, ForeignKey, BigInteger, Float
+from sqlalchemy.dialects.postgresql import UUID
+
+from .base import Base
+
+class KpiHistory(Base):
+    """Cash flow KPIs of a planner scenario, one row per history period (the last value seen in it)"""
+    __tablename__ = "kpi_history"
+    
+    planner_id = Column(UUID(as_uuid=True), ForeignKey("planners.id"), primary_key=True)
+    scenario = Column(String, primary_key=True)  # 'ALL' or a scenario identifier
+    period_start = Column(BigInteger, primary_key=True)  # Unix seconds, a multiple of the period length
+    net_cash_flow = Column(Float, nullable=False)
+    net_value = Column(Float, nullable=False)
@@ -1,9 +1,9 @@
-from sqlalchemy import Column, String, Text, ForeignKey, Numeric
+from sqlalchemy import Column, String, Text, ForeignKey, Numeric, BigInteger, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 import uuid
 
-from .base import Base, TimestampMixin
+from .base import Base, TimestampMixin, cents_column
 
 class Liability(Base, TimestampMixin):
     __tablename__ = "liabilities"
@@ -12,9 +12,14 @@ class Liability(Base, TimestampMixin):
     planner_id = Column(UUID(as_uuid=True), ForeignKey("planners.id"), nullable=False)
     name = Column(Text, nullable=False)
     include_toggle = Column(String, nullable=False, default="on")  # 'on' or 'off'
-    scenario = Column(String, nullable=False, default="ALL")  # 'ALL', 'A', 'B', 'C'
+    scenario = Column(String, nullable=False, default="ALL")  # 'ALL' or a primary scenario identifier
+    scenario_mask = Column(BigInteger, nullable=False, default=0, server_default="0")  # Bits of additional scenarios (ScenarioSettings.scenario_bit)
+    scenario_exclude_mask = Column(BigInteger, nullable=False, default=0, server_default="0")  # Bits of forked scenarios that exclude this item
     monthly_cost = Column(Numeric(14, 2), nullable=False, default=0.00)
     principal = Column(Numeric(14, 2))
+    monthly_cost_cents = cents_column("monthly_cost")
+    principal_cents = cents_column("principal")
+    currency_code = Column(String(3))  # ISO 4217; NULL means the planner's reporting currency
     linked_asset_id = Column(UUID(as_uuid=True), ForeignKey("assets.id"))
     notes = Column(Text)
     
@@ -23,3 +28,5 @@ class Liability(Base, TimestampMixin):
     linked_asset = relationship("Asset", back_populates="linked_liabilities")
     linked_expenses = relationship("Expense", back_populates="linked_liability")
     linked_bills = relationship("Bill", back_populates="linked_liability")
+    
+    __table_args__ = (Index("ix_liabilities_planner_updated", "planner_id", "updated_at"),)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Text, ForeignKey, Integer, DateTime
+from sqlalchemy import Column, String, Text, ForeignKey, Integer, DateTime, UniqueConstraint, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -25,6 +25,8 @@ class Planner(Base, TimestampMixin):
     expenses = relationship("Expense", back_populates="planner")
     bills = relationship("Bill", back_populates="planner")
     categories = relationship("Category", back_populates="planner")
+    
+    __table_args__ = (Index("ix_planners_household", "household_id"),)
 
 class PlannerSettings(Base, TimestampMixin):
     __tablename__ = "planner_settings"
@@ -44,10 +46,17 @@ class ScenarioSettings(Base, TimestampMixin):
     scenario = Column(String, nullable=False)  # 'A', 'B', 'C', etc.
     display_name = Column(Text, nullable=False, default="")  # User-friendly name like "Sell House"
     sale_month = Column(Integer, nullable=False, default=0)  # Month to sell assets (0 = no sales)
+    scenario_bit = Column(Integer, nullable=False)  # Bit position in item scenario_mask columns (0-62)
+    parent_id = Column(UUID(as_uuid=True), ForeignKey("scenario_settings.id"), nullable=True)  # Scenario this one was forked from
     
     # Relationships
     planner = relationship("Planner", back_populates="scenario_settings")
     scenario_items = relationship("ScenarioItem", back_populates="scenario")
+    
+    __table_args__ = (
+        UniqueConstraint("planner_id", "scenario_bit"),
+        Index("ix_scenario_settings_planner_updated", "planner_id", "updated_at"),
+    )
 
 class ScenarioItem(Base, TimestampMixin):
     __tablename__ = "scenario_items"
@@ -59,3 +68,5 @@ class ScenarioItem(Base, TimestampMixin):
     
     # Relationships
     scenario = relationship("ScenarioSettings", back_populates="scenario_items")
+    
+    __table_args__ = (Index("ix_scenario_items_scenario_item", "scenario_id", "item_type", "item_id"),)
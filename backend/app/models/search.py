@@ -0,0 +1,56 @@
+from sqlalchemy import DDL, event
+from typing import List
+
+from .base import Base
+
+# Item tables searchable by name and notes; each gets an FTS5 index named <table>_search
+SEARCH_TABLES = ["assets", "liabilities", "income", "expenses", "bills"]
+
+def search_ddl(table: str) -> List[str]:
+    """
+    Statements creating the FTS5 index of a table and the triggers that keep it in sync.
+
+    The index stores its own copy of name and notes next to the item id (UNINDEXED), and
+    searches join back on that id, so nothing depends on the item table's rowids, which
+    VACUUM may renumber. Renames and deletes find the index row by id with a scan of the
+    index's stored rows.
+    """
+    index = f"{table}_search"
+    return [
+        f"""
+        CREATE VIRTUAL TABLE IF NOT EXISTS {index} USING fts5(
+            id UNINDEXED, name, notes,
+            tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+        )
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {index}_insert AFTER INSERT ON {table} BEGIN
+            INSERT INTO {index}(id, name, notes) VALUES (new.id, new.name, new.notes);
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {index}_delete AFTER DELETE ON {table} BEGIN
+            DELETE FROM {index} WHERE id = old.id;
+        END
+        """,
+        f"""
+        CREATE TRIGGER IF NOT EXISTS {index}_update AFTER UPDATE OF name, notes ON {table} BEGIN
+            UPDATE {index} SET name = new.name, notes = new.notes WHERE id = old.id;
+        END
+        """,
+    ]
+
+def drop_search_ddl(table: str) -> List[str]:
+    """Statements removing a table's FTS5 index and triggers, e.g. to rebuild them"""
+    index = f"{table}_search"
+    return [
+        f"DROP TRIGGER IF EXISTS {index}_insert",
+        f"DROP TRIGGER IF EXISTS {index}_delete",
+        f"DROP TRIGGER IF EXISTS {index}_update",
+        f"DROP TABLE IF EXISTS {index}",
+    ]
+
+# create_all (startup, shards) adds the indexes to new SQLite databases
+for _table in SEARCH_TABLES:
+    for _statement in search_ddl(_table):
+        event.listen(Base.metadata.tables[_table], "after_create", DDL(_statement).execute_if(dialect="sqlite"))
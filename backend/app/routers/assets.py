@@ -4,8 +4,11 @@ from typing import List
 import uuid
 
 from ..database.connection import get_db
-from ..models import Asset
+from ..models import Asset, Liability, Expense, Bill
 from ..schemas.asset import AssetCreate, AssetUpdate, AssetResponse
+from ..services.crud import CRUDService
+from ..services.reads import ReadService
+from ..services.write_coalescer import write_coalescer
 
 router = APIRouter()
 
@@ -16,18 +19,7 @@ async def get_assets(
     db: Session = Depends(get_db)
 ):
     """Get all assets for a planner, filtered by scenario"""
-    if scenario == "ALL":
-        # For table view: show ALL assets regardless of scenario
-        assets = db.query(Asset).filter(
-            Asset.planner_id == planner_id
-        ).all()
-    else:
-        # For overview calculations: filter by specific scenario (including ALL scenario assets)
-        assets = db.query(Asset).filter(
-            Asset.planner_id == planner_id,
-            (Asset.scenario == "ALL") | (Asset.scenario == scenario)
-        ).all()
-    return assets
+    return ReadService.respond(ReadService.planner_rows(db, Asset, AssetResponse, planner_id, scenario))
 
 @router.post("/assets", response_model=AssetResponse)
 async def create_asset(
@@ -35,11 +27,7 @@ async def create_asset(
     db: Session = Depends(get_db)
 ):
     """Create a new asset"""
-    db_asset = Asset(**asset.dict())
-    db.add(db_asset)
-    db.commit()
-    db.refresh(db_asset)
-    return db_asset
+    return CRUDService.create(db, Asset, asset.dict())
 
 @router.get("/assets/{asset_id}", response_model=AssetResponse)
 async def get_asset(
@@ -47,10 +35,11 @@ async def get_asset(
     db: Session = Depends(get_db)
 ):
     """Get a specific asset by ID"""
-    asset = db.query(Asset).filter(Asset.id == asset_id).first()
+    await write_coalescer.settle((Asset.__tablename__, asset_id))
+    asset = ReadService.one(db, Asset, AssetResponse, asset_id)
     if not asset:
         raise HTTPException(status_code=404, detail="Asset not found")
-    return asset
+    return ReadService.respond(asset)
 
 @router.put("/assets/{asset_id}", response_model=AssetResponse)
 async def update_asset(
@@ -59,15 +48,25 @@ async def update_asset(
     db: Session = Depends(get_db)
 ):
     """Update an existing asset"""
-    db_asset = db.query(Asset).filter(Asset.id == asset_id).first()
-    if not db_asset:
+    db_asset = CRUDService.update(db, Asset, asset_id, asset.dict(exclude_unset=True))
+    if db_asset is None:
+        raise HTTPException(status_code=404, detail="Asset not found")
+    return db_asset
+
+@router.patch("/assets/{asset_id}", response_model=AssetResponse)
+async def patch_asset(
+    asset_id: uuid.UUID,
+    asset: AssetUpdate,
+    db: Session = Depends(get_db)
+):
+    """Update individual fields; edits to the same asset within the coalescing window share one UPDATE"""
+    db_asset = await write_coalescer.submit(
+        (Asset.__tablename__, asset_id),
+        asset.dict(exclude_unset=True),
+        lambda values: CRUDService.update(db, Asset, asset_id, values),
+    )
+    if db_asset is None:
         raise HTTPException(status_code=404, detail="Asset not found")
-    
-    for field, value in asset.dict(exclude_unset=True).items():
-        setattr(db_asset, field, value)
-    
-    db.commit()
-    db.refresh(db_asset)
     return db_asset
 
 @router.delete("/assets/{asset_id}")
@@ -76,10 +75,6 @@ async def delete_asset(
     db: Session = Depends(get_db)
 ):
     """Delete an asset"""
-    db_asset = db.query(Asset).filter(Asset.id == asset_id).first()
-    if not db_asset:
+    if not CRUDService.delete(db, Asset, asset_id, nullify=[Liability.linked_asset_id, Expense.linked_asset_id, Bill.linked_asset_id]):
         raise HTTPException(status_code=404, detail="Asset not found")
-    
-    db.delete(db_asset)
-    db.commit()
     return {"message": "Asset deleted successfully"}
@@ -2,10 +2,15 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
 import uuid
-from decimal import Decimal
+from sqlalchemy import func, literal
 from ..database.connection import get_db
 from ..models.bills import Bill
 from ..schemas.bill import BillCreate, BillUpdate, BillResponse
+from ..services.crud import CRUDService
+from ..services.reads import ReadService
+from ..services.write_coalescer import write_coalescer
+from ..services.bill_schedule import BillScheduleService
+from ..services.money import to_cents, to_decimal, divide_cents
 
 router = APIRouter()
 
@@ -16,53 +21,59 @@ async def get_bills(
     db: Session = Depends(get_db)
 ):
     """Get all bills for a planner, filtered by scenario"""
-    if scenario == "ALL":
-        # For table view: show ALL bills regardless of scenario
-        bills = db.query(Bill).filter(
-            Bill.planner_id == planner_id
-        ).all()
-    else:
-        # For overview calculations: filter by specific scenario (including ALL scenario bills)
-        bills = db.query(Bill).filter(
-            Bill.planner_id == planner_id,
-            (Bill.scenario == "ALL") | (Bill.scenario == scenario)
-        ).all()
-    
-    # Calculate monthly_average for each bill if not already set
-    for bill in bills:
-        if bill.monthly_average == 0 and bill.bill_amount > 0 and bill.interval_months > 0:
-            bill.monthly_average = bill.bill_amount / bill.interval_months
-    
-    return bills
+    return ReadService.respond(ReadService.planner_rows(db, Bill, BillResponse, planner_id, scenario))
 
 @router.get("/bills/{bill_id}", response_model=BillResponse)
 async def get_bill(bill_id: uuid.UUID, db: Session = Depends(get_db)):
     """Get a specific bill by ID"""
-    bill = db.query(Bill).filter(Bill.id == bill_id).first()
+    await write_coalescer.settle((Bill.__tablename__, bill_id))
+    bill = ReadService.one(db, Bill, BillResponse, bill_id)
     if not bill:
         raise HTTPException(status_code=404, detail="Bill not found")
-    
-    # Calculate monthly_average if not already set
-    if bill.monthly_average == 0 and bill.bill_amount > 0 and bill.interval_months > 0:
-        bill.monthly_average = bill.bill_amount / bill.interval_months
-    
-    return bill
+    return ReadService.respond(bill)
 
 @router.post("/bills", response_model=BillResponse)
 async def create_bill(bill: BillCreate, db: Session = Depends(get_db)):
     """Create a new bill"""
     # Calculate monthly_average and set monthly_amount for backward compatibility
-    monthly_average = bill.bill_amount / bill.interval_months if bill.interval_months > 0 else Decimal('0.00')
+    monthly_average = monthly_average_of(bill.bill_amount, bill.interval_months)
     
     bill_data = bill.model_dump()
     bill_data['monthly_average'] = monthly_average
     bill_data['monthly_amount'] = monthly_average  # Legacy field
+    bill_data['due_month_mask'] = BillScheduleService.due_month_mask(bill.first_due_month, bill.interval_months)
     
-    db_bill = Bill(**bill_data)
-    db.add(db_bill)
-    db.commit()
-    db.refresh(db_bill)
-    return db_bill
+    return CRUDService.create(db, Bill, bill_data)
+
+def monthly_average_of(bill_amount, interval_months: int):
+    """Monthly average rounded to the cent, computed in integer cents (0.00 for an invalid interval)"""
+    return to_decimal(divide_cents(to_cents(bill_amount), interval_months))
+
+def bill_update_values(update_data: dict) -> dict:
+    """Add the derived columns (monthly average, due month mask) an update of bill fields implies"""
+    update_data = dict(update_data)
+
+    # Recalculate monthly_average if bill_amount or interval_months changed.
+    # Missing operands refer to the row's current values, so this stays a single UPDATE.
+    if 'bill_amount' in update_data or 'interval_months' in update_data:
+        bill_amount = update_data.get('bill_amount', Bill.bill_amount)
+        interval_months = update_data.get('interval_months', Bill.interval_months)
+        
+        if 'bill_amount' in update_data and 'interval_months' in update_data:
+            monthly_average = monthly_average_of(bill_amount, interval_months)
+        else:
+            # Multiply by 1.0 so SQLite does not fall back to integer division; rounded to
+            # the cent like the Python path, so monthly_average matches monthly_average_cents
+            monthly_average = func.round(literal(1.0) * bill_amount / interval_months, 2)
+        update_data['monthly_average'] = monthly_average
+        update_data['monthly_amount'] = monthly_average  # Legacy field
+    
+    # Recalculate the due month mask if the schedule changed
+    if 'first_due_month' in update_data or 'interval_months' in update_data:
+        update_data['due_month_mask'] = BillScheduleService.mask_expression(
+            update_data, Bill.first_due_month, Bill.interval_months
+        )
+    return update_data
 
 @router.put("/bills/{bill_id}", response_model=BillResponse)
 async def update_bill(
@@ -71,36 +82,32 @@ async def update_bill(
     db: Session = Depends(get_db)
 ):
     """Update an existing bill"""
-    db_bill = db.query(Bill).filter(Bill.id == bill_id).first()
-    if not db_bill:
+    update_data = bill_update_values(bill.model_dump(exclude_unset=True))
+    db_bill = CRUDService.update(db, Bill, bill_id, update_data)
+    if db_bill is None:
+        raise HTTPException(status_code=404, detail="Bill not found")
+    return db_bill
+
+@router.patch("/bills/{bill_id}", response_model=BillResponse)
+async def patch_bill(
+    bill_id: uuid.UUID,
+    bill: BillUpdate,
+    db: Session = Depends(get_db)
+):
+    """Update individual fields; edits to the same bill within the coalescing window share one UPDATE"""
+    # Derived columns are computed from the merged fields when the write is flushed
+    db_bill = await write_coalescer.submit(
+        (Bill.__tablename__, bill_id),
+        bill.model_dump(exclude_unset=True),
+        lambda values: CRUDService.update(db, Bill, bill_id, bill_update_values(values)),
+    )
+    if db_bill is None:
         raise HTTPException(status_code=404, detail="Bill not found")
-    
-    update_data = bill.model_dump(exclude_unset=True)
-    
-    # Recalculate monthly_average if bill_amount or interval_months changed
-    if 'bill_amount' in update_data or 'interval_months' in update_data:
-        bill_amount = update_data.get('bill_amount', db_bill.bill_amount)
-        interval_months = update_data.get('interval_months', db_bill.interval_months)
-        
-        if interval_months > 0:
-            monthly_average = bill_amount / interval_months
-            update_data['monthly_average'] = monthly_average
-            update_data['monthly_amount'] = monthly_average  # Legacy field
-    
-    for field, value in update_data.items():
-        setattr(db_bill, field, value)
-    
-    db.commit()
-    db.refresh(db_bill)
     return db_bill
 
 @router.delete("/bills/{bill_id}")
 async def delete_bill(bill_id: uuid.UUID, db: Session = Depends(get_db)):
     """Delete a bill"""
-    db_bill = db.query(Bill).filter(Bill.id == bill_id).first()
-    if not db_bill:
+    if not CRUDService.delete(db, Bill, bill_id):
         raise HTTPException(status_code=404, detail="Bill not found")
-    
-    db.delete(db_bill)
-    db.commit()
     return {"message": "Bill deleted successfully"}
@@ -4,32 +4,31 @@ from typing import List
 import uuid
 from ..database.connection import get_db
 from ..models.categories import Category
+from ..models.expenses import Expense
+from ..models.bills import Bill
 from ..schemas.category import CategoryCreate, CategoryUpdate, CategoryResponse
+from ..services.crud import CRUDService
+from ..services.reads import ReadService
 
 router = APIRouter()
 
 @router.get("/categories", response_model=List[CategoryResponse])
 async def get_categories(planner_id: uuid.UUID, db: Session = Depends(get_db)):
     """Get all categories for a planner"""
-    categories = db.query(Category).filter(Category.planner_id == planner_id).all()
-    return categories
+    return ReadService.respond(ReadService.rows(db, Category, CategoryResponse, Category.planner_id == planner_id))
 
 @router.get("/categories/{category_id}", response_model=CategoryResponse)
 async def get_category(category_id: uuid.UUID, db: Session = Depends(get_db)):
     """Get a specific category by ID"""
-    category = db.query(Category).filter(Category.id == category_id).first()
+    category = ReadService.one(db, Category, CategoryResponse, category_id)
     if not category:
         raise HTTPException(status_code=404, detail="Category not found")
-    return category
+    return ReadService.respond(category)
 
 @router.post("/categories", response_model=CategoryResponse)
 async def create_category(category: CategoryCreate, db: Session = Depends(get_db)):
     """Create a new category"""
-    db_category = Category(**category.model_dump())
-    db.add(db_category)
-    db.commit()
-    db.refresh(db_category)
-    return db_category
+    return CRUDService.create(db, Category, category.model_dump())
 
 @router.put("/categories/{category_id}", response_model=CategoryResponse)
 async def update_category(
@@ -38,25 +37,14 @@ async def update_category(
     db: Session = Depends(get_db)
 ):
     """Update an existing category"""
-    db_category = db.query(Category).filter(Category.id == category_id).first()
-    if not db_category:
+    db_category = CRUDService.update(db, Category, category_id, category.model_dump(exclude_unset=True))
+    if db_category is None:
         raise HTTPException(status_code=404, detail="Category not found")
-    
-    update_data = category.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_category, field, value)
-    
-    db.commit()
-    db.refresh(db_category)
     return db_category
 
 @router.delete("/categories/{category_id}")
 async def delete_category(category_id: uuid.UUID, db: Session = Depends(get_db)):
     """Delete a category"""
-    db_category = db.query(Category).filter(Category.id == category_id).first()
-    if not db_category:
+    if not CRUDService.delete(db, Category, category_id, nullify=[Expense.category_id, Bill.category_id]):
         raise HTTPException(status_code=404, detail="Category not found")
-    
-    db.delete(db_category)
-    db.commit()
     return {"message": "Category deleted successfully"}
@@ -5,6 +5,9 @@ import uuid
 from ..database.connection import get_db
 from ..models.expenses import Expense
 from ..schemas.expense import ExpenseCreate, ExpenseUpdate, ExpenseResponse
+from ..services.crud import CRUDService
+from ..services.reads import ReadService
+from ..services.write_coalescer import write_coalescer
 
 router = APIRouter()
 
@@ -15,35 +18,21 @@ async def get_expenses(
     db: Session = Depends(get_db)
 ):
     """Get all expenses for a planner, filtered by scenario"""
-    if scenario == "ALL":
-        # For table view: show ALL expenses regardless of scenario
-        expenses = db.query(Expense).filter(
-            Expense.planner_id == planner_id
-        ).all()
-    else:
-        # For overview calculations: filter by specific scenario (including ALL scenario expenses)
-        expenses = db.query(Expense).filter(
-            Expense.planner_id == planner_id,
-            (Expense.scenario == "ALL") | (Expense.scenario == scenario)
-        ).all()
-    return expenses
+    return ReadService.respond(ReadService.planner_rows(db, Expense, ExpenseResponse, planner_id, scenario))
 
 @router.get("/expenses/{expense_id}", response_model=ExpenseResponse)
 async def get_expense(expense_id: uuid.UUID, db: Session = Depends(get_db)):
     """Get a specific expense by ID"""
-    expense = db.query(Expense).filter(Expense.id == expense_id).first()
+    await write_coalescer.settle((Expense.__tablename__, expense_id))
+    expense = ReadService.one(db, Expense, ExpenseResponse, expense_id)
     if not expense:
         raise HTTPException(status_code=404, detail="Expense not found")
-    return expense
+    return ReadService.respond(expense)
 
 @router.post("/expenses", response_model=ExpenseResponse)
 async def create_expense(expense: ExpenseCreate, db: Session = Depends(get_db)):
     """Create a new expense"""
-    db_expense = Expense(**expense.model_dump())
-    db.add(db_expense)
-    db.commit()
-    db.refresh(db_expense)
-    return db_expense
+    return CRUDService.create(db, Expense, expense.model_dump())
 
 @router.put("/expenses/{expense_id}", response_model=ExpenseResponse)
 async def update_expense(
@@ -52,25 +41,30 @@ async def update_expense(
     db: Session = Depends(get_db)
 ):
     """Update an existing expense"""
-    db_expense = db.query(Expense).filter(Expense.id == expense_id).first()
-    if not db_expense:
+    db_expense = CRUDService.update(db, Expense, expense_id, expense.model_dump(exclude_unset=True))
+    if db_expense is None:
+        raise HTTPException(status_code=404, detail="Expense not found")
+    return db_expense
+
+@router.patch("/expenses/{expense_id}", response_model=ExpenseResponse)
+async def patch_expense(
+    expense_id: uuid.UUID,
+    expense: ExpenseUpdate,
+    db: Session = Depends(get_db)
+):
+    """Update individual fields; edits to the same expense within the coalescing window share one UPDATE"""
+    db_expense = await write_coalescer.submit(
+        (Expense.__tablename__, expense_id),
+        expense.model_dump(exclude_unset=True),
+        lambda values: CRUDService.update(db, Expense, expense_id, values),
+    )
+    if db_expense is None:
         raise HTTPException(status_code=404, detail="Expense not found")
-    
-    update_data = expense.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_expense, field, value)
-    
-    db.commit()
-    db.refresh(db_expense)
     return db_expense
 
 @router.delete("/expenses/{expense_id}")
 async def delete_expense(expense_id: uuid.UUID, db: Session = Depends(get_db)):
     """Delete an expense"""
-    db_expense = db.query(Expense).filter(Expense.id == expense_id).first()
-    if not db_expense:
+    if not CRUDService.delete(db, Expense, expense_id):
         raise HTTPException(status_code=404, detail="Expense not found")
-    
-    db.delete(db_expense)
-    db.commit()
     return {"message": "Expense deleted successfully"}
@@ -0,0 +1,31 @@
+from fastapi import APIRouter, HTTPException
+from typing import Any, Dict
+
+from ..services.fx import fx_rates, FxService, FX_RATES_FILE
+
+router = APIRouter()
+
+@router.get("/fx-rates")
+async def get_fx_rates() -> Dict[str, Any]:
+    """Latest exchange rate per currency, as units of the currency per one base currency"""
+    return {
+        "base_currency": fx_rates.base_currency,
+        "rates": [
+            {"currency_code": currency, "rate_date": rate_date.isoformat(), "rate": rate}
+            for currency, (rate_date, rate) in sorted(fx_rates.currencies().items())
+        ],
+    }
+
+@router.post("/fx-rates/reload")
+async def reload_fx_rates() -> Dict[str, Any]:
+    """
+    Replace the stored rates with the rates file and drop every cached total computed
+    with the old rates
+    """
+    try:
+        count = FxService.load_file()
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail=f"Rates file {FX_RATES_FILE} not found")
+    except (KeyError, ValueError, ArithmeticError) as e:
+        raise HTTPException(status_code=400, detail=f"Invalid rates file: {str(e)}")
+    return {"file": FX_RATES_FILE, "rates_loaded": count}
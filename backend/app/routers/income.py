@@ -5,6 +5,9 @@ import uuid
 from ..database.connection import get_db
 from ..models.income import Income
 from ..schemas.income import IncomeCreate, IncomeUpdate, IncomeResponse
+from ..services.crud import CRUDService
+from ..services.reads import ReadService
+from ..services.write_coalescer import write_coalescer
 
 router = APIRouter()
 
@@ -15,35 +18,21 @@ async def get_income(
     db: Session = Depends(get_db)
 ):
     """Get all income entries for a planner, filtered by scenario"""
-    if scenario == "ALL":
-        # For table view: show ALL income regardless of scenario
-        income_entries = db.query(Income).filter(
-            Income.planner_id == planner_id
-        ).all()
-    else:
-        # For overview calculations: filter by specific scenario (including ALL scenario income)
-        income_entries = db.query(Income).filter(
-            Income.planner_id == planner_id,
-            (Income.scenario == "ALL") | (Income.scenario == scenario)
-        ).all()
-    return income_entries
+    return ReadService.respond(ReadService.planner_rows(db, Income, IncomeResponse, planner_id, scenario))
 
 @router.get("/income/{income_id}", response_model=IncomeResponse)
 async def get_income_entry(income_id: uuid.UUID, db: Session = Depends(get_db)):
     """Get a specific income entry by ID"""
-    income = db.query(Income).filter(Income.id == income_id).first()
+    await write_coalescer.settle((Income.__tablename__, income_id))
+    income = ReadService.one(db, Income, IncomeResponse, income_id)
     if not income:
         raise HTTPException(status_code=404, detail="Income entry not found")
-    return income
+    return ReadService.respond(income)
 
 @router.post("/income", response_model=IncomeResponse)
 async def create_income(income: IncomeCreate, db: Session = Depends(get_db)):
     """Create a new income entry"""
-    db_income = Income(**income.model_dump())
-    db.add(db_income)
-    db.commit()
-    db.refresh(db_income)
-    return db_income
+    return CRUDService.create(db, Income, income.model_dump())
 
 @router.put("/income/{income_id}", response_model=IncomeResponse)
 async def update_income(
@@ -52,25 +41,30 @@ async def update_income(
     db: Session = Depends(get_db)
 ):
     """Update an existing income entry"""
-    db_income = db.query(Income).filter(Income.id == income_id).first()
-    if not db_income:
+    db_income = CRUDService.update(db, Income, income_id, income.model_dump(exclude_unset=True))
+    if db_income is None:
+        raise HTTPException(status_code=404, detail="Income entry not found")
+    return db_income
+
+@router.patch("/income/{income_id}", response_model=IncomeResponse)
+async def patch_income(
+    income_id: uuid.UUID,
+    income: IncomeUpdate,
+    db: Session = Depends(get_db)
+):
+    """Update individual fields; edits to the same income entry within the coalescing window share one UPDATE"""
+    db_income = await write_coalescer.submit(
+        (Income.__tablename__, income_id),
+        income.model_dump(exclude_unset=True),
+        lambda values: CRUDService.update(db, Income, income_id, values),
+    )
+    if db_income is None:
         raise HTTPException(status_code=404, detail="Income entry not found")
-    
-    update_data = income.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_income, field, value)
-    
-    db.commit()
-    db.refresh(db_income)
     return db_income
 
 @router.delete("/income/{income_id}")
 async def delete_income(income_id: uuid.UUID, db: Session = Depends(get_db)):
     """Delete an income entry"""
-    db_income = db.query(Income).filter(Income.id == income_id).first()
-    if not db_income:
+    if not CRUDService.delete(db, Income, income_id):
         raise HTTPException(status_code=404, detail="Income entry not found")
-    
-    db.delete(db_income)
-    db.commit()
     return {"message": "Income entry deleted successfully"}
@@ -0,0 +1,39 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Any, Dict
+import uuid
+from ..schemas.job import JobCreate
+from ..services.jobs import job_queue
+
+router = APIRouter()
+
+@router.post("/jobs", status_code=202)
+async def submit_job(job: JobCreate) -> Dict[str, Any]:
+    """
+    Queue a long computation (goal_seek, sensitivity, forecast, scenario_totals) and
+    return the job; poll GET /jobs/{id} for its progress and result
+    """
+    try:
+        return job_queue.submit(job.planner_id, job.kind, job.params)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/jobs")
+async def list_jobs(planner_id: uuid.UUID, limit: int = Query(50, ge=1, le=500)) -> Dict[str, Any]:
+    """A planner's jobs, newest first"""
+    return {"planner_id": str(planner_id), "jobs": job_queue.for_planner(planner_id, limit)}
+
+@router.get("/jobs/{job_id}")
+async def get_job(job_id: uuid.UUID) -> Dict[str, Any]:
+    """Status, progress and, once succeeded, the result of a job"""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+@router.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: uuid.UUID) -> Dict[str, Any]:
+    """Cancel a queued job, or ask a running one to stop at its next progress report"""
+    job = job_queue.cancel(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
@@ -1,21 +1,55 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
+from datetime import datetime, timedelta, timezone
 import uuid
-from ..database.connection import get_db
+from ..database.connection import get_db, get_main_db, shard_router
 from ..services.effective_status import EffectiveStatusService
+from ..services.bill_schedule import BillScheduleService
+from ..services.category_totals import CategoryTotalsService
+from ..services.planner_snapshot import PlannerSnapshot, ITEM_TYPES
+from ..services.forecast import ForecastService
+from ..services.goal_seek import GoalSeekService
+from ..services.sensitivity import SensitivityService
+from ..services.kpi_history import KpiHistoryService
+from ..services.event_log import EventLogService
+from ..services.dashboard import DashboardService
+from ..services.fx import FxService, FX_BASE_CURRENCY, UnknownCurrencyError
+from ..services.reads import ReadService
+from .planners import as_of_utc
+from ..schemas.what_if import WhatIfRequest
+from ..schemas.goal_seek import GoalSeekRequest
+from ..schemas.rollup import RollupRequest
 
 router = APIRouter()
 
+# The uncached KPI reads are plain def: FastAPI runs them in its threadpool, so identical
+# concurrent requests overlap and share one computation (planner_cache.coalesce)
 @router.get("/kpis/monthly-totals")
-async def get_monthly_totals(
+def get_monthly_totals(
     planner_id: uuid.UUID, 
     scenario: str = "ALL", 
+    as_of: Optional[datetime] = None,
     db: Session = Depends(get_db)
 ) -> Dict[str, Any]:
     """
-    Get monthly financial totals with effective status calculations
+    Get monthly financial totals with effective status calculations,
+    optionally as they were at as_of
     """
+    if as_of is not None:
+        try:
+            rows = EventLogService.rows_as_of(db, planner_id, as_of_utc(as_of))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {
+            "planner_id": str(planner_id),
+            "scenario": scenario,
+            "as_of": as_of_utc(as_of).isoformat(),
+            "totals": DashboardService.snapshot(
+                planner_id, rows, FxService.planner_currency(db, planner_id), as_of_utc(as_of).date()
+            ).totals(scenario)
+        }
+    
     try:
         totals = EffectiveStatusService.calculate_monthly_totals(db, planner_id, scenario)
         return {
@@ -26,6 +60,227 @@ async def get_monthly_totals(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error calculating monthly totals: {str(e)}")
 
+@router.get("/kpis/scenario-totals")
+def get_scenario_totals(
+    planner_id: uuid.UUID, 
+    as_of: Optional[datetime] = None,
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """
+    Get monthly totals for ALL and every scenario of a planner in one pass,
+    optionally as they were at as_of
+    """
+    if as_of is not None:
+        try:
+            rows = EventLogService.rows_as_of(db, planner_id, as_of_utc(as_of))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        return {
+            "planner_id": str(planner_id),
+            "as_of": as_of_utc(as_of).isoformat(),
+            "scenarios": DashboardService.scenario_totals(
+                DashboardService.snapshot(planner_id, rows, FxService.planner_currency(db, planner_id), as_of_utc(as_of).date()),
+                rows["scenarios"],
+            )
+        }
+    
+    try:
+        scenarios = EffectiveStatusService.calculate_scenario_totals(db, planner_id)
+        return {
+            "planner_id": str(planner_id),
+            "scenarios": scenarios
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error calculating scenario totals: {str(e)}")
+
+@router.get("/kpis/household-rollup")
+async def get_household_rollup(
+    household_id: uuid.UUID, 
+    currency: Optional[str] = Query(None, pattern="^[A-Z]{3}$"),
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """
+    Get monthly totals for every planner of a household and the household aggregate,
+    in currency (default: the household owner's currency)
+    """
+    try:
+        rollup = EffectiveStatusService.calculate_rollup_totals(db, household_id=household_id, currency=currency)
+        return {
+            "household_id": str(household_id),
+            **rollup
+        }
+    except UnknownCurrencyError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error calculating household rollup: {str(e)}")
+
+@router.post("/kpis/rollup")
+async def get_planner_rollup(
+    request: RollupRequest, 
+    db: Session = Depends(get_main_db)
+) -> Dict[str, Any]:
+    """
+    Get monthly totals for a list of planners and their aggregate
+    """
+    try:
+        if shard_router is None:
+            return EffectiveStatusService.calculate_rollup_totals(
+                db, planner_ids=request.planner_ids, currency=request.currency
+            )
+        
+        # Planners of different households live in different shards: one query per shard
+        by_household: Dict[str, List[uuid.UUID]] = {}
+        for planner_id in request.planner_ids:
+            household_id = shard_router.household_for_planner(planner_id)
+            if household_id:
+                by_household.setdefault(household_id, []).append(planner_id)
+        planners: List[Dict[str, Any]] = []
+        aggregate: Dict[str, float] = {}
+        currency = request.currency
+        for household_id, planner_ids in by_household.items():
+            shard_db = shard_router.session(household_id)
+            try:
+                rollup = EffectiveStatusService.calculate_rollup_totals(
+                    shard_db, planner_ids=planner_ids, currency=currency
+                )
+            finally:
+                shard_db.close()
+            currency = rollup["currency"]
+            planners.extend(rollup["planners"])
+            for key, value in rollup["aggregate"].items():
+                aggregate[key] = aggregate.get(key, 0.0) + value
+        if not aggregate:
+            aggregate = EffectiveStatusService.build_totals(0.0, 0.0, 0.0, 0.0, 0.0, 0.0)
+        return {
+            "currency": currency or FX_BASE_CURRENCY,
+            "planners": sorted(planners, key=lambda planner: planner["name"]),
+            "aggregate": aggregate,
+        }
+    except UnknownCurrencyError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error calculating planner rollup: {str(e)}")
+
+@router.post("/kpis/what-if")
+async def evaluate_what_if(
+    request: WhatIfRequest, 
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """
+    Evaluate overrides (toggles, amounts, links) against an in-memory snapshot of the
+    planner and return the resulting totals and effective statuses. Nothing is written.
+    """
+    snapshot = PlannerSnapshot.cached(db, request.planner_id)
+    baseline_totals = snapshot.totals(request.scenario)
+    baseline_effective = snapshot.effective()
+    
+    sandbox = snapshot.copy()
+    for override in request.overrides:
+        links = {
+            field: getattr(override, field)
+            for field in ("linked_asset_id", "linked_liab_id")
+            if field in override.model_fields_set
+        }
+        applied = sandbox.apply_override(
+            override.item_type,
+            override.item_id,
+            include_toggle=override.include_toggle,
+            amount=float(override.amount) if override.amount is not None else None,
+            links=links,
+        )
+        if not applied:
+            raise HTTPException(status_code=404, detail=f"{override.item_type} {override.item_id} not found in planner")
+    
+    totals = sandbox.totals(request.scenario)
+    effective = sandbox.effective()
+    statuses = []
+    for item_type in ITEM_TYPES:
+        table = sandbox.tables[item_type]
+        changed = effective[item_type] != baseline_effective[item_type]
+        positions = range(len(table.ids)) if request.include_all_statuses else changed.nonzero()[0]
+        statuses.extend(
+            {
+                "item_type": item_type,
+                "id": str(uuid.UUID(table.ids[position])),
+                "effective_status": "on" if effective[item_type][position] else "off",
+                "changed": bool(changed[position]),
+            }
+            for position in positions
+        )
+    
+    return {
+        "planner_id": str(request.planner_id),
+        "scenario": request.scenario,
+        "baseline_totals": baseline_totals,
+        "totals": totals,
+        "delta": {key: totals[key] - baseline_totals[key] for key in totals},
+        "effective_statuses": statuses
+    }
+
+@router.get("/kpis/forecast")
+def get_forecast(
+    planner_id: uuid.UUID, 
+    scenario: str = "ALL", 
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """
+    Get the 12-month closing balance projection for a scenario
+    """
+    try:
+        forecast = ForecastService.forecast(db, planner_id, scenario)
+        return {
+            "planner_id": str(planner_id),
+            "scenario": scenario,
+            **forecast
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error calculating forecast: {str(e)}")
+
+# Plain def: the search is CPU-bound and would otherwise stall the event loop while it runs
+@router.post("/kpis/goal-seek")
+def goal_seek(
+    request: GoalSeekRequest, 
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """
+    Find the smallest set of expense, bill or liability toggles, or asset sales, that
+    reaches a target net cash flow or minimum closing balance. Nothing is written.
+    """
+    try:
+        return GoalSeekService.run(db, request)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/kpis/sensitivity")
+async def get_sensitivity(
+    planner_id: uuid.UUID, 
+    scenario: str = "ALL", 
+    percent: float = Query(10.0, gt=0, le=100), 
+    steps: int = Query(1, ge=1, le=10), 
+    limit: Optional[int] = Query(None, ge=1), 
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """
+    Rank income, expense, bill and liability items by how much a +/- percent change
+    of their amount moves the monthly net cash flow and the 12-month closing balance
+    """
+    try:
+        analysis = SensitivityService.analyze(
+            PlannerSnapshot.cached(db, planner_id),
+            scenario,
+            ForecastService.settings(db, planner_id),
+            percent=percent,
+            steps=steps,
+            limit=limit,
+        )
+        return {
+            "planner_id": str(planner_id),
+            "scenario": scenario,
+            **analysis
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error calculating sensitivity: {str(e)}")
+
 @router.get("/kpis/effective-liabilities")
 async def get_effective_liabilities(
     planner_id: uuid.UUID, 
@@ -37,11 +292,11 @@ async def get_effective_liabilities(
     """
     try:
         liabilities = EffectiveStatusService.get_effective_liabilities(db, planner_id, scenario)
-        return {
+        return ReadService.respond_raw({
             "planner_id": str(planner_id),
             "scenario": scenario,
             "liabilities": liabilities
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting effective liabilities: {str(e)}")
 
@@ -56,11 +311,11 @@ async def get_effective_expenses(
     """
     try:
         expenses = EffectiveStatusService.get_effective_expenses(db, planner_id, scenario)
-        return {
+        return ReadService.respond_raw({
             "planner_id": str(planner_id),
             "scenario": scenario,
             "expenses": expenses
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting effective expenses: {str(e)}")
 
@@ -75,10 +330,82 @@ async def get_effective_bills(
     """
     try:
         bills = EffectiveStatusService.get_effective_bills(db, planner_id, scenario)
-        return {
+        return ReadService.respond_raw({
             "planner_id": str(planner_id),
             "scenario": scenario,
             "bills": bills
-        }
+        })
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Error getting effective bills: {str(e)}")
+
+@router.get("/kpis/bill-calendar")
+async def get_bill_calendar(
+    planner_id: uuid.UUID, 
+    scenario: str = "ALL", 
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """
+    Get effective bill outflows per calendar month, showing quarterly and annual spikes
+    """
+    try:
+        calendar = BillScheduleService.calculate_calendar(db, planner_id, scenario)
+        return {
+            "planner_id": str(planner_id),
+            "scenario": scenario,
+            **calendar
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error calculating bill calendar: {str(e)}")
+
+@router.get("/kpis/category-totals")
+async def get_category_totals(
+    planner_id: uuid.UUID, 
+    scenario: str = "ALL", 
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """
+    Get monthly expenses and bills per category for effective items, largest first
+    """
+    try:
+        breakdown = CategoryTotalsService.calculate(db, planner_id, scenario)
+        return {
+            "planner_id": str(planner_id),
+            "scenario": scenario,
+            **breakdown
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error calculating category totals: {str(e)}")
+
+@router.get("/kpis/history")
+async def get_kpi_history(
+    planner_id: uuid.UUID,
+    scenario: str = "ALL",
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    points: int = Query(200, ge=3, le=5000),
+    method: str = Query("lttb", pattern="^(lttb|bucket)$"),
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """
+    net_cash_flow and net_value over time (default: the last year), downsampled to at
+    most `points` points with LTTB or equal time buckets
+    """
+    end = end or datetime.now(timezone.utc)
+    start = start or end - timedelta(days=365)
+    if end.tzinfo is None:
+        end = end.replace(tzinfo=timezone.utc)
+    if start.tzinfo is None:
+        start = start.replace(tzinfo=timezone.utc)
+    if start >= end:
+        raise HTTPException(status_code=400, detail="start must be before end")
+    
+    try:
+        series = KpiHistoryService.history(db, planner_id, scenario, start.timestamp(), end.timestamp(), points, method)
+        return {
+            "planner_id": str(planner_id),
+            "scenario": scenario,
+            "method": method,
+            "series": series
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error loading KPI history: {str(e)}")
@@ -4,7 +4,12 @@ from typing import List
 import uuid
 from ..database.connection import get_db
 from ..models.liabilities import Liability
+from ..models.expenses import Expense
+from ..models.bills import Bill
 from ..schemas.liability import LiabilityCreate, LiabilityUpdate, LiabilityResponse
+from ..services.crud import CRUDService
+from ..services.reads import ReadService
+from ..services.write_coalescer import write_coalescer
 
 router = APIRouter()
 
@@ -15,35 +20,21 @@ async def get_liabilities(
     db: Session = Depends(get_db)
 ):
     """Get all liabilities for a planner, filtered by scenario"""
-    if scenario == "ALL":
-        # For table view: show ALL liabilities regardless of scenario
-        liabilities = db.query(Liability).filter(
-            Liability.planner_id == planner_id
-        ).all()
-    else:
-        # For overview calculations: filter by specific scenario (including ALL scenario liabilities)
-        liabilities = db.query(Liability).filter(
-            Liability.planner_id == planner_id,
-            (Liability.scenario == "ALL") | (Liability.scenario == scenario)
-        ).all()
-    return liabilities
+    return ReadService.respond(ReadService.planner_rows(db, Liability, LiabilityResponse, planner_id, scenario))
 
 @router.get("/liabilities/{liability_id}", response_model=LiabilityResponse)
 async def get_liability(liability_id: uuid.UUID, db: Session = Depends(get_db)):
     """Get a specific liability by ID"""
-    liability = db.query(Liability).filter(Liability.id == liability_id).first()
+    await write_coalescer.settle((Liability.__tablename__, liability_id))
+    liability = ReadService.one(db, Liability, LiabilityResponse, liability_id)
     if not liability:
         raise HTTPException(status_code=404, detail="Liability not found")
-    return liability
+    return ReadService.respond(liability)
 
 @router.post("/liabilities", response_model=LiabilityResponse)
 async def create_liability(liability: LiabilityCreate, db: Session = Depends(get_db)):
     """Create a new liability"""
-    db_liability = Liability(**liability.model_dump())
-    db.add(db_liability)
-    db.commit()
-    db.refresh(db_liability)
-    return db_liability
+    return CRUDService.create(db, Liability, liability.model_dump())
 
 @router.put("/liabilities/{liability_id}", response_model=LiabilityResponse)
 async def update_liability(
@@ -52,25 +43,30 @@ async def update_liability(
     db: Session = Depends(get_db)
 ):
     """Update an existing liability"""
-    db_liability = db.query(Liability).filter(Liability.id == liability_id).first()
-    if not db_liability:
+    db_liability = CRUDService.update(db, Liability, liability_id, liability.model_dump(exclude_unset=True))
+    if db_liability is None:
+        raise HTTPException(status_code=404, detail="Liability not found")
+    return db_liability
+
+@router.patch("/liabilities/{liability_id}", response_model=LiabilityResponse)
+async def patch_liability(
+    liability_id: uuid.UUID,
+    liability: LiabilityUpdate,
+    db: Session = Depends(get_db)
+):
+    """Update individual fields; edits to the same liability within the coalescing window share one UPDATE"""
+    db_liability = await write_coalescer.submit(
+        (Liability.__tablename__, liability_id),
+        liability.model_dump(exclude_unset=True),
+        lambda values: CRUDService.update(db, Liability, liability_id, values),
+    )
+    if db_liability is None:
         raise HTTPException(status_code=404, detail="Liability not found")
-    
-    update_data = liability.model_dump(exclude_unset=True)
-    for field, value in update_data.items():
-        setattr(db_liability, field, value)
-    
-    db.commit()
-    db.refresh(db_liability)
     return db_liability
 
 @router.delete("/liabilities/{liability_id}")
 async def delete_liability(liability_id: uuid.UUID, db: Session = Depends(get_db)):
     """Delete a liability"""
-    db_liability = db.query(Liability).filter(Liability.id == liability_id).first()
-    if not db_liability:
+    if not CRUDService.delete(db, Liability, liability_id, nullify=[Expense.linked_liab_id, Bill.linked_liab_id]):
         raise HTTPException(status_code=404, detail="Liability not found")
-    
-    db.delete(db_liability)
-    db.commit()
     return {"message": "Liability deleted successfully"}
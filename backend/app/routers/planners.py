@@ -0,0 +1,90 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from typing import Optional
+from datetime import datetime, timezone
+import uuid
+from ..database.connection import get_db
+from ..models.planner import Planner
+from ..services.change_feed import ChangeFeedService
+from ..services.dashboard import DashboardService
+from ..services.event_log import EventLogService
+from ..services.fx import FxService
+from ..services.planner_cache import planner_cache
+from ..services.kpi_history import KpiHistoryService
+
+router = APIRouter()
+
+def as_of_utc(as_of: datetime) -> datetime:
+    """Query timestamps without an offset are taken as UTC, like every stored timestamp"""
+    return as_of.replace(tzinfo=timezone.utc) if as_of.tzinfo is None else as_of.astimezone(timezone.utc)
+
+@router.get("/planners/{planner_id}/changes")
+async def get_planner_changes(
+    planner_id: uuid.UUID,
+    since: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Rows created, updated or deleted since a cursor, across all entity types.
+    Call without since for a full load, then pass the returned cursor on the next call.
+    """
+    since_at = None
+    if since is not None:
+        try:
+            since_at = ChangeFeedService.parse_cursor(since)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid change cursor")
+    
+    if db.execute(select(Planner.id).where(Planner.id == planner_id)).first() is None:
+        raise HTTPException(status_code=404, detail="Planner not found")
+    
+    return ChangeFeedService.changes(db, planner_id, since_at)
+
+@router.get("/planners/{planner_id}/dashboard")
+async def get_planner_dashboard(
+    planner_id: uuid.UUID,
+    request: Request,
+    scenario: str = "ALL",
+    as_of: Optional[datetime] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Scenarios, categories, all item lists and monthly totals in one response.
+    Send the returned ETag as If-None-Match to get 304 while nothing has changed.
+    With as_of the planner is shown as it was at that time, rebuilt from the event log.
+    """
+    if as_of is not None:
+        if db.execute(select(Planner.id).where(Planner.id == planner_id)).first() is None:
+            raise HTTPException(status_code=404, detail="Planner not found")
+        try:
+            rows = EventLogService.rows_as_of(db, planner_id, as_of_utc(as_of))
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+        snapshot = DashboardService.snapshot(
+            planner_id, rows, FxService.planner_currency(db, planner_id), as_of_utc(as_of).date()
+        )
+        payload = DashboardService.build(planner_id, scenario, rows, snapshot)
+    else:
+        payload = DashboardService.payload(db, planner_id, scenario)
+    if payload is None:
+        raise HTTPException(status_code=404, detail="Planner not found")
+    
+    body, etag = payload
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag in [tag.strip() for tag in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+@router.post("/planners/{planner_id}/undo")
+async def undo_planner_change(planner_id: uuid.UUID, db: Session = Depends(get_db)):
+    """Revert the planner's most recent change that has not been undone yet"""
+    result = EventLogService.undo(db, planner_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Nothing to undo")
+    db.commit()
+    planner_cache.invalidate(planner_id)
+    KpiHistoryService.schedule(planner_id)
+    
+    transaction_id, events = result
+    return {"undone": str(transaction_id), "events": events}
@@ -1,10 +1,20 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Dict, Any
 import uuid
-from ..database.connection import get_db
+from ..database.connection import get_db, shard_router
 from ..models.planner import ScenarioSettings, ScenarioItem
-from ..schemas.scenario import ScenarioCreate, ScenarioUpdate, ScenarioResponse, ScenarioItemCreate, ScenarioItemResponse
+from ..schemas.scenario import (
+    ScenarioCreate, ScenarioUpdate, ScenarioResponse, ScenarioFork,
+    ScenarioItemCreate, ScenarioItemResponse, ScenarioExclusion,
+)
+from ..services.scenario_membership import ScenarioMembershipService, MAX_SCENARIOS, ITEM_MODELS
+from ..services.scenario_diff import ScenarioDiffService
+from ..services.reads import ReadService
+from ..services.planner_cache import planner_cache
+from ..services.change_feed import ChangeFeedService
+from ..services.kpi_history import KpiHistoryService
+from ..services.event_log import EventLogService, ChangeTracker
 
 router = APIRouter()
 
@@ -14,18 +24,44 @@ async def get_scenarios(
     db: Session = Depends(get_db)
 ):
     """Get all scenarios for a planner"""
-    scenarios = db.query(ScenarioSettings).filter(
-        ScenarioSettings.planner_id == planner_id
-    ).all()
-    return scenarios
+    return ReadService.respond(
+        ReadService.rows(db, ScenarioSettings, ScenarioResponse, ScenarioSettings.planner_id == planner_id)
+    )
 
 @router.get("/scenarios/{scenario_id}", response_model=ScenarioResponse)
 async def get_scenario(scenario_id: uuid.UUID, db: Session = Depends(get_db)):
     """Get a specific scenario by ID"""
-    scenario = db.query(ScenarioSettings).filter(ScenarioSettings.id == scenario_id).first()
+    scenario = ReadService.one(db, ScenarioSettings, ScenarioResponse, scenario_id)
     if not scenario:
         raise HTTPException(status_code=404, detail="Scenario not found")
-    return scenario
+    return ReadService.respond(scenario)
+
+@router.get("/scenarios/{scenario_id}/diff/{other_scenario_id}")
+async def diff_scenarios(
+    scenario_id: uuid.UUID,
+    other_scenario_id: uuid.UUID,
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """Compare two scenarios: items whose effective inclusion differs and KPI deltas (other - scenario)"""
+    scenarios = {
+        s.id: s for s in ReadService.rows(
+            db, ScenarioSettings, ScenarioResponse, ScenarioSettings.id.in_([scenario_id, other_scenario_id])
+        )
+    }
+    base = scenarios.get(scenario_id)
+    compare = scenarios.get(other_scenario_id)
+    if not base or not compare:
+        raise HTTPException(status_code=404, detail="Scenario not found")
+    if base.planner_id != compare.planner_id:
+        raise HTTPException(status_code=400, detail="Scenarios belong to different planners")
+    
+    diff = ScenarioDiffService.diff(db, base, compare)
+    return {
+        "planner_id": str(base.planner_id),
+        "base": {"id": str(base.id), "scenario": base.scenario, "display_name": base.display_name},
+        "compare": {"id": str(compare.id), "scenario": compare.scenario, "display_name": compare.display_name},
+        **diff
+    }
 
 @router.post("/scenarios", response_model=ScenarioResponse)
 async def create_scenario(scenario: ScenarioCreate, db: Session = Depends(get_db)):
@@ -39,10 +75,73 @@ async def create_scenario(scenario: ScenarioCreate, db: Session = Depends(get_db
     if existing:
         raise HTTPException(status_code=400, detail="Scenario identifier already exists for this planner")
     
-    db_scenario = ScenarioSettings(**scenario.model_dump())
+    scenario_bit = ScenarioMembershipService.allocate_bit(db, scenario.planner_id)
+    if scenario_bit is None:
+        raise HTTPException(status_code=400, detail=f"A planner can have at most {MAX_SCENARIOS} scenarios")
+    
+    tracker = ChangeTracker(db)
+    tracker.watch(ScenarioSettings, ScenarioSettings.planner_id == scenario.planner_id)
+    db_scenario = ScenarioSettings(id=uuid.uuid4(), **scenario.model_dump(), scenario_bit=scenario_bit)
+    if shard_router is not None:
+        shard_router.register_item(db_scenario.id, db_scenario.planner_id)
     db.add(db_scenario)
+    EventLogService.record(db, scenario.planner_id, tracker.changes())
     db.commit()
     db.refresh(db_scenario)
+    planner_cache.invalidate(db_scenario.planner_id)
+    KpiHistoryService.schedule(db_scenario.planner_id)
+    return db_scenario
+
+@router.post("/scenarios/{scenario_id}/fork", response_model=ScenarioResponse)
+async def fork_scenario(scenario_id: uuid.UUID, fork: ScenarioFork, db: Session = Depends(get_db)):
+    """
+    Fork a scenario. The fork inherits its parent's membership and only stores its own
+    additions and exclusions, so forking costs a single row regardless of scenario size.
+    With materialize=true the inherited membership is copied server-side instead and
+    the new scenario is independent of its parent.
+    """
+    parent = db.query(ScenarioSettings).filter(ScenarioSettings.id == scenario_id).first()
+    if not parent:
+        raise HTTPException(status_code=404, detail="Scenario not found")
+    
+    existing = db.query(ScenarioSettings).filter(
+        ScenarioSettings.planner_id == parent.planner_id,
+        ScenarioSettings.scenario == fork.scenario
+    ).first()
+    if existing:
+        raise HTTPException(status_code=400, detail="Scenario identifier already exists for this planner")
+    
+    scenario_bit = ScenarioMembershipService.allocate_bit(db, parent.planner_id)
+    if scenario_bit is None:
+        raise HTTPException(status_code=400, detail=f"A planner can have at most {MAX_SCENARIOS} scenarios")
+    
+    tracker = ChangeTracker(db)
+    tracker.watch(ScenarioSettings, ScenarioSettings.planner_id == parent.planner_id)
+    if fork.materialize:
+        for model in ITEM_MODELS.values():
+            tracker.watch(model, model.planner_id == parent.planner_id)
+    
+    db_scenario = ScenarioSettings(
+        id=uuid.uuid4(),
+        planner_id=parent.planner_id,
+        scenario=fork.scenario,
+        display_name=fork.display_name,
+        sale_month=fork.sale_month if fork.sale_month is not None else parent.sale_month,
+        scenario_bit=scenario_bit,
+        parent_id=None if fork.materialize else parent.id,
+    )
+    if shard_router is not None:
+        shard_router.register_item(db_scenario.id, db_scenario.planner_id)
+    db.add(db_scenario)
+    db.flush()
+    if fork.materialize:
+        parent_lineage = ScenarioMembershipService.lineage(db, parent.planner_id, parent.scenario)
+        ScenarioMembershipService.materialize(db, db_scenario, parent_lineage)
+    EventLogService.record(db, parent.planner_id, tracker.changes())
+    db.commit()
+    db.refresh(db_scenario)
+    planner_cache.invalidate(db_scenario.planner_id)
+    KpiHistoryService.schedule(db_scenario.planner_id)
     return db_scenario
 
 @router.put("/scenarios/{scenario_id}", response_model=ScenarioResponse)
@@ -58,11 +157,16 @@ async def update_scenario(
     
     update_data = scenario.model_dump(exclude_unset=True)
     
+    tracker = ChangeTracker(db)
+    tracker.watch(ScenarioSettings, ScenarioSettings.id == db_scenario.id)
     for field, value in update_data.items():
         setattr(db_scenario, field, value)
     
+    EventLogService.record(db, db_scenario.planner_id, tracker.changes())
     db.commit()
     db.refresh(db_scenario)
+    planner_cache.invalidate(db_scenario.planner_id)
+    KpiHistoryService.schedule(db_scenario.planner_id)
     return db_scenario
 
 @router.delete("/scenarios/{scenario_id}")
@@ -72,12 +176,26 @@ async def delete_scenario(scenario_id: uuid.UUID, db: Session = Depends(get_db))
     if not db_scenario:
         raise HTTPException(status_code=404, detail="Scenario not found")
     
-    # Delete all scenario items first
+    if db.query(ScenarioSettings.id).filter(ScenarioSettings.parent_id == db_scenario.id).first():
+        raise HTTPException(status_code=400, detail="Scenario has forks; delete them or fork them with materialize first")
+    
+    tracker = ChangeTracker(db)
+    for model in ITEM_MODELS.values():
+        tracker.watch(model, model.planner_id == db_scenario.planner_id)
+    tracker.watch(ScenarioSettings, ScenarioSettings.id == db_scenario.id)
+    
+    # Delete all scenario items first and release the scenario's membership bit
     db.query(ScenarioItem).filter(ScenarioItem.scenario_id == db_scenario.id).delete()
+    ScenarioMembershipService.clear_bit(db, db_scenario.planner_id, db_scenario.scenario_bit)
     
     # Delete the scenario
+    ChangeFeedService.record_delete(db, ScenarioSettings, db_scenario.planner_id, db_scenario.id)
+    planner_id = db_scenario.planner_id
     db.delete(db_scenario)
+    EventLogService.record(db, planner_id, tracker.changes())
     db.commit()
+    planner_cache.invalidate(db_scenario.planner_id)
+    KpiHistoryService.schedule(db_scenario.planner_id)
     return {"message": "Scenario deleted successfully"}
 
 @router.post("/scenarios/{scenario_id}/items", response_model=ScenarioItemResponse)
@@ -102,6 +220,13 @@ async def add_item_to_scenario(
     if existing:
         raise HTTPException(status_code=400, detail="Item is already in this scenario")
     
+    tracker = ChangeTracker(db)
+    tracker.watch(ITEM_MODELS[item.item_type], ITEM_MODELS[item.item_type].id == item.item_id)
+    
+    # Mirror the membership into the item's scenario_mask used by KPI and list filters
+    if not ScenarioMembershipService.set_membership(db, item.item_type, item.item_id, scenario.scenario_bit, True):
+        raise HTTPException(status_code=404, detail="Item not found")
+    
     # Create the scenario item
     db_item = ScenarioItem(
         item_id=item.item_id,
@@ -109,8 +234,11 @@ async def add_item_to_scenario(
         scenario_id=scenario.id
     )
     db.add(db_item)
+    EventLogService.record(db, scenario.planner_id, tracker.changes())
     db.commit()
     db.refresh(db_item)
+    planner_cache.invalidate(scenario.planner_id)
+    KpiHistoryService.schedule(scenario.planner_id)
     return db_item
 
 @router.delete("/scenarios/{scenario_id}/items/{item_id}")
@@ -136,6 +264,59 @@ async def remove_item_from_scenario(
     if not db_item:
         raise HTTPException(status_code=404, detail="Item not found in this scenario")
     
+    tracker = ChangeTracker(db)
+    tracker.watch(ITEM_MODELS[item_type], ITEM_MODELS[item_type].id == item_id)
+    ScenarioMembershipService.set_membership(db, item_type, item_id, scenario.scenario_bit, False)
     db.delete(db_item)
+    EventLogService.record(db, scenario.planner_id, tracker.changes())
     db.commit()
+    planner_cache.invalidate(scenario.planner_id)
+    KpiHistoryService.schedule(scenario.planner_id)
     return {"message": "Item removed from scenario successfully"}
+
+@router.post("/scenarios/{scenario_id}/exclusions")
+async def exclude_item_from_scenario(
+    scenario_id: uuid.UUID,
+    exclusion: ScenarioExclusion,
+    db: Session = Depends(get_db)
+):
+    """Hide an item from a scenario, including items tagged ALL or inherited from a parent scenario"""
+    scenario = db.query(ScenarioSettings).filter(ScenarioSettings.id == scenario_id).first()
+    if not scenario:
+        raise HTTPException(status_code=404, detail="Scenario not found")
+    
+    tracker = ChangeTracker(db)
+    tracker.watch(ITEM_MODELS[exclusion.item_type], ITEM_MODELS[exclusion.item_type].id == exclusion.item_id)
+    if not ScenarioMembershipService.set_exclusion(db, scenario, exclusion.item_type, exclusion.item_id, True):
+        raise HTTPException(status_code=404, detail="Item not found")
+    
+    EventLogService.record(db, scenario.planner_id, tracker.changes())
+    db.commit()
+    planner_cache.invalidate(scenario.planner_id)
+    KpiHistoryService.schedule(scenario.planner_id)
+    return {"message": "Item excluded from scenario successfully"}
+
+@router.delete("/scenarios/{scenario_id}/exclusions/{item_id}")
+async def remove_exclusion_from_scenario(
+    scenario_id: uuid.UUID,
+    item_id: uuid.UUID,
+    item_type: str,
+    db: Session = Depends(get_db)
+):
+    """Lift an exclusion so the item is inherited again"""
+    scenario = db.query(ScenarioSettings).filter(ScenarioSettings.id == scenario_id).first()
+    if not scenario:
+        raise HTTPException(status_code=404, detail="Scenario not found")
+    if item_type not in ITEM_MODELS:
+        raise HTTPException(status_code=400, detail="Invalid item type")
+    
+    tracker = ChangeTracker(db)
+    tracker.watch(ITEM_MODELS[item_type], ITEM_MODELS[item_type].id == item_id)
+    if not ScenarioMembershipService.set_exclusion(db, scenario, item_type, item_id, False):
+        raise HTTPException(status_code=404, detail="Item not found")
+    
+    EventLogService.record(db, scenario.planner_id, tracker.changes())
+    db.commit()
+    planner_cache.invalidate(scenario.planner_id)
+    KpiHistoryService.schedule(scenario.planner_id)
+    return {"message": "Exclusion removed successfully"}
@@ -0,0 +1,27 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.orm import Session
+from typing import Any, Dict, List, Optional
+import uuid
+from ..database.connection import get_db
+from ..services.search import SearchService
+
+router = APIRouter()
+
+@router.get("/search")
+async def search_items(
+    planner_id: uuid.UUID,
+    q: str = Query(..., min_length=1, max_length=200),
+    item_type: Optional[List[str]] = Query(None),
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db)
+) -> Dict[str, Any]:
+    """
+    Search the names and notes of a planner's assets, liabilities, income, expenses and
+    bills. Every word must match and the last one may be a prefix; results of all
+    item types come back in one ranked list.
+    """
+    try:
+        results = SearchService.search(db, planner_id, q, item_type, limit)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return {"planner_id": str(planner_id), "query": q, "results": results}
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field, computed_field
+from pydantic import BaseModel, Field
 from typing import Optional
 from decimal import Decimal
 import uuid
@@ -7,25 +7,19 @@ from datetime import datetime
 class BillBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=255)
     include_toggle: str = Field(..., pattern="^(on|off)$")
-    scenario: str = Field(..., pattern="^(ALL|A|B|C)$")
+    scenario: str = Field(..., pattern="^(ALL|[A-Z0-9]+)$")
+    currency_code: Optional[str] = Field(None, pattern="^[A-Z]{3}$")  # None: the planner's currency
     
     # Enhanced billing fields
     bill_amount: Decimal = Field(..., ge=0, description="Total bill amount")
     interval_months: int = Field(..., ge=1, le=12, description="How often bill is paid (1=monthly, 3=quarterly, etc.)")
+    first_due_month: int = Field(1, ge=1, le=12, description="Calendar month of the first payment (1=January)")
     
     # Optional fields
     category_id: Optional[uuid.UUID] = None
     linked_asset_id: Optional[uuid.UUID] = None
     linked_liab_id: Optional[uuid.UUID] = None
     notes: Optional[str] = None
-    
-    @computed_field
-    @property
-    def monthly_average(self) -> Decimal:
-        """Calculate monthly average from bill amount and interval"""
-        if self.interval_months <= 0:
-            return Decimal('0.00')
-        return self.bill_amount / self.interval_months
 
 class BillCreate(BillBase):
     planner_id: uuid.UUID
@@ -33,9 +27,11 @@ class BillCreate(BillBase):
 class BillUpdate(BaseModel):
     name: Optional[str] = Field(None, min_length=1, max_length=255)
     include_toggle: Optional[str] = Field(None, pattern="^(on|off)$")
-    scenario: Optional[str] = Field(None, pattern="^(ALL|A|B|C)$")
+    scenario: Optional[str] = Field(None, pattern="^(ALL|[A-Z0-9]+)$")
+    currency_code: Optional[str] = Field(None, pattern="^[A-Z]{3}$")
     bill_amount: Optional[Decimal] = Field(None, ge=0)
     interval_months: Optional[int] = Field(None, ge=1, le=12)
+    first_due_month: Optional[int] = Field(None, ge=1, le=12)
     category_id: Optional[uuid.UUID] = None
     linked_asset_id: Optional[uuid.UUID] = None
     linked_liab_id: Optional[uuid.UUID] = None
@@ -44,6 +40,8 @@ class BillUpdate(BaseModel):
 class BillResponse(BillBase):
     id: uuid.UUID
     planner_id: uuid.UUID
+    monthly_average: Decimal  # Stored rounded to the cent when the bill is written
+    due_month_mask: int
     created_at: datetime
     updated_at: datetime
     
@@ -0,0 +1,20 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List, Dict
+from decimal import Decimal
+import uuid
+
+class LockedItem(BaseModel):
+    item_type: str = Field(..., pattern="^(asset|liability|expense|bill)$")
+    item_id: uuid.UUID
+
+class GoalSeekParams(BaseModel):
+    scenario: str = Field("ALL", pattern="^(ALL|[A-Z0-9]+)$")
+    target_net_cash_flow: Optional[Decimal] = Field(None, description="Monthly net cash flow to reach")
+    min_closing_balance: Optional[Decimal] = Field(None, description="Lowest acceptable closing balance in any month of the 12-month forecast")
+    locked_items: List[LockedItem] = Field([], description="Items whose include toggle must not change")
+    category_caps: Dict[uuid.UUID, Decimal] = Field({}, description="Maximum monthly reduction per expense/bill category")
+    allow_asset_sales: bool = True
+    max_evaluations: int = Field(200000, ge=1, le=5000000, description="Search budget in evaluated change sets")
+
+class GoalSeekRequest(GoalSeekParams):
+    planner_id: uuid.UUID
@@ -7,7 +7,8 @@ from datetime import datetime
 class IncomeBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=255)
     include_toggle: str = Field(..., pattern="^(on|off)$")
-    scenario: str = Field(..., pattern="^(ALL|A|B|C)$")
+    scenario: str = Field(..., pattern="^(ALL|[A-Z0-9]+)$")
+    currency_code: Optional[str] = Field(None, pattern="^[A-Z]{3}$")  # None: the planner's currency
     monthly_amount: Decimal = Field(..., ge=0)
     notes: Optional[str] = None
 
@@ -17,7 +18,8 @@ class IncomeCreate(IncomeBase):
 class IncomeUpdate(BaseModel):
     name: Optional[str] = Field(None, min_length=1, max_length=255)
     include_toggle: Optional[str] = Field(None, pattern="^(on|off)$")
-    scenario: Optional[str] = Field(None, pattern="^(ALL|A|B|C)$")
+    scenario: Optional[str] = Field(None, pattern="^(ALL|[A-Z0-9]+)$")
+    currency_code: Optional[str] = Field(None, pattern="^[A-Z]{3}$")
     monthly_amount: Optional[Decimal] = Field(None, ge=0)
     notes: Optional[str] = None
 
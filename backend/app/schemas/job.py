@@ -0,0 +1,20 @@
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any
+import uuid
+
+class JobCreate(BaseModel):
+    planner_id: uuid.UUID
+    kind: str = Field(..., description="goal_seek, sensitivity, forecast or scenario_totals")
+    params: Dict[str, Any] = Field({}, description="Parameters of the kind, as for its synchronous KPI endpoint")
+
+class ForecastJobParams(BaseModel):
+    scenario: str = Field("ALL", pattern="^(ALL|[A-Z0-9]+)$")
+
+class SensitivityJobParams(BaseModel):
+    scenario: str = Field("ALL", pattern="^(ALL|[A-Z0-9]+)$")
+    percent: float = Field(10.0, gt=0, le=100)
+    steps: int = Field(1, ge=1, le=10)
+    limit: Optional[int] = Field(None, ge=1)
+
+class ScenarioTotalsJobParams(BaseModel):
+    pass
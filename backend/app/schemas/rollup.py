@@ -0,0 +1,7 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+import uuid
+
+class RollupRequest(BaseModel):
+    planner_ids: List[uuid.UUID] = Field(..., min_length=1, max_length=5000)
+    currency: Optional[str] = Field(None, pattern="^[A-Z]{3}$")  # Defaults to FX_BASE_CURRENCY
@@ -15,9 +15,17 @@ class ScenarioUpdate(BaseModel):
     display_name: Optional[str] = Field(None, min_length=1, max_length=255)
     sale_month: Optional[int] = Field(None, ge=0, le=12)
 
+class ScenarioFork(BaseModel):
+    scenario: str = Field(..., pattern="^[A-Z0-9]+$", description="Identifier of the new scenario")
+    display_name: str = Field(..., min_length=1, max_length=255)
+    sale_month: Optional[int] = Field(None, ge=0, le=12, description="Defaults to the parent's sale month")
+    materialize: bool = Field(False, description="Copy the parent's membership instead of inheriting it")
+
 class ScenarioResponse(ScenarioBase):
     id: uuid.UUID
     planner_id: uuid.UUID
+    scenario_bit: int
+    parent_id: Optional[uuid.UUID] = None
     created_at: datetime
     updated_at: datetime
     
@@ -32,6 +40,10 @@ class ScenarioItemBase(BaseModel):
 class ScenarioItemCreate(ScenarioItemBase):
     pass
 
+class ScenarioExclusion(BaseModel):
+    item_id: uuid.UUID
+    item_type: str = Field(..., pattern="^(asset|liability|income|expense|bill)$")
+
 class ScenarioItemResponse(ScenarioItemBase):
     id: uuid.UUID
     created_at: datetime
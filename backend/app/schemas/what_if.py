@@ -0,0 +1,18 @@
+from pydantic import BaseModel, Field
+from typing import Optional, List
+from decimal import Decimal
+import uuid
+
+class WhatIfOverride(BaseModel):
+    item_type: str = Field(..., pattern="^(asset|liability|income|expense|bill)$")
+    item_id: uuid.UUID
+    include_toggle: Optional[str] = Field(None, pattern="^(on|off)$")
+    amount: Optional[Decimal] = Field(None, ge=0, description="Sale value, monthly cost/amount, or bill amount for bills")
+    linked_asset_id: Optional[uuid.UUID] = None
+    linked_liab_id: Optional[uuid.UUID] = None
+
+class WhatIfRequest(BaseModel):
+    planner_id: uuid.UUID
+    scenario: str = Field("ALL", pattern="^(ALL|[A-Z0-9]+)$")
+    overrides: List[WhatIfOverride] = []
+    include_all_statuses: bool = Field(False, description="Return every item's effective status, not only changed ones")
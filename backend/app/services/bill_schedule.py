@@ -0,0 +1,115 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import text, case
+from typing import List, Dict, Any
+import numpy as np
+import uuid
+
+from ..models.base import utcnow
+from .fx import fx_rates, FxService
+from .money import from_cents
+from .scenario_membership import ScenarioMembershipService, scenario_membership_sql, lineage_params
+
+MONTHS = np.arange(12)
+
+class BillScheduleService:
+    """
+    Precomputed bill due months.
+
+    Each bill stores a 12-bit `due_month_mask` where bit 0 is January and bit 11 is
+    December. The mask is derived from `first_due_month` (anchor) and `interval_months`.
+    Intervals that do not divide 12 are expanded over the twelve months starting at
+    the anchor month.
+    """
+
+    @staticmethod
+    def due_month_mask(first_due_month: int, interval_months: int) -> int:
+        """Calculate the 12-bit due month mask for an anchor month (1-12) and interval"""
+        if interval_months <= 0:
+            return 0
+        mask = 0
+        for offset in range(0, 12, interval_months):
+            mask |= 1 << ((first_due_month - 1 + offset) % 12)
+        return mask
+
+    @staticmethod
+    def due_months(mask: int) -> List[int]:
+        """Expand a due month mask into calendar month numbers (1-12)"""
+        return [month + 1 for month in range(12) if mask & (1 << month)]
+
+    @staticmethod
+    def mask_expression(update_data: Dict[str, Any], first_due_month_column, interval_months_column):
+        """
+        Build the due_month_mask value for a partial update. When only one of the two
+        inputs changes, the other comes from the row's current value via a CASE over
+        its twelve possible values, so the update stays a single statement.
+        """
+        first_due_month = update_data.get("first_due_month")
+        interval_months = update_data.get("interval_months")
+
+        if first_due_month is not None and interval_months is not None:
+            return BillScheduleService.due_month_mask(first_due_month, interval_months)
+        if interval_months is not None:
+            return case(
+                {month: BillScheduleService.due_month_mask(month, interval_months) for month in range(1, 13)},
+                value=first_due_month_column,
+                else_=0,
+            )
+        return case(
+            {interval: BillScheduleService.due_month_mask(first_due_month, interval) for interval in range(1, 13)},
+            value=interval_months_column,
+            else_=0,
+        )
+
+    @staticmethod
+    def calculate_calendar(db: Session, planner_id: uuid.UUID, scenario: str = "ALL") -> Dict[str, Any]:
+        """
+        Calculate outflows per calendar month for effective bills.
+        One query loads amounts and masks; the masks are expanded to a bills x 12
+        matrix and reduced with a single matrix product, per bill currency, and each
+        currency's month totals are converted to the planner's currency.
+        """
+        lineage = ScenarioMembershipService.lineage(db, planner_id, scenario)
+        query = text(f"""
+            SELECT b.currency_code, b.bill_amount_cents, b.due_month_mask, b.monthly_average_cents
+            FROM bills b
+            LEFT JOIN assets a ON b.linked_asset_id = a.id
+            LEFT JOIN liabilities l ON b.linked_liab_id = l.id
+            WHERE b.planner_id = :planner_id
+            AND {scenario_membership_sql('b', lineage)}
+            AND CASE
+                WHEN b.include_toggle = 'off' THEN 'off'
+                WHEN b.linked_asset_id IS NOT NULL AND a.include_toggle = 'off' THEN 'off'
+                WHEN b.linked_liab_id IS NOT NULL AND l.include_toggle = 'off' THEN 'off'
+                ELSE b.include_toggle
+            END = 'on'
+        """)
+
+        rows = db.execute(query, {"planner_id": str(planner_id).replace('-', ''), **lineage_params(lineage)}).fetchall()
+        currency = FxService.planner_currency(db, planner_id)
+        today = utcnow().date()
+
+        # Amounts in cents, so the int64 matrix product and sums are exact
+        amounts = np.array([row.bill_amount_cents or 0 for row in rows], dtype=np.int64)
+        masks = np.array([int(row.due_month_mask or 0) for row in rows], dtype=np.int64)
+        currencies = list(dict.fromkeys(row.currency_code for row in rows)) or [None]
+        positions = {code: position for position, code in enumerate(currencies)}
+        by_currency = np.arange(len(currencies))[:, None] == np.array(
+            [positions[row.currency_code] for row in rows], dtype=np.int64
+        )[None, :]
+        due = (masks[:, None] >> MONTHS) & 1
+        monthly_totals = fx_rates.convert_cents((by_currency * amounts) @ due, currencies, currency, today)
+        bill_counts = due.sum(axis=0)
+        monthly_average_total = fx_rates.convert_cents(
+            by_currency @ np.array([row.monthly_average_cents or 0 for row in rows], dtype=np.int64),
+            currencies, currency, today,
+        )
+
+        return {
+            "currency": currency,
+            "months": [
+                {"month": month + 1, "total": from_cents(monthly_totals[month]), "bill_count": int(bill_counts[month])}
+                for month in range(12)
+            ],
+            "annual_total": from_cents(monthly_totals.sum()),
+            "monthly_average_total": from_cents(monthly_average_total),
+        }
@@ -0,0 +1,107 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from typing import Any, Dict, List, Optional
+import uuid
+
+from ..models.base import utcnow
+from .fx import fx_rates, FxService
+from .money import from_cents
+from .planner_cache import planner_cache
+from .scenario_membership import ScenarioMembershipService, Lineage, scenario_membership_sql, lineage_params
+
+def category_totals_query(lineage: Lineage):
+    """
+    Effective expenses and bills of a planner in a scenario, summed per category and
+    item currency. Each table is grouped on its own, so the scan follows the
+    (planner_id, category_id) index; bills count with their monthly_average, as in the
+    monthly totals.
+    """
+    return text(f"""
+        SELECT i.category_id, c.name AS category_name, i.currency_code, i.expenses, i.bills, i.item_count
+        FROM (
+            SELECT e.category_id, e.currency_code, SUM(e.monthly_amount_cents) AS expenses, 0 AS bills, COUNT(*) AS item_count
+            FROM expenses e
+            LEFT JOIN assets a ON e.linked_asset_id = a.id
+            LEFT JOIN liabilities l ON e.linked_liab_id = l.id
+            WHERE e.planner_id = :planner_id
+            AND {scenario_membership_sql('e', lineage)}
+            AND CASE
+                WHEN e.include_toggle = 'off' THEN 'off'
+                WHEN e.linked_asset_id IS NOT NULL AND a.include_toggle = 'off' THEN 'off'
+                WHEN e.linked_liab_id IS NOT NULL AND l.include_toggle = 'off' THEN 'off'
+                ELSE e.include_toggle
+            END = 'on'
+            GROUP BY e.category_id, e.currency_code
+
+            UNION ALL
+
+            SELECT b.category_id, b.currency_code, 0, SUM(b.monthly_average_cents), COUNT(*)
+            FROM bills b
+            LEFT JOIN assets a ON b.linked_asset_id = a.id
+            LEFT JOIN liabilities l ON b.linked_liab_id = l.id
+            WHERE b.planner_id = :planner_id
+            AND {scenario_membership_sql('b', lineage)}
+            AND CASE
+                WHEN b.include_toggle = 'off' THEN 'off'
+                WHEN b.linked_asset_id IS NOT NULL AND a.include_toggle = 'off' THEN 'off'
+                WHEN b.linked_liab_id IS NOT NULL AND l.include_toggle = 'off' THEN 'off'
+                ELSE b.include_toggle
+            END = 'on'
+            GROUP BY b.category_id, b.currency_code
+        ) i
+        LEFT JOIN categories c ON c.id = i.category_id
+    """)
+
+class CategoryTotalsService:
+    """Monthly spending per category for the summary bar chart"""
+
+    @staticmethod
+    def calculate(db: Session, planner_id: uuid.UUID, scenario: str = "ALL") -> Dict[str, Any]:
+        """
+        Monthly expenses and bills per category (None for uncategorized items), largest
+        first, in the planner's currency. Cached with the planner's other KPI data until
+        the next write.
+        """
+        return planner_cache.get_or_compute(
+            planner_id, ("category_totals", scenario),
+            lambda: CategoryTotalsService._calculate(db, planner_id, scenario),
+        )
+
+    @staticmethod
+    def _calculate(db: Session, planner_id: uuid.UUID, scenario: str) -> Dict[str, Any]:
+        lineage = ScenarioMembershipService.lineage(db, planner_id, scenario)
+        params = {"planner_id": str(planner_id).replace('-', ''), **lineage_params(lineage)}
+        rows = db.execute(category_totals_query(lineage), params).fetchall()
+        currency = FxService.planner_currency(db, planner_id)
+        today = utcnow().date()
+
+        # category_id -> (name, item count, [(currency, expenses, bills)])
+        grouped: Dict[Optional[str], Dict[str, Any]] = {}
+        for row in rows:
+            category_id = str(uuid.UUID(str(row.category_id))) if row.category_id is not None else None
+            group = grouped.setdefault(category_id, {"name": row.category_name, "item_count": 0, "sums": []})
+            group["item_count"] += row.item_count
+            group["sums"].append((row.currency_code, int(row.expenses or 0), int(row.bills or 0)))
+
+        categories: List[Dict[str, Any]] = []
+        total = 0
+        for category_id, group in grouped.items():
+            expenses, bills = fx_rates.convert_cents(
+                [[expenses, bills] for _, expenses, bills in group["sums"]],
+                [code for code, _, _ in group["sums"]], currency, today,
+            )
+            total += int(expenses + bills)
+            categories.append({
+                "category_id": category_id,
+                "category_name": group["name"],
+                "expenses": from_cents(expenses),
+                "bills": from_cents(bills),
+                "total": from_cents(expenses + bills),
+                "item_count": group["item_count"],
+            })
+
+        return {
+            "currency": currency,
+            "categories": sorted(categories, key=lambda category: category["total"], reverse=True),
+            "total": from_cents(total),
+        }
@@ -0,0 +1,117 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select, insert, delete
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+import os
+import uuid
+
+from ..models import Asset, Liability, Income, Expense, Bill, Category, ScenarioSettings, ChangeTombstone
+from ..models.base import utcnow
+from ..schemas.asset import AssetResponse
+from ..schemas.liability import LiabilityResponse
+from ..schemas.income import IncomeResponse
+from ..schemas.expense import ExpenseResponse
+from ..schemas.bill import BillResponse
+from ..schemas.category import CategoryResponse
+from ..schemas.scenario import ScenarioResponse
+
+# Entity type in the feed -> (model, response schema); the same shapes the list endpoints return
+FEED_ENTITIES = {
+    "scenarios": (ScenarioSettings, ScenarioResponse),
+    "categories": (Category, CategoryResponse),
+    "assets": (Asset, AssetResponse),
+    "liabilities": (Liability, LiabilityResponse),
+    "income": (Income, IncomeResponse),
+    "expenses": (Expense, ExpenseResponse),
+    "bills": (Bill, BillResponse),
+}
+ENTITY_TYPES = {model: entity_type for entity_type, (model, _) in FEED_ENTITIES.items()}
+
+TOMBSTONE_RETENTION = timedelta(days=float(os.getenv("CHANGE_TOMBSTONE_DAYS", "30")))
+# Re-read window before a cursor: updated_at is stamped before a write commits, so a row
+# can become visible after a reader already moved its cursor past the row's timestamp
+CHANGE_FEED_OVERLAP = timedelta(seconds=float(os.getenv("CHANGE_FEED_OVERLAP_SECONDS", "5")))
+
+def _utc(value: datetime) -> datetime:
+    """SQLite returns naive datetimes; every stored timestamp is UTC"""
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+class ChangeFeedService:
+    """
+    Rows of a planner created, updated or deleted since a cursor.
+
+    Upserts come from each table's updated_at (indexed with planner_id) and deletes
+    from change_tombstones, written in the same transaction as the delete. The cursor
+    is the newest timestamp returned; the next call re-reads CHANGE_FEED_OVERLAP_SECONDS
+    before it, so a write that committed late is still delivered. Rows and deletes in
+    that window can therefore arrive twice: clients apply them idempotently, keyed by id
+    and keeping the newer updated_at. Tombstones are kept for CHANGE_TOMBSTONE_DAYS; an
+    older cursor gets a full resync.
+    """
+
+    @staticmethod
+    def parse_cursor(cursor: str) -> datetime:
+        """Cursor string to a UTC datetime; raises ValueError for anything else"""
+        return _utc(datetime.fromisoformat(cursor.replace("Z", "+00:00")))
+
+    @staticmethod
+    def format_cursor(value: datetime) -> str:
+        return _utc(value).isoformat().replace("+00:00", "Z")
+
+    @staticmethod
+    def record_delete(db: Session, model, planner_id: uuid.UUID, item_id: uuid.UUID) -> None:
+        """Write a tombstone for a deleted row and prune the planner's expired ones; the caller commits"""
+        entity_type = ENTITY_TYPES.get(model)
+        if entity_type is None:
+            return
+        db.execute(delete(ChangeTombstone).where(
+            ChangeTombstone.planner_id == planner_id,
+            ChangeTombstone.deleted_at < utcnow() - TOMBSTONE_RETENTION,
+        ))
+        db.execute(insert(ChangeTombstone).values(
+            planner_id=planner_id, entity_type=entity_type, entity_id=item_id
+        ))
+
+    @staticmethod
+    def changes(db: Session, planner_id: uuid.UUID, since: Optional[datetime] = None) -> Dict[str, Any]:
+        """
+        Changes after since (less the overlap window), grouped by entity type; types
+        without changes are omitted.
+        Without a cursor (or with one older than the tombstone retention) every row is
+        returned with full=true, and the client should replace its replica.
+        """
+        full = since is None or since < utcnow() - TOMBSTONE_RETENTION
+        latest = None if full else since
+        window_start = None if full else since - CHANGE_FEED_OVERLAP
+
+        changes: Dict[str, list] = {}
+        for entity_type, (model, schema) in FEED_ENTITIES.items():
+            query = select(*model.__table__.columns).where(model.planner_id == planner_id)
+            if not full:
+                query = query.where(model.updated_at > window_start)
+            rows = db.execute(query.order_by(model.updated_at)).all()
+            if rows:
+                changes[entity_type] = [schema.model_validate(row) for row in rows]
+                newest = _utc(rows[-1].updated_at)
+                latest = newest if latest is None or newest > latest else latest
+
+        deleted: Dict[str, list] = {}
+        if not full:
+            tombstones = db.execute(
+                select(ChangeTombstone.entity_type, ChangeTombstone.entity_id, ChangeTombstone.deleted_at)
+                .where(ChangeTombstone.planner_id == planner_id, ChangeTombstone.deleted_at > window_start)
+                .order_by(ChangeTombstone.deleted_at)
+            ).all()
+            for entity_type, entity_id, deleted_at in tombstones:
+                latest = max(latest, _utc(deleted_at))
+                # A row restored by an undo is alive again and comes back through changes
+                if not any(row.id == entity_id for row in changes.get(entity_type, ())):
+                    deleted.setdefault(entity_type, []).append(entity_id)
+
+        return {
+            "planner_id": planner_id,
+            "full": full,
+            "cursor": ChangeFeedService.format_cursor(latest or utcnow()),
+            "changes": changes,
+            "deleted": deleted,
+        }
@@ -0,0 +1,152 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import insert, update, delete, select
+from sqlalchemy.engine import Row
+from typing import Any, Dict, Optional, Sequence
+import uuid
+
+from ..database.connection import shard_router
+from .planner_cache import planner_cache
+from .change_feed import ChangeFeedService, ENTITY_TYPES
+from .event_log import EventLogService, EVENT_LOG_ENABLED, encode_row
+from .fx import FxService
+from .kpi_history import KpiHistoryService
+from .scenario_membership import ITEM_MODELS
+
+class CRUDService:
+    """
+    Generic single-statement writes for the entity routers.
+
+    Writes are issued as `INSERT/UPDATE/DELETE ... RETURNING` (SQLite 3.35+ and
+    PostgreSQL), so an inline edit is one statement and a missing row is detected
+    from the returned row instead of a preceding SELECT. Dialects without RETURNING
+    fall back to the affected-row count plus a read. Every committed write
+    invalidates the planner's cached derived data, item writes schedule a KPI
+    history point, and deletes leave a tombstone for the change feed. Writes to planner
+    entities are appended to the event log in the same transaction; updates then
+    read the row first so the event has its previous values. An item currency
+    without exchange rates is rejected with UnknownCurrencyError before writing.
+    With sharding, a created row's id is entered in the shard directory first.
+    """
+
+    @staticmethod
+    def _supports(db: Session, attr: str) -> bool:
+        return bool(getattr(db.get_bind().dialect, attr, False))
+
+    @staticmethod
+    def _committed(db: Session, model, planner_id: uuid.UUID) -> None:
+        planner_cache.invalidate(planner_id)
+        if model in ITEM_MODELS.values():
+            KpiHistoryService.schedule(planner_id)
+
+    @staticmethod
+    def get(db: Session, model, item_id: uuid.UUID) -> Optional[Row]:
+        """Read one row as a Core row (no identity map)"""
+        columns = model.__table__.columns
+        return db.execute(select(*columns).where(model.id == item_id)).first()
+
+    @staticmethod
+    def create(db: Session, model, values: Dict[str, Any]) -> Row:
+        """Insert one row and return it with server-generated columns"""
+        FxService.check_currency(values.get("currency_code"))
+        if shard_router is not None:
+            values = {"id": uuid.uuid4(), **values}
+            shard_router.register_item(values["id"], values["planner_id"])
+        columns = model.__table__.columns
+        stmt = insert(model.__table__).values(**values)
+
+        if CRUDService._supports(db, "insert_returning"):
+            row = db.execute(stmt.returning(*columns)).first()
+        else:
+            result = db.execute(stmt)
+            row = CRUDService.get(db, model, result.inserted_primary_key[0])
+
+        if EVENT_LOG_ENABLED and model in ENTITY_TYPES:
+            EventLogService.record(db, row.planner_id, [(model, None, encode_row(model, row))])
+        db.commit()
+        CRUDService._committed(db, model, row.planner_id)
+        return row
+
+    @staticmethod
+    def update(db: Session, model, item_id: uuid.UUID, values: Dict[str, Any]) -> Optional[Row]:
+        """
+        Apply values to one row and return the updated row, or None when the id does not exist.
+        Values may be SQL expressions referencing the row's current columns.
+        """
+        if not values:
+            return CRUDService.get(db, model, item_id)
+        FxService.check_currency(values.get("currency_code"))
+
+        logged = EVENT_LOG_ENABLED and model in ENTITY_TYPES
+        before = CRUDService.get(db, model, item_id) if logged else None
+        if logged and before is None:
+            db.rollback()
+            return None
+
+        columns = model.__table__.columns
+        stmt = update(model.__table__).where(model.id == item_id).values(**values)
+
+        if CRUDService._supports(db, "update_returning"):
+            row = db.execute(stmt.returning(*columns)).first()
+            if row is None:
+                db.rollback()
+                return None
+        else:
+            result = db.execute(stmt)
+            if result.rowcount == 0:
+                db.rollback()
+                return None
+            row = CRUDService.get(db, model, item_id)
+
+        if logged:
+            EventLogService.record(db, row.planner_id, [(model, encode_row(model, before), encode_row(model, row))])
+        db.commit()
+        CRUDService._committed(db, model, row.planner_id)
+        return row
+
+    @staticmethod
+    def delete(db: Session, model, item_id: uuid.UUID, nullify: Sequence = ()) -> bool:
+        """
+        Delete one row, returning False when the id does not exist.
+        Columns listed in nullify are foreign keys in other tables that are
+        cleared in the same transaction, as the ORM used to do on delete.
+        """
+        logged = EVENT_LOG_ENABLED and model in ENTITY_TYPES
+        changes = []
+        for fk_column in nullify:
+            linked_model = fk_column.class_
+            stmt = update(linked_model.__table__).where(fk_column == item_id).values({fk_column.key: None})
+            if not logged:
+                db.execute(stmt)
+                continue
+            linked_columns = linked_model.__table__.columns
+            linked = db.execute(select(*linked_columns).where(fk_column == item_id)).all()
+            if not linked:
+                continue
+            db.execute(stmt)
+            cleared = {
+                row.id: row
+                for row in db.execute(select(*linked_columns).where(linked_model.id.in_([row.id for row in linked]))).all()
+            }
+            for before in linked:
+                changes.append((linked_model, encode_row(linked_model, before), encode_row(linked_model, cleared[before.id])))
+
+        columns = model.__table__.columns if logged else [model.planner_id]
+        stmt = delete(model.__table__).where(model.id == item_id)
+        if CRUDService._supports(db, "delete_returning"):
+            row = db.execute(stmt.returning(*columns)).first()
+        else:
+            row = db.execute(select(*columns).where(model.id == item_id)).first()
+            if row is not None:
+                db.execute(stmt)
+
+        if row is None:
+            db.rollback()
+            return False
+        planner_id = row.planner_id
+        ChangeFeedService.record_delete(db, model, planner_id, item_id)
+        if logged:
+            changes.append((model, encode_row(model, row), None))
+            EventLogService.record(db, planner_id, changes)
+        db.commit()
+        CRUDService._committed(db, model, planner_id)
+        return True
@@ -0,0 +1,104 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from datetime import date
+from typing import Any, Dict, List, Optional, Tuple
+import hashlib
+import json
+import uuid
+
+from ..models import Planner
+from .change_feed import FEED_ENTITIES
+from .fx import FxService, FX_BASE_CURRENCY
+from .planner_cache import planner_cache
+from .planner_snapshot import PlannerSnapshot, snapshot_row
+from .scenario_membership import ScenarioMembershipService
+
+# Snapshot item type of each dashboard list that feeds the KPIs
+SNAPSHOT_TYPES = {"assets": "asset", "liabilities": "liability", "income": "income", "expenses": "expense", "bills": "bill"}
+
+class DashboardService:
+    """
+    Everything the dashboard's first paint needs in one payload: scenarios, categories,
+    every item list and the monthly totals for the selected scenario and all scenarios.
+
+    Each table is read once with a Core query; the KPIs come from a PlannerSnapshot
+    built from those same rows, which also seeds the snapshot cache for later KPI
+    calls. The serialized body and its ETag are cached per planner and scenario until
+    the next write, so a revalidation with a matching If-None-Match costs no queries.
+    """
+
+    @staticmethod
+    def payload(db: Session, planner_id: uuid.UUID, scenario: str = "ALL") -> Optional[Tuple[bytes, str]]:
+        """(JSON body, ETag) of the dashboard, or None when the planner does not exist"""
+        key = ("dashboard", scenario)
+        cached = planner_cache.get(planner_id, key)
+        if cached is not None:
+            return cached
+
+        if db.execute(select(Planner.id).where(Planner.id == planner_id)).first() is None:
+            return None
+
+        rows = {
+            name: db.execute(
+                select(*model.__table__.columns).where(model.planner_id == planner_id).order_by(model.created_at)
+            ).all()
+            for name, (model, _) in FEED_ENTITIES.items()
+        }
+        snapshot = DashboardService.snapshot(planner_id, rows, FxService.planner_currency(db, planner_id))
+        if planner_cache.get(planner_id, ("snapshot",)) is None:
+            planner_cache.put(planner_id, ("scenarios",), snapshot.scenarios)
+            planner_cache.put(planner_id, ("snapshot",), snapshot)
+
+        result = DashboardService.build(planner_id, scenario, rows, snapshot)
+        planner_cache.put(planner_id, key, result)
+        return result
+
+    @staticmethod
+    def snapshot(
+        planner_id: uuid.UUID,
+        rows: Dict[str, List[Any]],
+        currency: str = FX_BASE_CURRENCY,
+        rate_date: Optional[date] = None,
+    ) -> PlannerSnapshot:
+        """
+        PlannerSnapshot from full rows per entity type (table reads or EventLogService.rows_as_of),
+        with totals in currency at the FX rates of rate_date (default today)
+        """
+        return PlannerSnapshot.from_rows(
+            planner_id,
+            {item_type: [snapshot_row(item_type, row) for row in rows[name]] for name, item_type in SNAPSHOT_TYPES.items()},
+            ScenarioMembershipService.scenario_map(rows["scenarios"]),
+            currency,
+            rate_date,
+        )
+
+    @staticmethod
+    def scenario_totals(snapshot: PlannerSnapshot, scenario_rows: List[Any]) -> List[Dict[str, Any]]:
+        """Totals for ALL and every scenario, shaped like EffectiveStatusService.calculate_scenario_totals"""
+        return [
+            {"scenario": "ALL", "scenario_id": None, "display_name": "All items", "totals": snapshot.totals("ALL")}
+        ] + [
+            {
+                "scenario": row.scenario,
+                "scenario_id": str(row.id),
+                "display_name": row.display_name,
+                "totals": snapshot.totals(row.scenario),
+            }
+            for row in scenario_rows
+        ]
+
+    @staticmethod
+    def build(
+        planner_id: uuid.UUID,
+        scenario: str,
+        rows: Dict[str, List[Any]],
+        snapshot: PlannerSnapshot,
+    ) -> Tuple[bytes, str]:
+        body: Dict[str, Any] = {"planner_id": str(planner_id), "scenario": scenario}
+        for name, (_, schema) in FEED_ENTITIES.items():
+            body[name] = [schema.model_validate(row).model_dump(mode="json") for row in rows[name]]
+        body["monthly_totals"] = snapshot.totals(scenario)
+        body["scenario_totals"] = DashboardService.scenario_totals(snapshot, rows["scenarios"])
+
+        encoded = json.dumps(body, separators=(",", ":")).encode("utf-8")
+        return encoded, f'"{hashlib.sha256(encoded).hexdigest()[:32]}"'
@@ -1,18 +1,27 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import text
-from typing import List, Dict, Any
+from sqlalchemy import text, bindparam
+from sqlalchemy.engine import Row
+from typing import List, Dict, Any, Optional
+import numpy as np
 import uuid
 
+from ..models.base import utcnow
+from .fx import fx_rates, FxService, FX_BASE_CURRENCY
+from .money import from_cents
+from .planner_cache import planner_cache
+from .scenario_membership import ScenarioMembershipService, scenario_membership_sql, lineage_params
+
 class EffectiveStatusService:
     """Service for calculating effective status of items based on linked assets/liabilities"""
     
     @staticmethod
-    def get_effective_liabilities(db: Session, planner_id: uuid.UUID, scenario: str = "ALL") -> List[Dict[str, Any]]:
+    def get_effective_liabilities(db: Session, planner_id: uuid.UUID, scenario: str = "ALL") -> List[Row]:
         """
         Get liabilities with effective status calculated based on linked assets
         Uses the v_liabilities_effective view logic
         """
-        query = text("""
+        lineage = ScenarioMembershipService.lineage(db, planner_id, scenario)
+        query = text(f"""
             SELECT 
                 l.id,
                 l.name,
@@ -33,19 +42,20 @@ class EffectiveStatusService:
             FROM liabilities l
             LEFT JOIN assets a ON l.linked_asset_id = a.id
             WHERE l.planner_id = :planner_id
-            AND (l.scenario = :scenario OR :scenario = 'ALL')
+            AND {scenario_membership_sql('l', lineage)}
         """)
         
-        result = db.execute(query, {"planner_id": str(planner_id).replace('-', ''), "scenario": scenario})
-        return [dict(row._mapping) for row in result]
+        result = db.execute(query, {"planner_id": str(planner_id).replace('-', ''), **lineage_params(lineage)})
+        return result.all()
     
     @staticmethod
-    def get_effective_expenses(db: Session, planner_id: uuid.UUID, scenario: str = "ALL") -> List[Dict[str, Any]]:
+    def get_effective_expenses(db: Session, planner_id: uuid.UUID, scenario: str = "ALL") -> List[Row]:
         """
         Get expenses with effective status calculated based on linked assets/liabilities
         Uses the v_expenses_effective view logic
         """
-        query = text("""
+        lineage = ScenarioMembershipService.lineage(db, planner_id, scenario)
+        query = text(f"""
             SELECT 
                 e.id,
                 e.name,
@@ -69,19 +79,20 @@ class EffectiveStatusService:
             LEFT JOIN assets a ON e.linked_asset_id = a.id
             LEFT JOIN liabilities l ON e.linked_liab_id = l.id
             WHERE e.planner_id = :planner_id
-            AND (e.scenario = :scenario OR :scenario = 'ALL')
+            AND {scenario_membership_sql('e', lineage)}
         """)
         
-        result = db.execute(query, {"planner_id": str(planner_id).replace('-', ''), "scenario": scenario})
-        return [dict(row._mapping) for row in result]
+        result = db.execute(query, {"planner_id": str(planner_id).replace('-', ''), **lineage_params(lineage)})
+        return result.all()
     
     @staticmethod
-    def get_effective_bills(db: Session, planner_id: uuid.UUID, scenario: str = "ALL") -> List[Dict[str, Any]]:
+    def get_effective_bills(db: Session, planner_id: uuid.UUID, scenario: str = "ALL") -> List[Row]:
         """
         Get bills with effective status calculated based on linked assets/liabilities
         Uses the v_bills_effective view logic
         """
-        query = text("""
+        lineage = ScenarioMembershipService.lineage(db, planner_id, scenario)
+        query = text(f"""
             SELECT 
                 b.id,
                 b.name,
@@ -90,6 +101,8 @@ class EffectiveStatusService:
                 b.bill_amount,
                 b.interval_months,
                 b.monthly_average,
+                b.first_due_month,
+                b.due_month_mask,
                 b.category_id,
                 b.linked_asset_id,
                 b.linked_liab_id,
@@ -107,114 +120,137 @@ class EffectiveStatusService:
             LEFT JOIN assets a ON b.linked_asset_id = a.id
             LEFT JOIN liabilities l ON b.linked_liab_id = l.id
             WHERE b.planner_id = :planner_id
-            AND (b.scenario = :scenario OR :scenario = 'ALL')
+            AND {scenario_membership_sql('b', lineage)}
         """)
         
-        result = db.execute(query, {"planner_id": str(planner_id).replace('-', ''), "scenario": scenario})
-        return [dict(row._mapping) for row in result]
+        result = db.execute(query, {"planner_id": str(planner_id).replace('-', ''), **lineage_params(lineage)})
+        return result.all()
     
     @staticmethod
     def calculate_monthly_totals(db: Session, planner_id: uuid.UUID, scenario: str = "ALL") -> Dict[str, float]:
         """
         Calculate monthly totals for income, expenses, bills, and liabilities
-        using effective status calculations
+        using effective status calculations; amounts are summed exactly in cents
+        per item currency and converted to the planner's reporting currency.
+        Concurrent calls for the same planner and scenario share one computation.
         """
+        return planner_cache.coalesce(
+            planner_id, ("monthly_totals", scenario),
+            lambda: EffectiveStatusService._monthly_totals(db, planner_id, scenario),
+        )
+    
+    @staticmethod
+    def _monthly_totals(db: Session, planner_id: uuid.UUID, scenario: str) -> Dict[str, float]:
+        lineage = ScenarioMembershipService.lineage(db, planner_id, scenario)
+        
         # Get effective income
-        income_query = text("""
-            SELECT COALESCE(SUM(monthly_amount), 0) as total_income
+        income_query = text(f"""
+            SELECT currency_code, SUM(monthly_amount_cents) as total_income
             FROM income 
             WHERE planner_id = :planner_id 
             AND include_toggle = 'on'
-            AND (scenario = :scenario OR :scenario = 'ALL')
+            AND {scenario_membership_sql('income', lineage)}
+            GROUP BY currency_code
         """)
         
         # Get effective expenses
-        expenses_query = text("""
-            SELECT COALESCE(SUM(e.monthly_amount), 0) as total_expenses
+        expenses_query = text(f"""
+            SELECT e.currency_code, SUM(e.monthly_amount_cents) as total_expenses
             FROM expenses e
             LEFT JOIN assets a ON e.linked_asset_id = a.id
             LEFT JOIN liabilities l ON e.linked_liab_id = l.id
             WHERE e.planner_id = :planner_id
-            AND (e.scenario = :scenario OR :scenario = 'ALL')
+            AND {scenario_membership_sql('e', lineage)}
             AND CASE 
                 WHEN e.include_toggle = 'off' THEN 'off'
                 WHEN e.linked_asset_id IS NOT NULL AND a.include_toggle = 'off' THEN 'off'
                 WHEN e.linked_liab_id IS NOT NULL AND l.include_toggle = 'off' THEN 'off'
                 ELSE e.include_toggle
             END = 'on'
+            GROUP BY e.currency_code
         """)
         
         # Get effective bills using monthly_average for accurate monthly totals
-        bills_query = text("""
-            SELECT COALESCE(SUM(b.monthly_average), 0) as total_bills
+        bills_query = text(f"""
+            SELECT b.currency_code, SUM(b.monthly_average_cents) as total_bills
             FROM bills b
             LEFT JOIN assets a ON b.linked_asset_id = a.id
             LEFT JOIN liabilities l ON b.linked_liab_id = l.id
             WHERE b.planner_id = :planner_id
-            AND (b.scenario = :scenario OR :scenario = 'ALL')
+            AND {scenario_membership_sql('b', lineage)}
             AND CASE 
                 WHEN b.include_toggle = 'off' THEN 'off'
                 WHEN b.linked_asset_id IS NOT NULL AND a.include_toggle = 'off' THEN 'off'
                 WHEN b.linked_liab_id IS NOT NULL AND l.include_toggle = 'off' THEN 'off'
                 ELSE b.include_toggle
             END = 'on'
+            GROUP BY b.currency_code
         """)
         
         # Get effective liabilities
-        liabilities_query = text("""
-            SELECT COALESCE(SUM(l.monthly_cost), 0) as total_liabilities
+        liabilities_query = text(f"""
+            SELECT l.currency_code, SUM(l.monthly_cost_cents) as total_liabilities
             FROM liabilities l
             LEFT JOIN assets a ON l.linked_asset_id = a.id
             WHERE l.planner_id = :planner_id
-            AND (l.scenario = :scenario OR :scenario = 'ALL')
+            AND {scenario_membership_sql('l', lineage)}
             AND CASE 
                 WHEN l.include_toggle = 'off' THEN 'off'
                 WHEN l.linked_asset_id IS NULL THEN l.include_toggle
                 WHEN a.include_toggle = 'off' THEN 'off'
                 ELSE l.include_toggle
             END = 'on'
+            GROUP BY l.currency_code
         """)
         
         # Get asset sales for the scenario
-        asset_sales_query = text("""
-            SELECT COALESCE(SUM(sale_value), 0) as total_asset_sales
+        asset_sales_query = text(f"""
+            SELECT currency_code, SUM(sale_value_cents) as total_asset_sales
             FROM assets 
             WHERE planner_id = :planner_id 
             AND include_toggle = 'on'
-            AND (scenario = :scenario OR :scenario = 'ALL')
+            AND {scenario_membership_sql('assets', lineage)}
+            GROUP BY currency_code
         """)
         
         # Get liability principal for the scenario
-        liability_principal_query = text("""
-            SELECT COALESCE(SUM(l.principal), 0) as total_liability_principal
+        liability_principal_query = text(f"""
+            SELECT l.currency_code, SUM(l.principal_cents) as total_liability_principal
             FROM liabilities l
             LEFT JOIN assets a ON l.linked_asset_id = a.id
             WHERE l.planner_id = :planner_id
-            AND (l.scenario = :scenario OR :scenario = 'ALL')
+            AND {scenario_membership_sql('l', lineage)}
             AND CASE 
                 WHEN l.include_toggle = 'off' THEN 'off'
                 WHEN l.linked_asset_id IS NULL THEN l.include_toggle
                 WHEN a.include_toggle = 'off' THEN 'off'
                 ELSE l.include_toggle
             END = 'on'
+            GROUP BY l.currency_code
         """)
         
-        params = {"planner_id": str(planner_id).replace('-', ''), "scenario": scenario}
-        
-        income_result = db.execute(income_query, params).fetchone()
-        expenses_result = db.execute(expenses_query, params).fetchone()
-        bills_result = db.execute(bills_query, params).fetchone()
-        liabilities_result = db.execute(liabilities_query, params).fetchone()
-        asset_sales_result = db.execute(asset_sales_query, params).fetchone()
-        liability_principal_result = db.execute(liability_principal_query, params).fetchone()
-        
-        total_income = float(income_result.total_income) if income_result.total_income is not None else 0.0
-        total_expenses = float(expenses_result.total_expenses) if expenses_result.total_expenses is not None else 0.0
-        total_bills = float(bills_result.total_bills) if bills_result.total_bills is not None else 0.0
-        total_liabilities = float(liabilities_result.total_liabilities) if liabilities_result.total_liabilities is not None else 0.0
-        total_asset_sales = float(asset_sales_result.total_asset_sales) if asset_sales_result.total_asset_sales is not None else 0.0
-        total_liability_principal = float(liability_principal_result.total_liability_principal) if liability_principal_result.total_liability_principal is not None else 0.0
+        params = {"planner_id": str(planner_id).replace('-', ''), **lineage_params(lineage)}
+        currency = FxService.planner_currency(db, planner_id)
+        today = utcnow().date()
         
+        return EffectiveStatusService.build_totals_from_cents(*(
+            fx_rates.convert_grouped(db.execute(query, params).fetchall(), currency, today)
+            for query in (
+                income_query, expenses_query, bills_query,
+                liabilities_query, asset_sales_query, liability_principal_query
+            )
+        ))
+    
+    @staticmethod
+    def build_totals(
+        total_income: float,
+        total_expenses: float,
+        total_bills: float,
+        total_liabilities: float,
+        total_asset_sales: float,
+        total_liability_principal: float,
+    ) -> Dict[str, float]:
+        """Derive the KPI totals dictionary from the six summed components"""
         total_monthly_outgoings = total_expenses + total_bills + total_liabilities
         net_cash_flow = total_income - total_monthly_outgoings
         net_value = total_asset_sales - total_liability_principal
@@ -230,3 +266,264 @@ class EffectiveStatusService:
             "liability_principal": total_liability_principal,
             "net_value": net_value
         }
+    
+    @staticmethod
+    def build_totals_from_cents(
+        total_income: int,
+        total_expenses: int,
+        total_bills: int,
+        total_liabilities: int,
+        total_asset_sales: int,
+        total_liability_principal: int,
+    ) -> Dict[str, float]:
+        """
+        build_totals for component sums in cents: outgoings and net figures are derived
+        in integers, so each value is exact until its single conversion to float
+        """
+        exact = EffectiveStatusService.build_totals(
+            int(total_income), int(total_expenses), int(total_bills),
+            int(total_liabilities), int(total_asset_sales), int(total_liability_principal)
+        )
+        return {key: from_cents(value) for key, value in exact.items()}
+    
+    @staticmethod
+    def calculate_scenario_totals(db: Session, planner_id: uuid.UUID) -> List[Dict[str, Any]]:
+        """
+        Calculate monthly totals for ALL and every scenario of a planner at once.
+        Each table is read once with its effective status; membership (including fork
+        inheritance) is expanded to an items x scenarios matrix, so extra scenarios only
+        widen one matrix product. Rows are split by currency in the same product and each
+        currency's sums are converted once. Concurrent calls for a planner share one
+        computation.
+        """
+        return planner_cache.coalesce(
+            planner_id, ("scenario_totals",),
+            lambda: EffectiveStatusService._scenario_totals(db, planner_id),
+        )
+    
+    @staticmethod
+    def _scenario_totals(db: Session, planner_id: uuid.UUID) -> List[Dict[str, Any]]:
+        scenarios = ScenarioMembershipService.scenarios_for_planner(db, planner_id)
+        planner_scenarios = ScenarioMembershipService.planner_scenarios(db, planner_id)
+        lineages = [ScenarioMembershipService.resolve_lineage(planner_scenarios, s.scenario) for s in scenarios]
+        params = {"planner_id": str(planner_id).replace('-', '')}
+        currency = FxService.planner_currency(db, planner_id)
+        today = utcnow().date()
+        
+        # (query, [(component, amount column in cents)]) - only effective 'on' rows are loaded
+        sources = [
+            (text("""
+                SELECT monthly_amount_cents, currency_code, scenario, scenario_mask, scenario_exclude_mask
+                FROM income
+                WHERE planner_id = :planner_id AND include_toggle = 'on'
+            """), [("income", "monthly_amount_cents")]),
+            (text("""
+                SELECT e.monthly_amount_cents, e.currency_code, e.scenario, e.scenario_mask, e.scenario_exclude_mask
+                FROM expenses e
+                LEFT JOIN assets a ON e.linked_asset_id = a.id
+                LEFT JOIN liabilities l ON e.linked_liab_id = l.id
+                WHERE e.planner_id = :planner_id
+                AND CASE 
+                    WHEN e.include_toggle = 'off' THEN 'off'
+                    WHEN e.linked_asset_id IS NOT NULL AND a.include_toggle = 'off' THEN 'off'
+                    WHEN e.linked_liab_id IS NOT NULL AND l.include_toggle = 'off' THEN 'off'
+                    ELSE e.include_toggle
+                END = 'on'
+            """), [("expenses", "monthly_amount_cents")]),
+            (text("""
+                SELECT b.monthly_average_cents, b.currency_code, b.scenario, b.scenario_mask, b.scenario_exclude_mask
+                FROM bills b
+                LEFT JOIN assets a ON b.linked_asset_id = a.id
+                LEFT JOIN liabilities l ON b.linked_liab_id = l.id
+                WHERE b.planner_id = :planner_id
+                AND CASE 
+                    WHEN b.include_toggle = 'off' THEN 'off'
+                    WHEN b.linked_asset_id IS NOT NULL AND a.include_toggle = 'off' THEN 'off'
+                    WHEN b.linked_liab_id IS NOT NULL AND l.include_toggle = 'off' THEN 'off'
+                    ELSE b.include_toggle
+                END = 'on'
+            """), [("bills", "monthly_average_cents")]),
+            (text("""
+                SELECT l.monthly_cost_cents, l.principal_cents, l.currency_code, l.scenario, l.scenario_mask, l.scenario_exclude_mask
+                FROM liabilities l
+                LEFT JOIN assets a ON l.linked_asset_id = a.id
+                WHERE l.planner_id = :planner_id
+                AND CASE 
+                    WHEN l.include_toggle = 'off' THEN 'off'
+                    WHEN l.linked_asset_id IS NULL THEN l.include_toggle
+                    WHEN a.include_toggle = 'off' THEN 'off'
+                    ELSE l.include_toggle
+                END = 'on'
+            """), [("liabilities", "monthly_cost_cents"), ("liability_principal", "principal_cents")]),
+            (text("""
+                SELECT sale_value_cents, currency_code, scenario, scenario_mask, scenario_exclude_mask
+                FROM assets
+                WHERE planner_id = :planner_id AND include_toggle = 'on'
+            """), [("asset_sales", "sale_value_cents")]),
+        ]
+        
+        # Column 0 is ALL (every item), followed by one column per scenario
+        components: Dict[str, np.ndarray] = {}
+        for query, columns in sources:
+            rows = db.execute(query, params).fetchall()
+            membership = ScenarioMembershipService.membership_matrix(
+                [row.scenario for row in rows],
+                [row.scenario_mask or 0 for row in rows],
+                [row.scenario_exclude_mask or 0 for row in rows],
+                lineages,
+            )
+            membership = np.hstack([np.ones((len(rows), 1), dtype=bool), membership])
+            currencies = list(dict.fromkeys(row.currency_code for row in rows)) or [None]
+            positions = {code: position for position, code in enumerate(currencies)}
+            # currencies x items: which row is in which currency
+            by_currency = np.arange(len(currencies))[:, None] == np.array(
+                [positions[row.currency_code] for row in rows], dtype=np.int64
+            )[None, :]
+            for component, column in columns:
+                amounts = np.array([getattr(row, column) or 0 for row in rows], dtype=np.int64)
+                components[component] = fx_rates.convert_cents(
+                    (by_currency * amounts) @ membership, currencies, currency, today
+                )
+        
+        labels = [("ALL", None, "All items")] + [(s.scenario, s.id, s.display_name) for s in scenarios]
+        return [
+            {
+                "scenario": identifier,
+                "scenario_id": str(scenario_id) if scenario_id else None,
+                "display_name": display_name,
+                "totals": EffectiveStatusService.build_totals_from_cents(
+                    *(components[name][index] for name in (
+                        "income", "expenses", "bills", "liabilities", "asset_sales", "liability_principal"
+                    ))
+                ),
+            }
+            for index, (identifier, scenario_id, display_name) in enumerate(labels)
+        ]
+    
+    @staticmethod
+    def calculate_rollup_totals(
+        db: Session,
+        household_id: Optional[uuid.UUID] = None,
+        planner_ids: Optional[List[uuid.UUID]] = None,
+        currency: Optional[str] = None,
+    ) -> Dict[str, Any]:
+        """
+        Calculate ALL-view monthly totals for every planner of a household, or for a list
+        of planners, plus their aggregate. A single query unions the effective items of
+        the selected planners and groups them by planner_id and item currency.
+
+        Every total is converted to currency, by default the household owner's currency
+        (FX_BASE_CURRENCY for a list of planners), so planners can be added up.
+        """
+        if currency is None:
+            currency = FxService.household_currency(db, household_id) if household_id is not None else FX_BASE_CURRENCY
+        FxService.check_currency(currency)
+        today = utcnow().date()
+        if household_id is not None:
+            scope = "household_id = :household_id"
+            params: Dict[str, Any] = {"household_id": str(household_id).replace('-', '')}
+        else:
+            scope = "id IN :planner_ids"
+            params = {"planner_ids": [str(planner_id).replace('-', '') for planner_id in planner_ids or []]}
+        params["base_currency"] = FX_BASE_CURRENCY
+        in_scope = f"planner_id IN (SELECT id FROM planners WHERE {scope})"
+        
+        query = text(f"""
+            SELECT
+                p.id AS planner_id,
+                p.name,
+                p.household_id,
+                COALESCE(i.currency_code, u.currency_code, :base_currency) AS currency_code,
+                COALESCE(SUM(CASE WHEN i.component = 'income' THEN i.amount END), 0) AS income,
+                COALESCE(SUM(CASE WHEN i.component = 'expenses' THEN i.amount END), 0) AS expenses,
+                COALESCE(SUM(CASE WHEN i.component = 'bills' THEN i.amount END), 0) AS bills,
+                COALESCE(SUM(CASE WHEN i.component = 'liabilities' THEN i.amount END), 0) AS liabilities,
+                COALESCE(SUM(CASE WHEN i.component = 'asset_sales' THEN i.amount END), 0) AS asset_sales,
+                COALESCE(SUM(CASE WHEN i.component = 'liabilities' THEN i.principal END), 0) AS liability_principal
+            FROM planners p
+            LEFT JOIN app_users u ON u.id = p.owner_user_id
+            LEFT JOIN (
+                SELECT planner_id, currency_code, 'income' AS component, monthly_amount_cents AS amount, 0 AS principal
+                FROM income
+                WHERE {in_scope} AND include_toggle = 'on'
+                
+                UNION ALL
+                
+                SELECT e.planner_id, e.currency_code, 'expenses', e.monthly_amount_cents, 0
+                FROM expenses e
+                LEFT JOIN assets a ON e.linked_asset_id = a.id
+                LEFT JOIN liabilities l ON e.linked_liab_id = l.id
+                WHERE e.{in_scope}
+                AND CASE 
+                    WHEN e.include_toggle = 'off' THEN 'off'
+                    WHEN e.linked_asset_id IS NOT NULL AND a.include_toggle = 'off' THEN 'off'
+                    WHEN e.linked_liab_id IS NOT NULL AND l.include_toggle = 'off' THEN 'off'
+                    ELSE e.include_toggle
+                END = 'on'
+                
+                UNION ALL
+                
+                SELECT b.planner_id, b.currency_code, 'bills', b.monthly_average_cents, 0
+                FROM bills b
+                LEFT JOIN assets a ON b.linked_asset_id = a.id
+                LEFT JOIN liabilities l ON b.linked_liab_id = l.id
+                WHERE b.{in_scope}
+                AND CASE 
+                    WHEN b.include_toggle = 'off' THEN 'off'
+                    WHEN b.linked_asset_id IS NOT NULL AND a.include_toggle = 'off' THEN 'off'
+                    WHEN b.linked_liab_id IS NOT NULL AND l.include_toggle = 'off' THEN 'off'
+                    ELSE b.include_toggle
+                END = 'on'
+                
+                UNION ALL
+                
+                SELECT l.planner_id, l.currency_code, 'liabilities', l.monthly_cost_cents, COALESCE(l.principal_cents, 0)
+                FROM liabilities l
+                LEFT JOIN assets a ON l.linked_asset_id = a.id
+                WHERE l.{in_scope}
+                AND CASE 
+                    WHEN l.include_toggle = 'off' THEN 'off'
+                    WHEN l.linked_asset_id IS NULL THEN l.include_toggle
+                    WHEN a.include_toggle = 'off' THEN 'off'
+                    ELSE l.include_toggle
+                END = 'on'
+                
+                UNION ALL
+                
+                SELECT planner_id, currency_code, 'asset_sales', sale_value_cents, 0
+                FROM assets
+                WHERE {in_scope} AND include_toggle = 'on'
+            ) i ON i.planner_id = p.id
+            WHERE p.{scope}
+            GROUP BY p.id, p.name, p.household_id, COALESCE(i.currency_code, u.currency_code, :base_currency)
+            ORDER BY p.name, p.id
+        """)
+        if household_id is None:
+            query = query.bindparams(bindparam("planner_ids", expanding=True))
+        
+        components = ("income", "expenses", "bills", "liabilities", "asset_sales", "liability_principal")
+        # planner_id -> (row, currencies, sums per currency); items without a currency are in
+        # their planner owner's currency, which need not be the rollup currency
+        by_planner: Dict[Any, Any] = {}
+        for row in db.execute(query, params):
+            _, currencies, sums = by_planner.setdefault(row.planner_id, (row, [], []))
+            currencies.append(row.currency_code)
+            sums.append([int(getattr(row, name) or 0) for name in components])
+        
+        aggregate = np.zeros(len(components), dtype=np.int64)
+        planners = []
+        for row, currencies, sums in by_planner.values():
+            values = fx_rates.convert_cents(sums, currencies, currency, today)
+            aggregate += values
+            planners.append({
+                "planner_id": str(uuid.UUID(str(row.planner_id))),
+                "name": row.name,
+                "household_id": str(uuid.UUID(str(row.household_id))),
+                "totals": EffectiveStatusService.build_totals_from_cents(*values),
+            })
+        
+        return {
+            "currency": currency,
+            "planners": planners,
+            "aggregate": EffectiveStatusService.build_totals_from_cents(*aggregate),
+        }
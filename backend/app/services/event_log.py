@@ -0,0 +1,315 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select, insert, update, delete, func
+from datetime import datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import json
+import os
+import uuid
+import zlib
+
+from ..models import PlannerEvent, PlannerCheckpoint, ScenarioSettings, ScenarioItem
+from ..models.base import utcnow
+from .change_feed import FEED_ENTITIES, ENTITY_TYPES, ChangeFeedService
+from .scenario_membership import ITEM_MODELS
+
+EVENT_LOG_ENABLED = os.getenv("EVENT_LOG", "on") == "on"
+CHECKPOINT_EVERY = int(os.getenv("EVENT_LOG_CHECKPOINT_EVERY", "200"))
+
+# entity type -> {entity id -> encoded row}
+State = Dict[str, Dict[str, Dict[str, Any]]]
+# (model, encoded row before, encoded row after); None before a create and after a delete
+Change = Tuple[Any, Optional[Dict[str, Any]], Optional[Dict[str, Any]]]
+
+_DECODERS: Dict[Any, Tuple[Dict[str, Callable[[Any], Any]], set]] = {}
+
+def _entity_key(value: Any) -> str:
+    return str(value if isinstance(value, uuid.UUID) else uuid.UUID(str(value)))
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    if isinstance(value, Decimal):
+        return str(value)
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+def _created_at(data: Dict[str, Any]) -> datetime:
+    """created_at of an encoded row as UTC; SQLite stores naive UTC timestamps"""
+    created_at = datetime.fromisoformat(data["created_at"])
+    return created_at.replace(tzinfo=timezone.utc) if created_at.tzinfo is None else created_at
+
+def _stored_columns(model) -> List[Any]:
+    """Columns written by the application; generated ones (the *_cents copies) are derived by the database"""
+    return [column for column in model.__table__.columns if column.computed is None]
+
+def encode_row(model, row: Any) -> Dict[str, Any]:
+    """JSON-safe copy of a Core row or ORM object"""
+    return {column.key: _encode(getattr(row, column.key)) for column in _stored_columns(model)}
+
+def decode_row(model, data: Dict[str, Any]) -> Dict[str, Any]:
+    """Column values back from an encoded row"""
+    cached = _DECODERS.get(model)
+    if cached is None:
+        decoders = {}
+        for column in _stored_columns(model):
+            python_type = column.type.python_type
+            if python_type is uuid.UUID:
+                decoders[column.key] = lambda value: uuid.UUID(str(value))
+            elif python_type is Decimal:
+                decoders[column.key] = Decimal
+            elif python_type is datetime:
+                decoders[column.key] = datetime.fromisoformat
+        cached = _DECODERS[model] = (decoders, {column.key for column in _stored_columns(model)})
+    decoders, columns = cached
+    return {
+        key: decoders[key](value) if value is not None and key in decoders else value
+        for key, value in data.items() if key in columns
+    }
+
+class ChangeTracker:
+    """
+    Collects changes for write paths that have no RETURNING data (ORM objects, bulk
+    mask updates): rows matching each watch are read before the block and again when
+    changes() is called, and the differences become events.
+    """
+
+    def __init__(self, db: Session):
+        self.db = db
+        self._watched: List[Tuple[Any, Tuple, Dict[str, Dict[str, Any]]]] = []
+
+    def _read(self, model, conditions: Tuple) -> Dict[str, Dict[str, Any]]:
+        rows = self.db.execute(select(*model.__table__.columns).where(*conditions)).all()
+        return {_entity_key(row.id): encode_row(model, row) for row in rows}
+
+    def watch(self, model, *conditions) -> None:
+        self._watched.append((model, conditions, self._read(model, conditions)))
+
+    def changes(self) -> List[Change]:
+        self.db.flush()
+        changes: List[Change] = []
+        for model, conditions, before in self._watched:
+            after = self._read(model, conditions)
+            for entity_id in list(before) + [entity_id for entity_id in after if entity_id not in before]:
+                if before.get(entity_id) != after.get(entity_id):
+                    changes.append((model, before.get(entity_id), after.get(entity_id)))
+        return changes
+
+class EventLogService:
+    """
+    Append-only log of every row change to a planner's scenarios, categories and items,
+    with periodic checkpoints of the planner's full state.
+
+    Events are written in the same transaction as the change. The first logged change
+    of a planner stores a baseline checkpoint of the state just before it, and a new
+    checkpoint follows every EVENT_LOG_CHECKPOINT_EVERY events, so rebuilding any past
+    state reads one checkpoint and replays a bounded number of events. Undo reverts
+    the latest transaction that has not been undone, and is logged itself.
+    """
+
+    @staticmethod
+    def current_state(db: Session, planner_id: uuid.UUID) -> State:
+        return {
+            entity_type: {
+                _entity_key(row.id): encode_row(model, row)
+                for row in db.execute(select(*model.__table__.columns).where(model.planner_id == planner_id)).all()
+            }
+            for entity_type, (model, _) in FEED_ENTITIES.items()
+        }
+
+    @staticmethod
+    def _apply(state: State, entity_type: str, entity_id: str, data: Optional[Dict[str, Any]]) -> None:
+        rows = state.setdefault(entity_type, {})
+        if data is None:
+            rows.pop(entity_id, None)
+        else:
+            rows[entity_id] = data
+
+    @staticmethod
+    def _checkpoint(db: Session, planner_id: uuid.UUID, state: State, last_event_id: int) -> None:
+        db.execute(insert(PlannerCheckpoint).values(
+            planner_id=planner_id,
+            last_event_id=last_event_id,
+            state=zlib.compress(json.dumps(state, separators=(",", ":")).encode("utf-8")),
+        ))
+
+    @staticmethod
+    def record(db: Session, planner_id: uuid.UUID, changes: Sequence[Change], undo_of: Optional[uuid.UUID] = None) -> None:
+        """Append the changes made in the current transaction as one logged transaction; the caller commits"""
+        if not EVENT_LOG_ENABLED or not changes:
+            return
+
+        last_checkpoint = (
+            select(func.max(PlannerCheckpoint.last_event_id))
+            .where(PlannerCheckpoint.planner_id == planner_id)
+            .scalar_subquery()
+        )
+        checkpointed, pending = db.execute(select(
+            last_checkpoint,
+            select(func.count()).select_from(PlannerEvent)
+            .where(PlannerEvent.planner_id == planner_id, PlannerEvent.id > func.coalesce(last_checkpoint, 0))
+            .scalar_subquery(),
+        )).one()
+
+        if checkpointed is None:
+            # First logged change of this planner: the baseline is the state just before it
+            state = EventLogService.current_state(db, planner_id)
+            for model, before, after in reversed(changes):
+                EventLogService._apply(state, ENTITY_TYPES[model], _entity_key((before or after)["id"]), before)
+            EventLogService._checkpoint(db, planner_id, state, 0)
+
+        transaction_id = uuid.uuid4()
+        db.execute(insert(PlannerEvent), [
+            {
+                "planner_id": planner_id,
+                "transaction_id": transaction_id,
+                "undo_of": undo_of,
+                "entity_type": ENTITY_TYPES[model],
+                "entity_id": uuid.UUID((before or after)["id"]),
+                "op": "create" if before is None else "delete" if after is None else "update",
+                "before": before,
+                "after": after,
+            }
+            for model, before, after in changes
+        ])
+
+        if pending + len(changes) >= CHECKPOINT_EVERY:
+            last_event_id = db.execute(
+                select(func.max(PlannerEvent.id)).where(PlannerEvent.planner_id == planner_id)
+            ).scalar()
+            EventLogService._checkpoint(db, planner_id, EventLogService.current_state(db, planner_id), last_event_id)
+
+    @staticmethod
+    def state_as_of(db: Session, planner_id: uuid.UUID, as_of: datetime) -> State:
+        """
+        The planner's rows as they were at as_of: the newest checkpoint at or before it
+        plus the events after the checkpoint up to as_of. Before the first logged change
+        the baseline checkpoint applies, since it holds the state before that change
+        (less rows created after as_of). Planners without logged changes return their
+        current rows.
+        """
+        checkpoint = db.execute(
+            select(PlannerCheckpoint.last_event_id, PlannerCheckpoint.state)
+            .where(PlannerCheckpoint.planner_id == planner_id, PlannerCheckpoint.recorded_at <= as_of)
+            .order_by(PlannerCheckpoint.recorded_at.desc(), PlannerCheckpoint.id.desc())
+            .limit(1)
+        ).first()
+        if checkpoint is None:
+            baseline = db.execute(
+                select(PlannerCheckpoint.state)
+                .where(PlannerCheckpoint.planner_id == planner_id, PlannerCheckpoint.last_event_id == 0)
+                .order_by(PlannerCheckpoint.id)
+                .limit(1)
+            ).scalar()
+            if baseline is None:
+                return EventLogService.current_state(db, planner_id)
+            # The baseline is stamped with the first change's time but stands for everything before it
+            state: State = json.loads(zlib.decompress(baseline))
+            return {
+                entity_type: {
+                    entity_id: data for entity_id, data in rows.items()
+                    if _created_at(data) <= as_of
+                }
+                for entity_type, rows in state.items()
+            }
+
+        state: State = json.loads(zlib.decompress(checkpoint.state))
+        events = db.execute(
+            select(PlannerEvent.entity_type, PlannerEvent.entity_id, PlannerEvent.after)
+            .where(
+                PlannerEvent.planner_id == planner_id,
+                PlannerEvent.id > checkpoint.last_event_id,
+                PlannerEvent.recorded_at <= as_of,
+            )
+            .order_by(PlannerEvent.id)
+        ).all()
+        for entity_type, entity_id, after in events:
+            EventLogService._apply(state, entity_type, _entity_key(entity_id), after)
+        return state
+
+    @staticmethod
+    def rows_as_of(db: Session, planner_id: uuid.UUID, as_of: datetime) -> Dict[str, List[Any]]:
+        """state_as_of as row objects per entity type, in creation order like the table reads"""
+        state = EventLogService.state_as_of(db, planner_id, as_of)
+        rows: Dict[str, List[Any]] = {}
+        for entity_type, (model, _) in FEED_ENTITIES.items():
+            decoded = [SimpleNamespace(**decode_row(model, data)) for data in state.get(entity_type, {}).values()]
+            rows[entity_type] = sorted(decoded, key=lambda row: row.created_at)
+        return rows
+
+    @staticmethod
+    def undo(db: Session, planner_id: uuid.UUID) -> Optional[Tuple[uuid.UUID, int]]:
+        """
+        Revert the latest logged transaction that is not an undo and was not undone yet,
+        returning (its transaction id, events reverted), or None when there is nothing
+        to undo. Reverted rows get a new updated_at so change feed clients pick them up.
+        The caller commits.
+        """
+        undone = select(PlannerEvent.undo_of).where(
+            PlannerEvent.planner_id == planner_id, PlannerEvent.undo_of.is_not(None)
+        )
+        target = db.execute(
+            select(PlannerEvent.transaction_id)
+            .where(
+                PlannerEvent.planner_id == planner_id,
+                PlannerEvent.undo_of.is_(None),
+                PlannerEvent.transaction_id.not_in(undone),
+            )
+            .order_by(PlannerEvent.id.desc())
+            .limit(1)
+        ).scalar()
+        if target is None:
+            return None
+
+        events = db.execute(
+            select(PlannerEvent.entity_type, PlannerEvent.entity_id, PlannerEvent.before, PlannerEvent.after)
+            .where(PlannerEvent.transaction_id == target)
+            .order_by(PlannerEvent.id.desc())
+        ).all()
+
+        item_types = {model: item_type for item_type, model in ITEM_MODELS.items()}
+        now = utcnow()
+        changes: List[Change] = []
+        membership: List[Tuple[str, uuid.UUID, int, int]] = []
+        for entity_type, entity_id, before, after in events:
+            model = FEED_ENTITIES[entity_type][0]
+            table = model.__table__
+            if before is None:
+                db.execute(delete(table).where(model.id == entity_id))
+                ChangeFeedService.record_delete(db, model, planner_id, entity_id)
+                restored = None
+            else:
+                restored = {**before, "updated_at": now.isoformat()}
+                values = decode_row(model, restored)
+                if after is None:
+                    db.execute(insert(table).values(**values))
+                else:
+                    del values["id"], values["created_at"]
+                    db.execute(update(table).where(model.id == entity_id).values(**values))
+            changes.append((model, after, restored))
+            if model in item_types:
+                membership.append((
+                    item_types[model], entity_id, (before or {}).get("scenario_mask") or 0, (after or {}).get("scenario_mask") or 0
+                ))
+
+        # scenario_items mirrors the scenario_mask bits; bring it in line with the restored masks
+        if membership:
+            scenario_ids = dict(db.execute(
+                select(ScenarioSettings.scenario_bit, ScenarioSettings.id).where(ScenarioSettings.planner_id == planner_id)
+            ).all())
+            for item_type, item_id, restored_mask, previous_mask in membership:
+                for bit, scenario_id in scenario_ids.items():
+                    flag = 1 << bit
+                    if restored_mask & flag and not previous_mask & flag:
+                        db.execute(insert(ScenarioItem).values(item_id=item_id, item_type=item_type, scenario_id=scenario_id))
+                    elif previous_mask & flag and not restored_mask & flag:
+                        db.execute(delete(ScenarioItem).where(
+                            ScenarioItem.scenario_id == scenario_id,
+                            ScenarioItem.item_type == item_type,
+                            ScenarioItem.item_id == item_id,
+                        ))
+
+        EventLogService.record(db, planner_id, changes, undo_of=target)
+        return target, len(events)
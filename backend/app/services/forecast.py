@@ -0,0 +1,83 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from typing import Dict, Any
+import numpy as np
+import uuid
+
+from ..models.planner import PlannerSettings, ScenarioSettings
+from .planner_cache import planner_cache
+from .effective_status import EffectiveStatusService
+from .money import from_cents, to_cents
+from .planner_snapshot import PlannerSnapshot
+
+HORIZON_MONTHS = 12
+
+class ForecastService:
+    """
+    12-month cash projection: starting cash plus the monthly net cash flow, with the
+    net value of sold assets (sale values less liability principal) realized in the
+    scenario's sale month. A sale month of 0, and the ALL view, mean no sales.
+    """
+
+    @staticmethod
+    def settings(db: Session, planner_id: uuid.UUID) -> Dict[str, Any]:
+        """Starting cash and sale month per scenario identifier, cached per planner"""
+        def load():
+            starting_cash = db.execute(
+                select(PlannerSettings.starting_cash).where(PlannerSettings.planner_id == planner_id)
+            ).scalar()
+            sale_months = dict(db.execute(
+                select(ScenarioSettings.scenario, ScenarioSettings.sale_month)
+                .where(ScenarioSettings.planner_id == planner_id)
+            ).all())
+            return {"starting_cash": float(starting_cash or 0), "sale_months": sale_months}
+        return planner_cache.get_or_compute(planner_id, ("forecast_settings",), load)
+
+    @staticmethod
+    def sale_month(settings: Dict[str, Any], scenario: str) -> int:
+        month = settings["sale_months"].get(scenario, 0) or 0
+        return month if 1 <= month <= HORIZON_MONTHS else 0
+
+    @staticmethod
+    def balances(starting_cash: float, net_cash_flow, net_value, sale_month: int) -> np.ndarray:
+        """
+        Closing balance for months 1..12. net_cash_flow and net_value may be arrays,
+        in which case one row of balances is returned per element.
+        """
+        months = np.arange(1, HORIZON_MONTHS + 1)
+        sold = (months >= sale_month) if sale_month else np.zeros(HORIZON_MONTHS, dtype=bool)
+        net_cash_flow = np.asarray(net_cash_flow, dtype=np.float64)[..., None]
+        net_value = np.asarray(net_value, dtype=np.float64)[..., None]
+        return starting_cash + net_cash_flow * months + net_value * sold
+
+    @staticmethod
+    def forecast(db: Session, planner_id: uuid.UUID, scenario: str = "ALL") -> Dict[str, Any]:
+        """Concurrent calls for the same planner and scenario share one projection"""
+        return planner_cache.coalesce(
+            planner_id, ("forecast", scenario), lambda: ForecastService._forecast(db, planner_id, scenario)
+        )
+
+    @staticmethod
+    def _forecast(db: Session, planner_id: uuid.UUID, scenario: str) -> Dict[str, Any]:
+        settings = ForecastService.settings(db, planner_id)
+        sale_month = ForecastService.sale_month(settings, scenario)
+        # Projected in cents: integer-valued float64 stays exact far beyond Numeric(14, 2) amounts
+        totals = EffectiveStatusService.build_totals(*PlannerSnapshot.cached(db, planner_id).component_cents(scenario))
+        balances = ForecastService.balances(
+            to_cents(settings["starting_cash"]), totals["net_cash_flow"], totals["net_value"], sale_month
+        ).astype(np.int64)
+        return {
+            "starting_cash": settings["starting_cash"],
+            "sale_month": sale_month,
+            "months": [
+                {
+                    "month": month,
+                    "net_cash_flow": from_cents(totals["net_cash_flow"]),
+                    "asset_sale_proceeds": from_cents(totals["net_value"]) if month == sale_month else 0.0,
+                    "closing_balance": from_cents(balance),
+                }
+                for month, balance in enumerate(balances, start=1)
+            ],
+            "closing_balance": from_cents(balances[-1]),
+            "minimum_balance": from_cents(balances.min()),
+        }
@@ -0,0 +1,181 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select, insert, delete
+from bisect import bisect_right
+from datetime import date
+from decimal import Decimal
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+import csv
+import numpy as np
+import os
+import threading
+import time
+import uuid
+
+from ..database import engine
+from ..models import FxRate, Planner, AppUser, Household
+from .metrics import metrics
+from .planner_cache import planner_cache
+
+FX_BASE_CURRENCY = os.getenv("FX_BASE_CURRENCY", "EUR")  # Currency the rates in fx_rates are quoted against
+FX_RATES_FILE = os.getenv("FX_RATES_FILE", "fx_rates.csv")
+FX_CACHE_TTL = float(os.getenv("FX_CACHE_TTL", "300"))  # Bounds staleness after a reload in another worker
+
+class UnknownCurrencyError(ValueError):
+    """An amount is in a currency without any rate in fx_rates"""
+
+class FxRateCache:
+    """
+    In-memory copy of fx_rates with a memo of resolved rates keyed by (currency, date).
+
+    A rate on a date is the latest one published on or before it (the earliest one for
+    older dates). Conversions never touch the database per row: callers sum cents per
+    currency and convert each group with one factor, so a planner in a single currency
+    is never converted at all and stays exact. reload() drops the memo and every
+    planner's cached snapshot, since those hold converted amounts.
+    """
+
+    def __init__(self, base_currency: str):
+        self.base_currency = base_currency
+        self._series: Optional[Dict[str, Tuple[List[date], List[float]]]] = None
+        self._loaded_at = 0.0
+        self._rates: Dict[Tuple[str, date], float] = {}
+        self._lock = threading.Lock()
+
+    def _load(self) -> Dict[str, Tuple[List[date], List[float]]]:
+        # Rates are global reference data in the main database, also when planners are sharded
+        with engine.connect() as connection:
+            rows = connection.execute(
+                select(FxRate.currency_code, FxRate.rate_date, FxRate.rate)
+                .order_by(FxRate.currency_code, FxRate.rate_date)
+            ).all()
+        series: Dict[str, Tuple[List[date], List[float]]] = {}
+        for currency, rate_date, rate in rows:
+            dates, rates = series.setdefault(currency, ([], []))
+            dates.append(rate_date)
+            rates.append(float(rate))
+        return series
+
+    def _current(self) -> Dict[str, Tuple[List[date], List[float]]]:
+        series = self._series
+        if series is None or time.monotonic() - self._loaded_at > FX_CACHE_TTL:
+            with self._lock:
+                if self._series is None or time.monotonic() - self._loaded_at > FX_CACHE_TTL:
+                    self._series = self._load()
+                    self._loaded_at = time.monotonic()
+                    self._rates.clear()
+                series = self._series
+        return series
+
+    def reload(self) -> None:
+        """Re-read fx_rates on next use and drop everything computed with the old rates"""
+        with self._lock:
+            self._series = None
+            self._rates.clear()
+        planner_cache.clear()
+        metrics.increment("fx_rate_reloads")
+
+    def known(self, currency: str) -> bool:
+        return currency == self.base_currency or currency in self._current()
+
+    def currencies(self) -> Dict[str, Tuple[date, float]]:
+        """Latest rate per quoted currency"""
+        return {currency: (dates[-1], rates[-1]) for currency, (dates, rates) in self._current().items()}
+
+    def rate(self, currency: str, on: date) -> float:
+        """Units of currency per one base currency on a date"""
+        if currency == self.base_currency:
+            return 1.0
+        series = self._current()
+        key = (currency, on)
+        rate = self._rates.get(key)
+        if rate is None:
+            if currency not in series:
+                raise UnknownCurrencyError(f"No exchange rate for {currency}")
+            dates, rates = series[currency]
+            rate = rates[max(bisect_right(dates, on) - 1, 0)]
+            self._rates[key] = rate
+        return rate
+
+    def factors(self, currencies: Sequence[Optional[str]], target: str, on: date) -> np.ndarray:
+        """Multiplier per source currency into target; None is the target currency itself"""
+        if all(currency is None or currency == target for currency in currencies):
+            return np.ones(len(currencies))
+        target_rate = self.rate(target, on)
+        return np.array([
+            1.0 if currency is None or currency == target else target_rate / self.rate(currency, on)
+            for currency in currencies
+        ])
+
+    def convert_cents(self, sums: Any, currencies: Sequence[Optional[str]], target: str, on: date) -> np.ndarray:
+        """
+        Cent sums per source currency (axis 0, aligned with currencies) converted to target,
+        rounded to the cent per currency and added up over axis 0.
+        """
+        sums = np.asarray(sums, dtype=np.int64).reshape((len(currencies),) + np.shape(sums)[1:])
+        if all(currency is None or currency == target for currency in currencies):
+            return sums.sum(axis=0)
+        factors = self.factors(currencies, target, on).reshape((-1,) + (1,) * (sums.ndim - 1))
+        return np.rint(sums * factors).astype(np.int64).sum(axis=0)
+
+    def convert_grouped(self, rows: Iterable[Tuple[Optional[str], Any]], target: str, on: date) -> int:
+        """convert_cents for (currency, cents) pairs, e.g. the rows of a SUM ... GROUP BY currency_code"""
+        rows = list(rows)
+        if not rows:
+            return 0
+        return int(self.convert_cents([int(cents or 0) for _, cents in rows], [currency for currency, _ in rows], target, on))
+
+fx_rates = FxRateCache(FX_BASE_CURRENCY)
+
+class FxService:
+    """Reporting currency of planners and loading of the rates file"""
+
+    @staticmethod
+    def planner_currency(db: Session, planner_id: uuid.UUID) -> str:
+        """The currency KPIs are reported in: the planner owner's currency_code"""
+        def load():
+            currency = db.execute(
+                select(AppUser.currency_code)
+                .join(Planner, Planner.owner_user_id == AppUser.id)
+                .where(Planner.id == planner_id)
+            ).scalar()
+            return currency or FX_BASE_CURRENCY
+        return planner_cache.get_or_compute(planner_id, ("currency",), load)
+
+    @staticmethod
+    def household_currency(db: Session, household_id: uuid.UUID) -> str:
+        """The household owner's currency_code, which household rollups are reported in"""
+        currency = db.execute(
+            select(AppUser.currency_code)
+            .join(Household, Household.owner_user_id == AppUser.id)
+            .where(Household.id == household_id)
+        ).scalar()
+        return currency or FX_BASE_CURRENCY
+
+    @staticmethod
+    def check_currency(currency: Optional[str]) -> None:
+        """Reject an item currency that cannot be converted; raises UnknownCurrencyError"""
+        if currency is not None and not fx_rates.known(currency):
+            raise UnknownCurrencyError(f"No exchange rate for {currency}; add it to {FX_RATES_FILE}")
+
+    @staticmethod
+    def load_file(path: str = FX_RATES_FILE) -> int:
+        """
+        Replace fx_rates with a CSV file of date,currency,rate rows (rate = units of the
+        currency per one FX_BASE_CURRENCY) and reload the cache. Returns the row count.
+        """
+        rates: Dict[Tuple[str, date], Decimal] = {}
+        with open(path, newline="") as handle:
+            for row in csv.DictReader(handle):
+                if row.get("currency") and row.get("rate"):
+                    # A later line for the same currency and date wins
+                    rates[(row["currency"].strip().upper(), date.fromisoformat(row["date"].strip()))] = Decimal(row["rate"].strip())
+        rows = [
+            {"currency_code": currency, "rate_date": rate_date, "rate": rate}
+            for (currency, rate_date), rate in rates.items()
+        ]
+        with engine.begin() as connection:
+            connection.execute(delete(FxRate))
+            if rows:
+                connection.execute(insert(FxRate), rows)
+        fx_rates.reload()
+        return len(rows)
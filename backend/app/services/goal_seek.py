@@ -0,0 +1,395 @@
+from sqlalchemy.orm import Session
+from typing import Callable, Dict, Any, List, Optional, Set, Tuple
+import numpy as np
+import uuid
+
+from .planner_snapshot import PlannerSnapshot, ITEM_TYPES
+from ..schemas.goal_seek import GoalSeekRequest
+from .forecast import ForecastService, HORIZON_MONTHS
+
+# Item types whose costs can be switched off, and the type that can be sold instead
+CUTTABLE_TYPES = ("expense", "bill", "liability")
+BATCH_SIZE = 512
+
+def _linked_on_batch(links: np.ndarray, target_on: np.ndarray) -> np.ndarray:
+    """_linked_on over a batch: target_on is K x targets, the result K x items"""
+    if target_on.shape[1] == 0:
+        return np.ones((target_on.shape[0], len(links)), dtype=bool)
+    return (links < 0)[None, :] | target_on[:, np.maximum(links, 0)]
+
+def _linked_to(links: np.ndarray, targets: np.ndarray) -> np.ndarray:
+    """True where the item is linked to one of the flagged targets"""
+    if len(targets) == 0:
+        return np.zeros(len(links), dtype=bool)
+    return (links >= 0) & targets[np.maximum(links, 0)]
+
+class BatchEvaluator:
+    """
+    Evaluates many candidate change sets against a snapshot at once.
+    A selection is a K x candidates boolean matrix; every selected candidate flips its
+    item's include toggle, and effective status, membership and KPI components are
+    computed for all K rows with the same rules as PlannerSnapshot.
+    """
+
+    def __init__(self, snapshot: PlannerSnapshot, scenario: str, candidates: List[Tuple[str, int]]):
+        self.tables = snapshot.tables
+        self.membership = snapshot.membership(scenario)
+        self.candidates = candidates
+        self._category_matrices: Dict[Tuple[str, Tuple[str, ...]], np.ndarray] = {}
+        self.flips: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for item_type in ITEM_TYPES:
+            columns = [column for column, (candidate_type, _) in enumerate(candidates) if candidate_type == item_type]
+            positions = [candidates[column][1] for column in columns]
+            self.flips[item_type] = (np.array(columns, dtype=np.int64), np.array(positions, dtype=np.int64))
+
+    def included(self, selection: np.ndarray) -> Dict[str, np.ndarray]:
+        count = selection.shape[0]
+        toggles = {}
+        for item_type, table in self.tables.items():
+            batch = np.repeat(table.toggles[None, :], count, axis=0)
+            columns, positions = self.flips[item_type]
+            if len(columns):
+                batch[:, positions] ^= selection[:, columns]
+            toggles[item_type] = batch
+
+        t = self.tables
+        liabilities = toggles["liability"] & _linked_on_batch(t["liability"].link_asset, toggles["asset"])
+        effective = {
+            "asset": toggles["asset"],
+            "income": toggles["income"],
+            "liability": liabilities,
+            "expense": toggles["expense"]
+                & _linked_on_batch(t["expense"].link_asset, toggles["asset"])
+                & _linked_on_batch(t["expense"].link_liab, toggles["liability"]),
+            "bill": toggles["bill"]
+                & _linked_on_batch(t["bill"].link_asset, toggles["asset"])
+                & _linked_on_batch(t["bill"].link_liab, toggles["liability"]),
+        }
+        return {item_type: effective[item_type] & self.membership[item_type][None, :] for item_type in ITEM_TYPES}
+
+    def components(self, included: Dict[str, np.ndarray]) -> Dict[str, np.ndarray]:
+        """Net cash flow and net value per selection row"""
+        t = self.tables
+        income = included["income"] @ t["income"].amounts
+        outgoings = (
+            included["expense"] @ t["expense"].amounts
+            + included["bill"] @ t["bill"].amounts
+            + included["liability"] @ t["liability"].amounts
+        )
+        net_value = included["asset"] @ t["asset"].amounts - included["liability"] @ t["liability"].principal
+        return {"net_cash_flow": income - outgoings, "net_value": net_value}
+
+    def category_reduction(self, included: Dict[str, np.ndarray], baseline: Dict[str, np.ndarray], categories: List[str]) -> np.ndarray:
+        """Monthly amount removed per category (K x categories), including cascaded removals"""
+        reduction = np.zeros((next(iter(included.values())).shape[0], len(categories)), dtype=np.float64)
+        for item_type in ("expense", "bill"):
+            table = self.tables[item_type]
+            key = (item_type, tuple(categories))
+            if key not in self._category_matrices:
+                self._category_matrices[key] = np.array(
+                    [[value == category_id for category_id in categories] for value in table.category_ids], dtype=np.float64
+                ).reshape(len(table.ids), len(categories))
+            removed = (baseline[item_type] & ~included[item_type]) * table.amounts[None, :]
+            reduction += removed @ self._category_matrices[key]
+        return reduction
+
+class GoalSeekService:
+    """
+    Finds the smallest set of cost cuts (expense, bill and liability toggles) or asset
+    sales that reaches a target net cash flow or a minimum closing balance.
+
+    Candidates are scored with one batched single-flip evaluation; their gains are
+    optimistic bounds (cuts overlap through links, sales can re-enable linked costs),
+    so a partial set whose best possible completion misses the target in any forecast
+    month is pruned without evaluation.
+    A greedy pass gives an incumbent, then a branch-and-bound search over increasing
+    set sizes proves or improves it, evaluating surviving leaves in vectorized batches.
+    """
+
+    @staticmethod
+    def solve(
+        snapshot: PlannerSnapshot,
+        scenario: str,
+        forecast_settings: Dict[str, Any],
+        target_net_cash_flow: Optional[float] = None,
+        min_closing_balance: Optional[float] = None,
+        locked: Optional[Set[Tuple[str, str]]] = None,
+        category_caps: Optional[Dict[str, float]] = None,
+        allow_asset_sales: bool = True,
+        max_evaluations: int = 200000,
+        progress: Optional[Callable[[float], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        progress, when given, is called after every batch with the share of the
+        evaluation budget used; an exception it raises aborts the search.
+        """
+        locked = locked or set()
+        category_caps = category_caps or {}
+        by_balance = min_closing_balance is not None
+        target = float(min_closing_balance if by_balance else target_net_cash_flow)
+        starting_cash = forecast_settings["starting_cash"]
+        sale_month = ForecastService.sale_month(forecast_settings, scenario)
+        membership = snapshot.membership(scenario)
+
+        candidates: List[Tuple[str, int]] = []
+        for item_type in CUTTABLE_TYPES:
+            table = snapshot.tables[item_type]
+            for position in np.nonzero(table.toggles & membership[item_type])[0]:
+                if (item_type, table.ids[position]) not in locked:
+                    candidates.append((item_type, int(position)))
+        # Sales only move the balance, and only when the scenario sells within the horizon
+        if allow_asset_sales and by_balance and sale_month:
+            table = snapshot.tables["asset"]
+            for position in np.nonzero(~table.toggles & membership["asset"])[0]:
+                if ("asset", table.ids[position]) not in locked:
+                    candidates.append(("asset", int(position)))
+
+        categories = list(category_caps)
+        caps = np.array([category_caps[category_id] for category_id in categories], dtype=np.float64)
+        evaluations = 0
+
+        def evaluate(evaluator: BatchEvaluator, selection: np.ndarray, baseline_included=None):
+            nonlocal evaluations
+            evaluations += selection.shape[0]
+            if progress is not None:
+                progress(min(evaluations / max_evaluations, 1.0))
+            included = evaluator.included(selection)
+            components = evaluator.components(included)
+            if by_balance:
+                value = ForecastService.balances(
+                    starting_cash, components["net_cash_flow"], components["net_value"], sale_month
+                ).min(axis=1)
+            else:
+                value = components["net_cash_flow"]
+            within_caps = np.ones(selection.shape[0], dtype=bool)
+            if categories and baseline_included is not None:
+                within_caps = (evaluator.category_reduction(included, baseline_included, categories) <= caps + 1e-9).all(axis=1)
+            return value, within_caps, components
+
+        evaluator = BatchEvaluator(snapshot, scenario, candidates)
+        empty = np.zeros((1, len(candidates)), dtype=bool)
+        baseline_included = evaluator.included(empty)
+        baseline_value = float(evaluate(evaluator, empty)[0][0])
+
+        def result(chosen: List[int], value: float, feasible: bool, optimal: bool) -> Dict[str, Any]:
+            return {
+                "feasible": feasible,
+                "optimal": optimal,
+                "baseline_value": baseline_value,
+                "value": value,
+                "changes": [candidates[column] for column in chosen],
+                "evaluations": evaluations,
+            }
+
+        if baseline_value >= target:
+            return result([], baseline_value, True, True)
+        if not candidates:
+            return result([], baseline_value, False, True)
+
+        # Optimistic gains per candidate from one batched evaluation of every single flip:
+        # monthly cash (cuts) and one-off net value (removed principal, sale proceeds)
+        _, _, single = evaluate(evaluator, np.eye(len(candidates), dtype=bool))
+        _, _, base = evaluate(evaluator, empty)
+        cash_gain = np.maximum(single["net_cash_flow"] - base["net_cash_flow"][0], 0)
+        value_gain = np.maximum(single["net_value"] - base["net_value"][0], 0)
+        for column, (item_type, position) in enumerate(candidates):
+            if item_type == "asset":
+                value_gain[column] = snapshot.tables["asset"].amounts[position]
+
+        # The target holds when every checkpoint's gain covers its shortfall; a checkpoint
+        # gains cash_weight * cash + value_weight * value (one per forecast month for balances)
+        if by_balance:
+            cash_weights = np.arange(1, HORIZON_MONTHS + 1, dtype=np.float64)
+            value_weights = (cash_weights >= sale_month).astype(np.float64) if sale_month else np.zeros(HORIZON_MONTHS)
+            shortfall = target - ForecastService.balances(
+                starting_cash, base["net_cash_flow"][0], base["net_value"][0], sale_month
+            )
+        else:
+            cash_weights = np.ones(1)
+            value_weights = np.zeros(1)
+            shortfall = np.array([target - baseline_value])
+        shortfall = shortfall - 1e-9
+        scores = cash_gain * cash_weights.max() + value_gain * value_weights.max()
+
+        # A cut that gains nothing alone still matters when a sale re-enables it through its
+        # links (asset, or a liability on that asset). Its zero gain remains a valid bound: the
+        # cut can only take back a cost the sale added, which the sale's gain already leaves out.
+        t = snapshot.tables
+        sold = np.zeros(len(t["asset"].ids), dtype=bool)
+        for item_type, position in candidates:
+            if item_type == "asset":
+                sold[position] = True
+        revived = {"liability": _linked_to(t["liability"].link_asset, sold)}
+        for item_type in ("expense", "bill"):
+            revived[item_type] = _linked_to(t[item_type].link_asset, sold) | _linked_to(t[item_type].link_liab, revived["liability"])
+        useful = [
+            column for column in np.argsort(-scores, kind="stable")
+            if scores[column] > 0 or (candidates[column][0] != "asset" and revived[candidates[column][0]][candidates[column][1]])
+        ]
+        candidates = [candidates[column] for column in useful]
+        cash_gain = cash_gain[useful]
+        value_gain = value_gain[useful]
+        evaluator = BatchEvaluator(snapshot, scenario, candidates)
+        count = len(candidates)
+
+        # top_cash[start, r]: sum of the r largest cash gains among candidates[start:] (same for value)
+        top_cash = np.zeros((count + 2, count + 1))
+        top_value = np.zeros((count + 2, count + 1))
+        for start in range(count):
+            top_cash[start, 1:count - start + 1] = np.cumsum(np.sort(cash_gain[start:])[::-1])
+            top_cash[start, count - start + 1:] = top_cash[start, count - start]
+            top_value[start, 1:count - start + 1] = np.cumsum(np.sort(value_gain[start:])[::-1])
+            top_value[start, count - start + 1:] = top_value[start, count - start]
+
+        def reachable(cash: np.ndarray, value: np.ndarray) -> np.ndarray:
+            """Which optimistic (cash, value) gains cover the shortfall at every checkpoint"""
+            gains = cash[:, None] * cash_weights[None, :] + value[:, None] * value_weights[None, :]
+            return (gains >= shortfall[None, :]).all(axis=1)
+
+        if not reachable(np.array([top_cash[0, count]]), np.array([top_value[0, count]]))[0]:
+            return result([], baseline_value, False, True)
+
+        # Greedy incumbent: repeatedly add the candidate that raises the value most
+        incumbent: Optional[Tuple[List[int], float]] = None
+        chosen: List[int] = []
+        current_value = baseline_value
+        while len(chosen) < count and evaluations < max_evaluations:
+            remaining = [column for column in range(count) if column not in chosen]
+            selection = np.zeros((len(remaining), count), dtype=bool)
+            selection[:, chosen] = True
+            selection[np.arange(len(remaining)), remaining] = True
+            values, within_caps, _ = evaluate(evaluator, selection, baseline_included)
+            values = np.where(within_caps, values, -np.inf)
+            best = int(np.argmax(values))
+            if values[best] <= current_value:
+                break
+            chosen.append(remaining[best])
+            current_value = float(values[best])
+            if current_value >= target:
+                incumbent = (sorted(chosen), current_value)
+                break
+
+        # Branch and bound over set sizes smaller than the incumbent. A branch that picks
+        # column c is kept only if its gains plus the best r - 1 gains after c can still
+        # cover every checkpoint; surviving complete sets are evaluated in batches.
+        limit = len(incumbent[0]) - 1 if incumbent else count
+        exhausted = True
+
+        for size in range(1, limit + 1):
+            if not reachable(np.array([top_cash[0, size]]), np.array([top_value[0, size]]))[0]:
+                continue
+            found: Optional[Tuple[List[int], float]] = None
+            pending: List[Tuple[int, ...]] = []
+
+            def flush():
+                nonlocal found
+                if not pending:
+                    return
+                selection = np.zeros((len(pending), count), dtype=bool)
+                for row, columns in enumerate(pending):
+                    selection[row, list(columns)] = True
+                values, within_caps, _ = evaluate(evaluator, selection, baseline_included)
+                values = np.where(within_caps, values, -np.inf)
+                best = int(np.argmax(values))
+                if values[best] >= target and (found is None or values[best] > found[1]):
+                    found = (list(pending[best]), float(values[best]))
+                pending.clear()
+
+            stack: List[Tuple[Tuple[int, ...], float, float]] = [((), 0.0, 0.0)]
+            while stack and found is None:
+                if evaluations + len(pending) >= max_evaluations:
+                    exhausted = False
+                    break
+                columns, cash, value = stack.pop()
+                missing = size - len(columns)
+                if missing == 0:
+                    pending.append(columns)
+                    if len(pending) >= BATCH_SIZE:
+                        flush()
+                    continue
+                start = columns[-1] + 1 if columns else 0
+                branch = np.arange(start, count - missing + 1)
+                branch_cash = cash + cash_gain[branch]
+                branch_value = value + value_gain[branch]
+                keep = reachable(
+                    branch_cash + top_cash[branch + 1, missing - 1],
+                    branch_value + top_value[branch + 1, missing - 1],
+                )
+                # Highest-scoring branches are popped first
+                for column, column_cash, column_value in reversed(list(zip(
+                    branch[keep].tolist(), branch_cash[keep].tolist(), branch_value[keep].tolist()
+                ))):
+                    stack.append((columns + (column,), column_cash, column_value))
+            flush()
+
+            # Every smaller size was searched exhaustively, so a set found here is minimal
+            if found is not None:
+                return result(found[0], found[1], True, True)
+            if not exhausted:
+                break
+
+        if incumbent:
+            return result(incumbent[0], incumbent[1], True, exhausted)
+        return result([], baseline_value, False, exhausted)
+
+    @staticmethod
+    def run(
+        db: Session,
+        request: GoalSeekRequest,
+        progress: Optional[Callable[[float], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Solve a goal-seek request against the planner's cached snapshot and return the
+        chosen changes with the resulting totals. Nothing is written. Raises ValueError
+        unless exactly one target is given.
+        """
+        if (request.target_net_cash_flow is None) == (request.min_closing_balance is None):
+            raise ValueError("Provide exactly one of target_net_cash_flow or min_closing_balance")
+        
+        snapshot = PlannerSnapshot.cached(db, request.planner_id)
+        solution = GoalSeekService.solve(
+            snapshot,
+            request.scenario,
+            ForecastService.settings(db, request.planner_id),
+            target_net_cash_flow=float(request.target_net_cash_flow) if request.target_net_cash_flow is not None else None,
+            min_closing_balance=float(request.min_closing_balance) if request.min_closing_balance is not None else None,
+            locked={(item.item_type, item.item_id.hex) for item in request.locked_items},
+            category_caps={category_id.hex: float(cap) for category_id, cap in request.category_caps.items()},
+            allow_asset_sales=request.allow_asset_sales,
+            max_evaluations=request.max_evaluations,
+            progress=progress,
+        )
+        
+        # Apply the chosen changes to a copy so the response carries the resulting totals
+        sandbox = snapshot.copy()
+        changes = []
+        for item_type, position in solution["changes"]:
+            table = sandbox.tables[item_type]
+            include_toggle = "off" if table.toggles[position] else "on"
+            sandbox.apply_override(item_type, table.ids[position], include_toggle=include_toggle)
+            changes.append({
+                "item_type": item_type,
+                "id": str(uuid.UUID(table.ids[position])),
+                "name": table.names[position],
+                "include_toggle": include_toggle,
+            })
+        
+        baseline_totals = snapshot.totals(request.scenario)
+        totals = sandbox.totals(request.scenario)
+        return {
+            "planner_id": str(request.planner_id),
+            "scenario": request.scenario,
+            "target": (
+                {"net_cash_flow": float(request.target_net_cash_flow)} if request.target_net_cash_flow is not None
+                else {"min_closing_balance": float(request.min_closing_balance)}
+            ),
+            "feasible": solution["feasible"],
+            "optimal": solution["optimal"],
+            "baseline_value": solution["baseline_value"],
+            "value": solution["value"],
+            "changes": changes,
+            "baseline_totals": baseline_totals,
+            "totals": totals,
+            "delta": {key: totals[key] - baseline_totals[key] for key in totals},
+            "evaluations": solution["evaluations"]
+        }
@@ -0,0 +1,324 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select, insert, update, delete, or_
+from datetime import timedelta
+from pydantic import BaseModel
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple, Type
+import asyncio
+import json
+import logging
+import numpy as np
+import os
+import threading
+import time
+import uuid
+
+from ..database.connection import engine, planner_session, shard_router
+from ..models import Job
+from ..models.base import utcnow
+from ..schemas.goal_seek import GoalSeekParams, GoalSeekRequest
+from ..schemas.job import ForecastJobParams, SensitivityJobParams, ScenarioTotalsJobParams
+from .effective_status import EffectiveStatusService
+from .forecast import ForecastService
+from .goal_seek import GoalSeekService
+from .metrics import metrics
+from .planner_snapshot import PlannerSnapshot
+from .sensitivity import SensitivityService
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))  # Jobs run at once per process; 0 leaves them to another process
+JOB_POLL_SECONDS = float(os.getenv("JOB_POLL_SECONDS", "2"))  # Picks up jobs submitted by other processes
+JOB_RETENTION = timedelta(days=float(os.getenv("JOB_RETENTION_DAYS", "7")))
+JOB_HEARTBEAT_SECONDS = float(os.getenv("JOB_HEARTBEAT_SECONDS", "10"))  # How often workers stamp their running jobs
+JOB_STALE_SECONDS = float(os.getenv("JOB_STALE_SECONDS", "60"))  # Running jobs unstamped for longer are queued again
+PROGRESS_INTERVAL = 0.5  # Seconds between progress writes of a running job
+ERROR_BACKOFF_MAX = 30.0  # Longest pause of a worker after consecutive database errors
+
+logger = logging.getLogger(__name__)
+
+class JobCancelled(Exception):
+    """Raised inside a running job once its cancellation was requested"""
+
+class JobContext:
+    """Handed to a running job: stores its progress and stops it when it was cancelled"""
+
+    def __init__(self, job_id: uuid.UUID):
+        self.job_id = job_id
+        self._reported_at = 0.0
+
+    def progress(self, fraction: float, message: Optional[str] = None, force: bool = False) -> None:
+        """
+        Record progress (0..1), at most every PROGRESS_INTERVAL unless forced; raises
+        JobCancelled when a cancel was requested, so long loops stop at the next report
+        """
+        now = time.monotonic()
+        if not force and now - self._reported_at < PROGRESS_INTERVAL:
+            return
+        self._reported_at = now
+        values: Dict[str, Any] = {"progress": float(fraction)}
+        if message is not None:
+            values["message"] = message
+        with engine.begin() as connection:
+            cancel_requested = connection.execute(
+                update(Job).where(Job.id == self.job_id).values(**values).returning(Job.cancel_requested)
+            ).scalar()
+        if cancel_requested:
+            raise JobCancelled()
+
+class JobKind(NamedTuple):
+    params: Type[BaseModel]
+    run: Callable[[Session, uuid.UUID, Any, JobContext], Any]
+
+def _goal_seek(db: Session, planner_id: uuid.UUID, params: GoalSeekParams, context: JobContext) -> Any:
+    request = GoalSeekRequest(planner_id=planner_id, **params.model_dump())
+    return GoalSeekService.run(db, request, progress=context.progress)
+
+def _sensitivity(db: Session, planner_id: uuid.UUID, params: SensitivityJobParams, context: JobContext) -> Any:
+    return SensitivityService.analyze(
+        PlannerSnapshot.cached(db, planner_id),
+        params.scenario,
+        ForecastService.settings(db, planner_id),
+        percent=params.percent,
+        steps=params.steps,
+        limit=params.limit,
+    )
+
+# Job kind -> parameter schema and the computation; results are what the matching KPI endpoint returns
+JOB_KINDS: Dict[str, JobKind] = {
+    "goal_seek": JobKind(GoalSeekParams, _goal_seek),
+    "sensitivity": JobKind(SensitivityJobParams, _sensitivity),
+    "forecast": JobKind(ForecastJobParams, lambda db, planner_id, params, context: ForecastService.forecast(db, planner_id, params.scenario)),
+    "scenario_totals": JobKind(ScenarioTotalsJobParams, lambda db, planner_id, params, context: EffectiveStatusService.calculate_scenario_totals(db, planner_id)),
+}
+
+def _json_default(value: Any) -> Any:
+    return value.item() if isinstance(value, np.generic) else str(value)
+
+def _as_dict(row: Any) -> Dict[str, Any]:
+    return {
+        "id": str(row.id),
+        "planner_id": str(row.planner_id),
+        "kind": row.kind,
+        "status": row.status,
+        "progress": row.progress,
+        "message": row.message,
+        "cancel_requested": bool(row.cancel_requested),
+        "result": json.loads(row.result) if row.result is not None else None,
+        "error": row.error,
+        "created_at": row.created_at,
+        "started_at": row.started_at,
+        "finished_at": row.finished_at,
+    }
+
+class JobQueue:
+    """
+    In-process asyncio queue for long computations, backed by the jobs table.
+
+    Workers claim the oldest queued row with one UPDATE ... RETURNING and run the job
+    in a thread, so request workers and the event loop stay free; JOB_WORKERS bounds
+    how many run at once. A submit wakes the workers; they also poll the table every
+    JOB_POLL_SECONDS for jobs queued by other processes. A claimed job carries its
+    queue's worker_id, and the queue stamps heartbeat_at on its running jobs every
+    JOB_HEARTBEAT_SECONDS; only running jobs unstamped for JOB_STALE_SECONDS (their
+    process is gone) are queued again, so several processes can run workers side by
+    side. A job only finishes if it is still claimed by the queue that ran it. A
+    database error in a worker is logged and counted, the worker backs off and
+    carries on, and a job it had claimed is marked failed as soon as the database
+    accepts the update.
+    """
+
+    def __init__(self, workers: int):
+        self.workers = workers
+        self.worker_id = uuid.uuid4().hex  # Owner stamp of the jobs this queue claims
+        self._tasks: List[asyncio.Task] = []
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._wake: Optional[asyncio.Event] = None
+        self._failures: Dict[uuid.UUID, Tuple[str, str]] = {}  # Claimed jobs left running by an error -> (kind, error)
+        self._failures_lock = threading.Lock()
+
+    async def start(self) -> None:
+        if self.workers <= 0:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        await asyncio.to_thread(self._requeue_stale)
+        self._tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._heartbeat()))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._loop = None
+
+    def _notify(self) -> None:
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wake.set)
+
+    @staticmethod
+    def _requeue_stale() -> int:
+        """Queue running jobs again whose worker stopped stamping them; returns how many"""
+        cutoff = utcnow() - timedelta(seconds=JOB_STALE_SECONDS)
+        with engine.begin() as connection:
+            requeued = connection.execute(
+                update(Job).where(Job.status == "running", or_(Job.heartbeat_at.is_(None), Job.heartbeat_at < cutoff))
+                .values(status="queued", started_at=None, progress=0.0, worker_id=None, heartbeat_at=None)
+            ).rowcount
+        if requeued:
+            metrics.increment("jobs_requeued", requeued)
+            logger.warning("Queued %d stale running jobs again", requeued)
+        return requeued
+
+    def _beat(self) -> None:
+        with engine.begin() as connection:
+            connection.execute(
+                update(Job).where(Job.worker_id == self.worker_id, Job.status == "running")
+                .values(heartbeat_at=utcnow())
+            )
+
+    async def _heartbeat(self) -> None:
+        while True:
+            await asyncio.sleep(JOB_HEARTBEAT_SECONDS)
+            try:
+                await asyncio.to_thread(self._beat)
+                if await asyncio.to_thread(self._requeue_stale):
+                    self._wake.set()
+            except Exception:
+                logger.exception("Job heartbeat error")
+                metrics.increment("job_worker_errors")
+
+    async def _worker(self) -> None:
+        backoff = 0.0
+        while True:
+            job = None
+            try:
+                await asyncio.to_thread(self._retry_failures)
+                job = await asyncio.to_thread(self._claim)
+                if job is None:
+                    try:
+                        await asyncio.wait_for(self._wake.wait(), JOB_POLL_SECONDS)
+                    except asyncio.TimeoutError:
+                        pass
+                    self._wake.clear()
+                else:
+                    await asyncio.to_thread(self._run, job)
+                backoff = 0.0
+            except Exception as e:
+                # A worker must outlive database errors ("database is locked" under write load)
+                logger.exception("Job worker error%s", f" on job {job.id}" if job is not None else "")
+                metrics.increment("job_worker_errors")
+                if job is not None:
+                    with self._failures_lock:
+                        self._failures[job.id] = (job.kind, f"Job could not be completed: {e}")
+                backoff = min(max(backoff * 2, 0.5), ERROR_BACKOFF_MAX)
+                await asyncio.sleep(backoff)
+
+    def _retry_failures(self) -> None:
+        """Mark jobs failed whose worker hit a database error; kept until the update succeeds"""
+        with self._failures_lock:
+            failures = list(self._failures.items())
+        for job_id, (kind, error) in failures:
+            with engine.begin() as connection:
+                connection.execute(
+                    update(Job).where(Job.id == job_id, Job.worker_id == self.worker_id, Job.status == "running")
+                    .values(status="failed", error=error, finished_at=utcnow())
+                )
+            # Several workers may retry the same failure; only the one that removes it counts it
+            with self._failures_lock:
+                retried = self._failures.pop(job_id, None) is not None
+            if retried:
+                metrics.increment("jobs_finished", kind=kind, status="failed")
+
+    def _claim(self) -> Optional[Any]:
+        oldest = select(Job.id).where(Job.status == "queued").order_by(Job.created_at).limit(1).scalar_subquery()
+        now = utcnow()
+        with engine.begin() as connection:
+            return connection.execute(
+                update(Job).where(Job.id == oldest, Job.status == "queued")
+                .values(status="running", started_at=now, worker_id=self.worker_id, heartbeat_at=now)
+                .returning(Job.id, Job.planner_id, Job.kind, Job.params)
+            ).first()
+
+    def _run(self, job: Any) -> None:
+        context = JobContext(job.id)
+        kind = JOB_KINDS[job.kind]
+        db = None
+        try:
+            db = planner_session(job.planner_id)
+            result = kind.run(db, job.planner_id, kind.params.model_validate_json(job.params), context)
+            # A cancel that arrived while a job without progress reports ran still wins
+            context.progress(1.0, force=True)
+            values = {"status": "succeeded", "result": json.dumps(result, default=_json_default)}
+        except JobCancelled:
+            values = {"status": "cancelled"}
+        except Exception as e:
+            values = {"status": "failed", "error": str(e)}
+        finally:
+            if db is not None:
+                db.close()
+        # A job queued again as stale belongs to whoever claimed it since
+        with engine.begin() as connection:
+            finished = connection.execute(
+                update(Job).where(Job.id == job.id, Job.worker_id == self.worker_id, Job.status == "running")
+                .values(**values, finished_at=utcnow())
+            ).rowcount
+        if finished:
+            metrics.increment("jobs_finished", kind=job.kind, status=values["status"])
+
+    def submit(self, planner_id: uuid.UUID, kind: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Queue a job and return it; raises ValueError for an unknown kind, invalid params
+        (pydantic's ValidationError is a ValueError) or, with sharding, a planner of no
+        known household. Finished jobs older than JOB_RETENTION_DAYS are deleted on the way.
+        """
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown job kind {kind}; expected one of {', '.join(JOB_KINDS)}")
+        validated = JOB_KINDS[kind].params.model_validate(params)
+        if shard_router is not None and shard_router.household_for_planner(planner_id) is None:
+            raise ValueError(f"Unknown planner {planner_id}")
+        job_id = uuid.uuid4()
+        with engine.begin() as connection:
+            connection.execute(delete(Job).where(
+                Job.status.in_(("succeeded", "failed", "cancelled")),
+                Job.finished_at < utcnow() - JOB_RETENTION,
+            ))
+            connection.execute(insert(Job).values(
+                id=job_id, planner_id=planner_id, kind=kind, status="queued",
+                params=validated.model_dump_json(), progress=0.0, cancel_requested=False,
+            ))
+        metrics.increment("jobs_submitted", kind=kind)
+        self._notify()
+        return self.get(job_id)
+
+    @staticmethod
+    def get(job_id: uuid.UUID) -> Optional[Dict[str, Any]]:
+        with engine.connect() as connection:
+            row = connection.execute(select(*Job.__table__.columns).where(Job.id == job_id)).first()
+        return _as_dict(row) if row is not None else None
+
+    @staticmethod
+    def for_planner(planner_id: uuid.UUID, limit: int = 50) -> List[Dict[str, Any]]:
+        """A planner's jobs, newest first"""
+        with engine.connect() as connection:
+            rows = connection.execute(
+                select(*Job.__table__.columns).where(Job.planner_id == planner_id)
+                .order_by(Job.created_at.desc()).limit(limit)
+            ).all()
+        return [_as_dict(row) for row in rows]
+
+    @staticmethod
+    def cancel(job_id: uuid.UUID) -> Optional[Dict[str, Any]]:
+        """
+        Cancel a job: a queued one at once, a running one at its next progress report.
+        Finished jobs are left as they are.
+        """
+        with engine.begin() as connection:
+            connection.execute(
+                update(Job).where(Job.id == job_id, Job.status == "queued")
+                .values(status="cancelled", cancel_requested=True, finished_at=utcnow())
+            )
+            connection.execute(
+                update(Job).where(Job.id == job_id, Job.status == "running").values(cancel_requested=True)
+            )
+        return JobQueue.get(job_id)
+
+job_queue = JobQueue(JOB_WORKERS)
@@ -0,0 +1,267 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select, insert, delete
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import os
+import threading
+import time
+import uuid
+
+from ..database.connection import planner_session
+from ..models.kpi_history import KpiHistory
+from .metrics import metrics
+from .planner_snapshot import PlannerSnapshot
+
+PERIOD_SECONDS = int(os.getenv("KPI_HISTORY_PERIOD_SECONDS", "3600"))  # 0 disables recording
+RECORD_DELAY = float(os.getenv("KPI_HISTORY_DELAY_SECONDS", "5"))  # From a write to the recording it schedules
+RAW_DAYS = float(os.getenv("KPI_HISTORY_RAW_DAYS", "30"))  # Older points are compacted to one per day
+RETENTION_DAYS = float(os.getenv("KPI_HISTORY_RETENTION_DAYS", "730"))  # Older points are dropped
+DAY_SECONDS = 86400
+KPI_COLUMNS = ("net_cash_flow", "net_value")
+
+def _planner_key(planner_id: Any) -> str:
+    return planner_id.hex if isinstance(planner_id, uuid.UUID) else str(planner_id).replace('-', '')
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Indices of the points Largest-Triangle-Three-Buckets keeps to draw y over x with threshold points"""
+    count = len(x)
+    if threshold >= count or threshold < 3:
+        return np.arange(count)
+
+    every = (count - 2) / (threshold - 2)
+    selected = [0]
+    anchor = 0
+    for bucket in range(threshold - 2):
+        start = int(bucket * every) + 1
+        end = int((bucket + 1) * every) + 1
+        next_end = min(int((bucket + 2) * every) + 1, count)
+        average_x = x[end:next_end].mean()
+        average_y = y[end:next_end].mean()
+        area = np.abs(
+            (x[anchor] - average_x) * (y[start:end] - y[anchor])
+            - (x[anchor] - x[start:end]) * (average_y - y[anchor])
+        )
+        anchor = start + int(area.argmax())
+        selected.append(anchor)
+    selected.append(count - 1)
+    return np.array(selected)
+
+class KpiHistoryService:
+    """
+    Time series of net_cash_flow and net_value per planner and scenario.
+
+    Writes that can change the totals schedule a recording instead of making it: a
+    background thread records the planner KPI_HISTORY_DELAY_SECONDS after the first
+    write, so a burst of writes costs one snapshot load and none of it runs on the
+    request. Each recording stores the totals of the current period
+    (KPI_HISTORY_PERIOD_SECONDS), overwriting the period's row, so there is at most
+    one row per period. Points older than KPI_HISTORY_RAW_DAYS are compacted to the
+    last one per day, and points older than KPI_HISTORY_RETENTION_DAYS are deleted,
+    at most once a day per planner.
+    """
+
+    _lock = threading.Lock()
+    _recorded: "OrderedDict[str, Dict[str, Tuple[int, float, float]]]" = OrderedDict()
+    _compacted: Dict[str, float] = {}
+    _pending: Dict[str, Tuple[uuid.UUID, float]] = {}  # Planner key -> (planner id, monotonic due time)
+    _wakeup = threading.Event()
+    _thread: Optional[threading.Thread] = None
+    max_planners = 4096
+
+    @staticmethod
+    def schedule(planner_id: uuid.UUID) -> None:
+        """Record the planner's KPIs shortly; call after a write committed"""
+        if PERIOD_SECONDS <= 0:
+            return
+        with KpiHistoryService._lock:
+            # Later writes within the delay join the recording the first one scheduled
+            if _planner_key(planner_id) in KpiHistoryService._pending:
+                return
+            KpiHistoryService._pending[_planner_key(planner_id)] = (planner_id, time.monotonic() + RECORD_DELAY)
+            if KpiHistoryService._thread is None or not KpiHistoryService._thread.is_alive():
+                KpiHistoryService._thread = threading.Thread(
+                    target=KpiHistoryService._run, name="kpi-history", daemon=True
+                )
+                KpiHistoryService._thread.start()
+        KpiHistoryService._wakeup.set()
+
+    @staticmethod
+    def _run() -> None:
+        while True:
+            with KpiHistoryService._lock:
+                due = min((due for _, due in KpiHistoryService._pending.values()), default=None)
+            KpiHistoryService._wakeup.wait(None if due is None else max(due - time.monotonic(), 0))
+            KpiHistoryService._wakeup.clear()
+            KpiHistoryService.flush(due_only=True)
+
+    @staticmethod
+    def flush(due_only: bool = False) -> None:
+        """Record the scheduled planners now (only those whose delay has passed with due_only)"""
+        now = time.monotonic()
+        with KpiHistoryService._lock:
+            keys = [key for key, (_, due) in KpiHistoryService._pending.items() if not due_only or due <= now]
+            planner_ids = [KpiHistoryService._pending.pop(key)[0] for key in keys]
+        for planner_id in planner_ids:
+            try:
+                db = planner_session(planner_id)
+            except ValueError:
+                metrics.increment("kpi_history_errors")
+                continue
+            try:
+                KpiHistoryService.record(db, planner_id)
+            finally:
+                db.close()
+
+    @staticmethod
+    def clear() -> None:
+        """Forget scheduled recordings and the points already recorded"""
+        with KpiHistoryService._lock:
+            KpiHistoryService._pending.clear()
+            KpiHistoryService._recorded.clear()
+            KpiHistoryService._compacted.clear()
+
+    @staticmethod
+    def record(db: Session, planner_id: uuid.UUID, now: Optional[float] = None) -> None:
+        """Store the planner's current KPIs for every scenario"""
+        if PERIOD_SECONDS <= 0:
+            return
+        now = time.time() if now is None else now
+        period_start = int(now // PERIOD_SECONDS) * PERIOD_SECONDS
+        planner_key = _planner_key(planner_id)
+        with KpiHistoryService._lock:
+            recorded = dict(KpiHistoryService._recorded.get(planner_key, {}))
+            compact = now - KpiHistoryService._compacted.get(planner_key, 0) > DAY_SECONDS
+        try:
+            snapshot = PlannerSnapshot.cached(db, planner_id)
+            rows = []
+            for scenario in ["ALL", *snapshot.scenarios]:
+                totals = snapshot.totals(scenario)
+                point = (period_start, totals["net_cash_flow"], totals["net_value"])
+                # Writes that leave the totals unchanged (names, notes, categories) store nothing
+                if recorded.get(scenario) != point:
+                    rows.append({
+                        "planner_id": planner_id, "scenario": scenario, "period_start": period_start,
+                        "net_cash_flow": point[1], "net_value": point[2],
+                    })
+                    recorded[scenario] = point
+            if rows:
+                KpiHistoryService._upsert(db, rows)
+            if compact:
+                KpiHistoryService.compact(db, planner_id, now)
+            if rows or compact:
+                db.commit()
+        except Exception:
+            db.rollback()
+            with KpiHistoryService._lock:
+                KpiHistoryService._recorded.pop(planner_key, None)
+            metrics.increment("kpi_history_errors")
+            return
+
+        with KpiHistoryService._lock:
+            KpiHistoryService._recorded[planner_key] = recorded
+            KpiHistoryService._recorded.move_to_end(planner_key)
+            if compact:
+                KpiHistoryService._compacted[planner_key] = now
+            while len(KpiHistoryService._recorded) > KpiHistoryService.max_planners:
+                evicted, _ = KpiHistoryService._recorded.popitem(last=False)
+                KpiHistoryService._compacted.pop(evicted, None)
+        metrics.increment("kpi_history_points", len(rows))
+
+    @staticmethod
+    def _upsert(db: Session, rows: List[Dict[str, Any]]) -> None:
+        dialect = db.get_bind().dialect.name
+        if dialect in ("sqlite", "postgresql"):
+            if dialect == "sqlite":
+                from sqlalchemy.dialects.sqlite import insert as dialect_insert
+            else:
+                from sqlalchemy.dialects.postgresql import insert as dialect_insert
+            stmt = dialect_insert(KpiHistory).values(rows)
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[KpiHistory.planner_id, KpiHistory.scenario, KpiHistory.period_start],
+                set_={column: stmt.excluded[column] for column in KPI_COLUMNS},
+            ))
+            return
+        for row in rows:
+            db.execute(delete(KpiHistory).where(
+                KpiHistory.planner_id == row["planner_id"],
+                KpiHistory.scenario == row["scenario"],
+                KpiHistory.period_start == row["period_start"],
+            ))
+        db.execute(insert(KpiHistory), rows)
+
+    @staticmethod
+    def compact(db: Session, planner_id: uuid.UUID, now: float) -> None:
+        """Drop points past retention and keep only the last point per day past RAW_DAYS; the caller commits"""
+        retention_cutoff = int(now - RETENTION_DAYS * DAY_SECONDS)
+        raw_cutoff = int(now - RAW_DAYS * DAY_SECONDS)
+        db.execute(delete(KpiHistory).where(
+            KpiHistory.planner_id == planner_id, KpiHistory.period_start < retention_cutoff
+        ))
+        rows = db.execute(
+            select(KpiHistory.scenario, KpiHistory.period_start)
+            .where(KpiHistory.planner_id == planner_id, KpiHistory.period_start < raw_cutoff)
+            .order_by(KpiHistory.scenario, KpiHistory.period_start)
+        ).all()
+
+        superseded: Dict[str, List[int]] = {}
+        for current, following in zip(rows, rows[1:]):
+            if current.scenario == following.scenario \
+                    and current.period_start // DAY_SECONDS == following.period_start // DAY_SECONDS:
+                superseded.setdefault(current.scenario, []).append(current.period_start)
+        for scenario, periods in superseded.items():
+            db.execute(delete(KpiHistory).where(
+                KpiHistory.planner_id == planner_id,
+                KpiHistory.scenario == scenario,
+                KpiHistory.period_start.in_(periods),
+            ))
+
+    @staticmethod
+    def history(
+        db: Session,
+        planner_id: uuid.UUID,
+        scenario: str,
+        start: float,
+        end: float,
+        points: int,
+        method: str = "lttb",
+    ) -> Dict[str, List[List[float]]]:
+        """
+        [[unix seconds, value], ...] per KPI between start and end, downsampled to at most
+        points: 'lttb' keeps the visually significant raw points of each series, 'bucket'
+        averages equal time buckets (stamped with the bucket start).
+        """
+        rows = db.execute(
+            select(KpiHistory.period_start, KpiHistory.net_cash_flow, KpiHistory.net_value)
+            .where(
+                KpiHistory.planner_id == planner_id,
+                KpiHistory.scenario == scenario,
+                KpiHistory.period_start >= int(start),
+                KpiHistory.period_start <= int(end),
+            )
+            .order_by(KpiHistory.period_start)
+        ).all()
+        if not rows:
+            return {column: [] for column in KPI_COLUMNS}
+
+        x = np.array([row[0] for row in rows], dtype=np.float64)
+        series = {column: np.array([row[i + 1] for row in rows], dtype=np.float64) for i, column in enumerate(KPI_COLUMNS)}
+
+        if method == "bucket" and len(x) > points:
+            width = (end - start) / points
+            buckets = np.minimum(((x - start) // width).astype(np.int64), points - 1)
+            counts = np.bincount(buckets, minlength=points)
+            filled = np.nonzero(counts)[0]
+            stamps = start + filled * width
+            return {
+                column: [
+                    [float(stamp), float(value)]
+                    for stamp, value in zip(stamps, (np.bincount(buckets, weights=y, minlength=points) / np.maximum(counts, 1))[filled])
+                ]
+                for column, y in series.items()
+            }
+
+        return {
+            column: [[float(x[index]), float(y[index])] for index in lttb(x, y, points)]
+            for column, y in series.items()
+        }
@@ -0,0 +1,40 @@
+from collections import defaultdict
+from typing import Dict, Any, Tuple
+import threading
+
+class MetricsRegistry:
+    """In-process registry of counters and timing summaries exposed on /metrics"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, Tuple], float] = defaultdict(float)
+
+    @staticmethod
+    def _key(name: str, labels: Dict[str, Any]) -> Tuple[str, Tuple]:
+        return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+    def increment(self, name: str, value: float = 1, **labels) -> None:
+        """Add value to the counter identified by name and labels"""
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] += value
+
+    def get(self, name: str, **labels) -> float:
+        """Read a single counter value (0 when it was never incremented)"""
+        with self._lock:
+            return self._counters.get(self._key(name, labels), 0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return all counters grouped by metric name"""
+        grouped: Dict[str, list] = defaultdict(list)
+        with self._lock:
+            items = list(self._counters.items())
+        for (name, labels), value in items:
+            grouped[name].append({"labels": dict(labels), "value": value})
+        return dict(grouped)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+
+metrics = MetricsRegistry()
@@ -0,0 +1,34 @@
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Any
+
+# Money is summed in integer cents (the generated *_cents columns, see models.base.cents_column)
+# and only converted to floats for the API
+CENTS_PER_UNIT = 100
+
+def to_cents(value: Any) -> int:
+    """
+    Amount (Decimal, float, int or str) in integer cents, rounded half away from zero
+    like SQL ROUND. Floats go through their shortest repr, so 0.29 is 29 cents.
+    """
+    if value is None:
+        return 0
+    if isinstance(value, int):
+        return value * CENTS_PER_UNIT
+    return int((Decimal(str(value)) * CENTS_PER_UNIT).to_integral_value(ROUND_HALF_UP))
+
+def from_cents(cents: Any) -> float:
+    """Cents to the nearest float amount; int / int is correctly rounded"""
+    return int(cents) / CENTS_PER_UNIT
+
+def to_decimal(cents: int) -> Decimal:
+    """Cents as an exact two-place Decimal for Numeric(14, 2) columns"""
+    return Decimal(int(cents)).scaleb(-2)
+
+def divide_cents(cents: int, divisor: int) -> int:
+    """cents / divisor rounded half away from zero, without leaving integer arithmetic"""
+    if divisor <= 0:
+        return 0
+    quotient, remainder = divmod(abs(cents), divisor)
+    if 2 * remainder >= divisor:
+        quotient += 1
+    return quotient if cents >= 0 else -quotient
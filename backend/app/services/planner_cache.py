@@ -0,0 +1,153 @@
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+import asyncio
+import os
+import threading
+import time
+import uuid
+
+from .metrics import metrics
+
+# Longest a caller waits for another's computation before running its own
+SINGLE_FLIGHT_TIMEOUT = float(os.getenv("SINGLE_FLIGHT_TIMEOUT", "30"))
+
+class _Flight:
+    """A computation in progress that concurrent callers wait on"""
+
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+def _kind(key: Hashable) -> Any:
+    return key[0] if isinstance(key, tuple) else key
+
+def _on_event_loop() -> bool:
+    """Whether the caller runs on an event loop thread (an async def route), which must not block"""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+    return True
+
+class PlannerCache:
+    """
+    Per-planner cache of derived data (snapshots, KPI results).
+
+    Entries are dropped as soon as a write path in this process calls invalidate()
+    for the planner; the TTL bounds staleness for writes made by other workers.
+    Computations are single-flight: concurrent callers asking for the same planner
+    and key wait for the first one and share its result (see coalesce).
+    """
+
+    def __init__(self, ttl_seconds: float = 5.0, max_planners: int = 256):
+        self.ttl_seconds = ttl_seconds
+        self.max_planners = max_planners
+        self._planners: "OrderedDict[str, Dict[Hashable, Tuple[float, Any]]]" = OrderedDict()
+        self._in_flight: Dict[Tuple[str, Hashable], _Flight] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _planner_key(planner_id: Any) -> str:
+        return planner_id.hex if isinstance(planner_id, uuid.UUID) else str(planner_id).replace('-', '')
+
+    def _get_locked(self, planner_key: str, key: Hashable) -> Optional[Any]:
+        entries = self._planners.get(planner_key)
+        if not entries or key not in entries:
+            return None
+        stored_at, value = entries[key]
+        if time.monotonic() - stored_at > self.ttl_seconds:
+            del entries[key]
+            return None
+        self._planners.move_to_end(planner_key)
+        return value
+
+    def _put_locked(self, planner_key: str, key: Hashable, value: Any) -> None:
+        self._planners.setdefault(planner_key, {})[key] = (time.monotonic(), value)
+        self._planners.move_to_end(planner_key)
+        while len(self._planners) > self.max_planners:
+            self._planners.popitem(last=False)
+
+    def get(self, planner_id: Any, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            return self._get_locked(self._planner_key(planner_id), key)
+
+    def put(self, planner_id: Any, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._put_locked(self._planner_key(planner_id), key, value)
+
+    def get_or_compute(self, planner_id: Any, key: Hashable, compute: Callable[[], Any]) -> Any:
+        """Return the cached value or compute and store it; concurrent misses compute once"""
+        value = self.get(planner_id, key)
+        if value is not None:
+            metrics.increment("planner_cache_hits", kind=_kind(key))
+            return value
+        metrics.increment("planner_cache_misses", kind=_kind(key))
+        return self.coalesce(planner_id, key, compute, store=True)
+
+    def coalesce(self, planner_id: Any, key: Hashable, compute: Callable[[], Any], store: bool = False) -> Any:
+        """
+        Run compute once for concurrent callers with the same planner and key: the first
+        caller computes and the others block until it finishes, then share its result or
+        exception (counted in single_flight_coalesced). With store the result is also
+        cached. A computation started before invalidate() is neither stored nor joined by
+        callers arriving after it.
+
+        Callers on the event loop never wait for another's computation, since blocking
+        there would stall every request; they compute on their own (async callers cannot
+        overlap each other anyway). A waiting caller gives up after SINGLE_FLIGHT_TIMEOUT
+        and computes on its own as well (counted in single_flight_timeouts).
+        """
+        planner_key = self._planner_key(planner_id)
+        flight_key = (planner_key, key)
+        with self._lock:
+            if store:
+                value = self._get_locked(planner_key, key)
+                if value is not None:
+                    return value
+            flight = self._in_flight.get(flight_key)
+            leader = flight is None
+            if leader:
+                flight = self._in_flight[flight_key] = _Flight()
+
+        if not leader:
+            if _on_event_loop():
+                return compute()
+            metrics.increment("single_flight_coalesced", kind=_kind(key))
+            if not flight.done.wait(SINGLE_FLIGHT_TIMEOUT):
+                metrics.increment("single_flight_timeouts", kind=_kind(key))
+                return compute()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = compute()
+        except BaseException as error:
+            flight.error = error
+            raise
+        finally:
+            with self._lock:
+                if self._in_flight.get(flight_key) is flight:
+                    del self._in_flight[flight_key]
+                    if store and flight.error is None:
+                        self._put_locked(planner_key, key, flight.value)
+            flight.done.set()
+        return flight.value
+
+    def invalidate(self, planner_id: Any) -> None:
+        """Drop everything cached for a planner; call after any committed write"""
+        planner_key = self._planner_key(planner_id)
+        with self._lock:
+            self._planners.pop(planner_key, None)
+            for flight_key in [flight_key for flight_key in self._in_flight if flight_key[0] == planner_key]:
+                del self._in_flight[flight_key]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._planners.clear()
+            self._in_flight.clear()
+
+planner_cache = PlannerCache(ttl_seconds=float(os.getenv("PLANNER_CACHE_TTL", "5")))
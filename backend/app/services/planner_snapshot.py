@@ -0,0 +1,322 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from typing import Dict, Any, List, Optional, Tuple
+from datetime import date
+import copy
+import numpy as np
+import uuid
+
+from .effective_status import EffectiveStatusService
+from ..models.base import utcnow
+from .fx import fx_rates, FxService, FX_BASE_CURRENCY
+from .money import to_cents, divide_cents, CENTS_PER_UNIT
+from .planner_cache import planner_cache
+from .scenario_membership import ScenarioMembershipService
+
+ITEM_TYPES = ("asset", "liability", "income", "expense", "bill")
+
+# Uniform column list per table: id, name, include_toggle, scenario, scenario_mask, amount,
+# principal, bill_amount, interval_months, category_id, linked_asset_id, linked_liab_id,
+# scenario_exclude_mask, currency_code.
+# Amounts are read from the generated *_cents columns, so rows carry plain integers
+# (no Decimal objects) and totals are exact integer sums.
+SNAPSHOT_QUERIES = {
+    "asset": text("""
+        SELECT id, name, include_toggle, scenario, scenario_mask,
+               sale_value_cents, 0, 0, 1, NULL, NULL, NULL, scenario_exclude_mask, currency_code
+        FROM assets WHERE planner_id = :planner_id
+    """),
+    "liability": text("""
+        SELECT id, name, include_toggle, scenario, scenario_mask,
+               monthly_cost_cents, COALESCE(principal_cents, 0),
+               0, 1, NULL, linked_asset_id, NULL, scenario_exclude_mask, currency_code
+        FROM liabilities WHERE planner_id = :planner_id
+    """),
+    "income": text("""
+        SELECT id, name, include_toggle, scenario, scenario_mask,
+               monthly_amount_cents, 0, 0, 1, NULL, NULL, NULL, scenario_exclude_mask, currency_code
+        FROM income WHERE planner_id = :planner_id
+    """),
+    "expense": text("""
+        SELECT id, name, include_toggle, scenario, scenario_mask,
+               monthly_amount_cents, 0, 0, 1, category_id, linked_asset_id, linked_liab_id, scenario_exclude_mask,
+               currency_code
+        FROM expenses WHERE planner_id = :planner_id
+    """),
+    "bill": text("""
+        SELECT id, name, include_toggle, scenario, scenario_mask,
+               monthly_average_cents, 0, bill_amount_cents,
+               interval_months, category_id, linked_asset_id, linked_liab_id, scenario_exclude_mask, currency_code
+        FROM bills WHERE planner_id = :planner_id
+    """),
+}
+
+def _cents(row: Any, column: str) -> int:
+    """A money column of a row in cents; rows rebuilt from the event log carry no *_cents columns"""
+    cents = getattr(row, f"{column}_cents", None)
+    return cents if cents is not None else to_cents(getattr(row, column))
+
+def snapshot_row(item_type: str, row: Any) -> Tuple:
+    """A full table row (e.g. select(*Model.__table__.columns)) in SNAPSHOT_QUERIES column order"""
+    # Event log rows recorded before items had a currency carry none
+    currency = getattr(row, "currency_code", None)
+    if item_type == "asset":
+        return (row.id, row.name, row.include_toggle, row.scenario, row.scenario_mask,
+                _cents(row, "sale_value"), 0, 0, 1, None, None, None, row.scenario_exclude_mask, currency)
+    if item_type == "liability":
+        return (row.id, row.name, row.include_toggle, row.scenario, row.scenario_mask,
+                _cents(row, "monthly_cost"), _cents(row, "principal"), 0, 1, None, row.linked_asset_id, None,
+                row.scenario_exclude_mask, currency)
+    if item_type == "income":
+        return (row.id, row.name, row.include_toggle, row.scenario, row.scenario_mask,
+                _cents(row, "monthly_amount"), 0, 0, 1, None, None, None, row.scenario_exclude_mask, currency)
+    if item_type == "expense":
+        return (row.id, row.name, row.include_toggle, row.scenario, row.scenario_mask,
+                _cents(row, "monthly_amount"), 0, 0, 1, row.category_id, row.linked_asset_id, row.linked_liab_id,
+                row.scenario_exclude_mask, currency)
+    return (row.id, row.name, row.include_toggle, row.scenario, row.scenario_mask,
+            _cents(row, "monthly_average"), 0, _cents(row, "bill_amount"), row.interval_months, row.category_id,
+            row.linked_asset_id, row.linked_liab_id, row.scenario_exclude_mask, currency)
+
+def id_key(value: Any) -> Optional[str]:
+    """Normalize a UUID, or a raw UUID column value from any dialect, to its hex form"""
+    if value is None:
+        return None
+    if isinstance(value, uuid.UUID):
+        return value.hex
+    return str(value).replace('-', '')
+
+class ItemArrays:
+    """
+    Column arrays for one item table of a planner snapshot. Money is kept twice: int64
+    cents in each item's own currency for exact totals, and float amounts converted to
+    the reporting currency for the what-if solvers.
+    """
+
+    __slots__ = (
+        "ids", "index", "names", "toggles", "amounts", "principal", "bill_amounts", "intervals",
+        "amount_cents", "principal_cents", "bill_amount_cents",
+        "currencies", "currency_index", "factors", "link_asset", "link_liab", "category_ids", "scenarios", "masks", "exclude_masks",
+    )
+
+    def __init__(self, rows: List[Any]):
+        count = len(rows)
+        columns = list(zip(*rows)) if rows else [()] * 14
+        self.ids: List[str] = [value if type(value) is str and len(value) == 32 else id_key(value) for value in columns[0]]
+        self.index: Dict[str, int] = {item_id: position for position, item_id in enumerate(self.ids)}
+        self.names: List[str] = list(columns[1])
+        self.toggles = np.array([toggle == "on" for toggle in columns[2]], dtype=bool)
+        self.scenarios = np.array(columns[3], dtype=object)
+        self.masks = np.array([mask or 0 for mask in columns[4]], dtype=np.int64)
+        self.exclude_masks = np.array([mask or 0 for mask in columns[12]], dtype=np.int64)
+        self.amount_cents = np.array(columns[5], dtype=np.int64)
+        self.principal_cents = np.array(columns[6], dtype=np.int64)
+        self.bill_amount_cents = np.array(columns[7], dtype=np.int64)
+        # Distinct item currencies (None = reporting currency) and each row's position in them
+        self.currencies: List[Optional[str]] = list(dict.fromkeys(columns[13])) or [None]
+        positions = {currency: position for position, currency in enumerate(self.currencies)}
+        self.currency_index = np.array([positions[currency] for currency in columns[13]], dtype=np.int64)
+        self.intervals = np.array(columns[8], dtype=np.int64)
+        self.category_ids: List[Optional[str]] = [id_key(value) for value in columns[9]]
+        self.link_asset = np.full(count, -1, dtype=np.int64)
+        self.link_liab = np.full(count, -1, dtype=np.int64)
+        self.convert(np.ones(len(self.currencies)))
+
+    def convert(self, currency_factors: np.ndarray) -> None:
+        """Set the float amounts from the cents with one factor per distinct currency"""
+        self.factors = currency_factors[self.currency_index]
+        self.amounts = self.amount_cents * self.factors / CENTS_PER_UNIT
+        self.principal = self.principal_cents * self.factors / CENTS_PER_UNIT
+        self.bill_amounts = self.bill_amount_cents * self.factors / CENTS_PER_UNIT
+
+    def cents_total(self, cents: np.ndarray, included: np.ndarray, currency: str, on: date) -> int:
+        """Exact sum of the included cents in the reporting currency, converted once per item currency"""
+        if len(self.currencies) == 1:
+            return fx_rates.convert_grouped([(self.currencies[0], cents[included].sum())], currency, on)
+        by_currency = np.zeros(len(self.currencies), dtype=np.int64)
+        np.add.at(by_currency, self.currency_index[included], cents[included])
+        return int(fx_rates.convert_cents(by_currency, self.currencies, currency, on))
+
+    def copy(self) -> "ItemArrays":
+        clone = copy.copy(self)
+        for name in ("toggles", "amounts", "principal", "bill_amounts", "amount_cents", "principal_cents", "bill_amount_cents", "intervals", "link_asset", "link_liab"):
+            setattr(clone, name, getattr(self, name).copy())
+        return clone
+
+def _linked_on(links: np.ndarray, target_on: np.ndarray) -> np.ndarray:
+    """True where there is no link or the linked item is switched on (unresolved links count as on)"""
+    if len(target_on) == 0:
+        return np.ones(len(links), dtype=bool)
+    return (links < 0) | target_on[np.maximum(links, 0)]
+
+class PlannerSnapshot:
+    """
+    In-memory, vectorized copy of a planner's items.
+
+    Loaded with one lightweight query per table; links are resolved to array indices so
+    effective status and totals for any scenario are a handful of NumPy operations.
+    Mirrors the SQL rules in EffectiveStatusService.
+    """
+
+    def __init__(
+        self,
+        planner_id: uuid.UUID,
+        tables: Dict[str, ItemArrays],
+        scenarios: Dict[str, Tuple[int, Optional[str]]],
+        currency: str = FX_BASE_CURRENCY,
+        rate_date: Optional[date] = None,
+    ):
+        self.planner_id = planner_id
+        self.tables = tables
+        self.scenarios = scenarios
+        self.currency = currency  # Reporting currency of every total
+        self.rate_date = rate_date or utcnow().date()  # Date of the FX rates amounts are converted with
+
+    @classmethod
+    def load(cls, db: Session, planner_id: uuid.UUID) -> "PlannerSnapshot":
+        params = {"planner_id": str(planner_id).replace('-', '')}
+        rows_by_type = {item_type: db.execute(query, params).fetchall() for item_type, query in SNAPSHOT_QUERIES.items()}
+        return cls.from_rows(
+            planner_id, rows_by_type, ScenarioMembershipService.planner_scenarios(db, planner_id),
+            FxService.planner_currency(db, planner_id),
+        )
+
+    @classmethod
+    def from_rows(
+        cls,
+        planner_id: uuid.UUID,
+        rows_by_type: Dict[str, List[Any]],
+        scenarios: Dict[str, Tuple[int, Optional[str]]],
+        currency: str = FX_BASE_CURRENCY,
+        rate_date: Optional[date] = None,
+    ) -> "PlannerSnapshot":
+        """Build a snapshot from rows already in SNAPSHOT_QUERIES column order"""
+        snapshot = cls(
+            planner_id, {item_type: ItemArrays(rows) for item_type, rows in rows_by_type.items()}, scenarios,
+            currency, rate_date,
+        )
+        for table in snapshot.tables.values():
+            if table.currencies != [None]:
+                table.convert(fx_rates.factors(table.currencies, currency, snapshot.rate_date))
+
+        asset_index = snapshot.tables["asset"].index
+        liability_index = snapshot.tables["liability"].index
+        for item_type in ("liability", "expense", "bill"):
+            rows = rows_by_type[item_type]
+            table = snapshot.tables[item_type]
+            table.link_asset = np.fromiter(
+                (asset_index.get(id_key(row[10]), -1) for row in rows), dtype=np.int64, count=len(rows)
+            )
+            table.link_liab = np.fromiter(
+                (liability_index.get(id_key(row[11]), -1) for row in rows), dtype=np.int64, count=len(rows)
+            )
+        return snapshot
+
+    @classmethod
+    def cached(cls, db: Session, planner_id: uuid.UUID) -> "PlannerSnapshot":
+        """Shared snapshot from the planner cache; callers must copy() before modifying it"""
+        return planner_cache.get_or_compute(planner_id, ("snapshot",), lambda: cls.load(db, planner_id))
+
+    def copy(self) -> "PlannerSnapshot":
+        return PlannerSnapshot(
+            self.planner_id,
+            {item_type: table.copy() for item_type, table in self.tables.items()},
+            self.scenarios,
+            self.currency,
+            self.rate_date,
+        )
+
+    def _set_link(self, item_type: str, position: int, target_type: str, target_id: Any) -> None:
+        target_index = self.tables[target_type].index.get(id_key(target_id), -1) if target_id is not None else -1
+        links = self.tables[item_type].link_asset if target_type == "asset" else self.tables[item_type].link_liab
+        links[position] = target_index
+
+    def effective(self) -> Dict[str, np.ndarray]:
+        """Effective 'on' flags per item type"""
+        assets = self.tables["asset"]
+        liabilities = self.tables["liability"]
+        expenses = self.tables["expense"]
+        bills = self.tables["bill"]
+        return {
+            "asset": assets.toggles,
+            "income": self.tables["income"].toggles,
+            "liability": liabilities.toggles & _linked_on(liabilities.link_asset, assets.toggles),
+            "expense": expenses.toggles
+                & _linked_on(expenses.link_asset, assets.toggles)
+                & _linked_on(expenses.link_liab, liabilities.toggles),
+            "bill": bills.toggles
+                & _linked_on(bills.link_asset, assets.toggles)
+                & _linked_on(bills.link_liab, liabilities.toggles),
+        }
+
+    def membership(self, scenario: str) -> Dict[str, np.ndarray]:
+        """Scenario membership flags per item type (same rule as scenario_membership_sql)"""
+        lineage = ScenarioMembershipService.resolve_lineage(self.scenarios, scenario)
+        return {
+            item_type: ScenarioMembershipService.membership_vector(table.scenarios, table.masks, table.exclude_masks, lineage)
+            for item_type, table in self.tables.items()
+        }
+
+    def included(self, scenario: str = "ALL") -> Dict[str, np.ndarray]:
+        """Items counted in the totals: effective and member of the scenario"""
+        effective = self.effective()
+        membership = self.membership(scenario)
+        return {item_type: effective[item_type] & membership[item_type] for item_type in ITEM_TYPES}
+
+    def component_cents(self, scenario: str = "ALL") -> Tuple[int, int, int, int, int, int]:
+        """
+        The six KPI components (income, expenses, bills, liabilities, asset sales, principal)
+        in cents of the reporting currency
+        """
+        included = self.included(scenario)
+        t = self.tables
+
+        def total(item_type: str, cents: np.ndarray) -> int:
+            return t[item_type].cents_total(cents, included[item_type], self.currency, self.rate_date)
+
+        return (
+            total("income", t["income"].amount_cents),
+            total("expense", t["expense"].amount_cents),
+            total("bill", t["bill"].amount_cents),
+            total("liability", t["liability"].amount_cents),
+            total("asset", t["asset"].amount_cents),
+            total("liability", t["liability"].principal_cents),
+        )
+
+    def totals(self, scenario: str = "ALL") -> Dict[str, float]:
+        """Monthly totals equivalent to EffectiveStatusService.calculate_monthly_totals"""
+        return EffectiveStatusService.build_totals_from_cents(*self.component_cents(scenario))
+
+    def apply_override(
+        self,
+        item_type: str,
+        item_id: uuid.UUID,
+        include_toggle: Optional[str] = None,
+        amount: Optional[float] = None,
+        links: Optional[Dict[str, Optional[uuid.UUID]]] = None,
+    ) -> bool:
+        """
+        Change one item in memory. amount is the value edited in the tables
+        (bill_amount for bills, which also updates the monthly average).
+        Returns False when the item is not part of the snapshot.
+        """
+        table = self.tables[item_type]
+        position = table.index.get(id_key(item_id))
+        if position is None:
+            return False
+
+        if include_toggle is not None:
+            table.toggles[position] = include_toggle == "on"
+        if amount is not None:
+            # In the item's own currency, like the amounts edited in the tables
+            cents = to_cents(amount)
+            factor = table.factors[position]
+            if item_type == "bill":
+                table.bill_amount_cents[position] = cents
+                table.bill_amounts[position] = cents * factor / CENTS_PER_UNIT
+                cents = divide_cents(cents, max(int(table.intervals[position]), 1))
+            table.amount_cents[position] = cents
+            table.amounts[position] = cents * factor / CENTS_PER_UNIT
+        for field, target_id in (links or {}).items():
+            self._set_link(item_type, position, "asset" if field == "linked_asset_id" else "liability", target_id)
+        return True
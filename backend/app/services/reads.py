@@ -0,0 +1,77 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.engine import Row
+from fastapi import Response
+from pydantic import BaseModel
+from pydantic_core import to_json
+from datetime import date, datetime
+from decimal import Decimal
+from functools import lru_cache
+from typing import Any, List, Optional, Type
+import json
+import uuid
+
+from .scenario_membership import ScenarioMembershipService
+
+class ReadService:
+    """
+    Read path of the GET endpoints, without ORM instances.
+
+    Rows come from a Core select of exactly the response schema's fields, in its field
+    order, so nothing enters the session's identity map and no instance state is built
+    per row. The rows are our own typed columns, so they skip the response model's
+    validation and are written straight to JSON by pydantic-core, with the same
+    encoding the model would use. The routes keep response_model for the OpenAPI schema.
+    """
+
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def columns(model, schema: Type[BaseModel]) -> tuple:
+        """The table columns named by the schema's fields, in field order"""
+        columns = model.__table__.columns
+        return tuple(columns[name] for name in schema.model_fields if name in columns)
+
+    @staticmethod
+    def rows(db: Session, model, schema: Type[BaseModel], *criteria) -> List[Row]:
+        return db.execute(select(*ReadService.columns(model, schema)).where(*criteria)).all()
+
+    @staticmethod
+    def one(db: Session, model, schema: Type[BaseModel], item_id: uuid.UUID) -> Optional[Row]:
+        return db.execute(select(*ReadService.columns(model, schema)).where(model.id == item_id)).first()
+
+    @staticmethod
+    def planner_rows(db: Session, model, schema: Type[BaseModel], planner_id: uuid.UUID, scenario: str = "ALL") -> List[Row]:
+        """A planner's items; any other scenario than ALL keeps only that scenario's members"""
+        criteria = [model.planner_id == planner_id]
+        if scenario != "ALL":
+            criteria.append(ScenarioMembershipService.membership_filter(db, model, planner_id, scenario))
+        return ReadService.rows(db, model, schema, *criteria)
+
+    @staticmethod
+    def respond(rows: Any) -> Response:
+        """JSON response of a row or a list of rows read with the columns of a response schema"""
+        body = [row._asdict() for row in rows] if isinstance(rows, list) else rows._asdict()
+        return Response(content=to_json(body), media_type="application/json")
+
+    @staticmethod
+    def respond_raw(body: Any) -> Response:
+        """
+        JSON response of plain values that may contain Core rows (e.g. from text queries),
+        encoded like jsonable_encoder would; each row becomes a dict only while it is written
+        """
+        return Response(
+            content=json.dumps(body, ensure_ascii=False, allow_nan=False, separators=(",", ":"), default=_encode),
+            media_type="application/json",
+        )
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, Row):
+        return value._asdict()
+    if isinstance(value, Decimal):
+        # As fastapi.encoders.decimal_encoder
+        return int(value) if value.as_tuple().exponent >= 0 else float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
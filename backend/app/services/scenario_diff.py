@@ -0,0 +1,173 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from typing import Dict, Any, List, Optional
+import uuid
+
+from ..models.base import utcnow
+from ..models.planner import ScenarioSettings
+from .effective_status import EffectiveStatusService
+from .fx import fx_rates, FxService
+from .money import from_cents
+from .scenario_membership import ScenarioMembershipService, Lineage, scenario_membership_sql, lineage_params
+
+def _member_sql(lineage: Lineage, side: str) -> str:
+    return f"CASE WHEN {scenario_membership_sql('i', lineage, side)} THEN 1 ELSE 0 END"
+
+def scenario_diff_query(base_lineage: Lineage, compare_lineage: Lineage):
+    """
+    Every effective ('on') item of a planner with its membership in both scenarios and
+    its amounts in cents. Only rows whose membership differs are returned.
+    """
+    return text(f"""
+    SELECT * FROM (
+        SELECT i.*, {_member_sql(base_lineage, 'base')} AS in_base, {_member_sql(compare_lineage, 'compare')} AS in_compare
+        FROM (
+            SELECT 'income' AS item_type, inc.id, inc.name, inc.currency_code, inc.monthly_amount_cents AS amount,
+                   NULL AS principal, NULL AS category_id, NULL AS category_name,
+                   inc.scenario, inc.scenario_mask, inc.scenario_exclude_mask
+            FROM income inc
+            WHERE inc.planner_id = :planner_id AND inc.include_toggle = 'on'
+
+            UNION ALL
+
+            SELECT 'expense', e.id, e.name, e.currency_code, e.monthly_amount_cents, NULL, e.category_id, c.name,
+                   e.scenario, e.scenario_mask, e.scenario_exclude_mask
+            FROM expenses e
+            LEFT JOIN assets a ON e.linked_asset_id = a.id
+            LEFT JOIN liabilities l ON e.linked_liab_id = l.id
+            LEFT JOIN categories c ON e.category_id = c.id
+            WHERE e.planner_id = :planner_id
+            AND CASE
+                WHEN e.include_toggle = 'off' THEN 'off'
+                WHEN e.linked_asset_id IS NOT NULL AND a.include_toggle = 'off' THEN 'off'
+                WHEN e.linked_liab_id IS NOT NULL AND l.include_toggle = 'off' THEN 'off'
+                ELSE e.include_toggle
+            END = 'on'
+
+            UNION ALL
+
+            SELECT 'bill', b.id, b.name, b.currency_code, b.monthly_average_cents, NULL, b.category_id, c.name,
+                   b.scenario, b.scenario_mask, b.scenario_exclude_mask
+            FROM bills b
+            LEFT JOIN assets a ON b.linked_asset_id = a.id
+            LEFT JOIN liabilities l ON b.linked_liab_id = l.id
+            LEFT JOIN categories c ON b.category_id = c.id
+            WHERE b.planner_id = :planner_id
+            AND CASE
+                WHEN b.include_toggle = 'off' THEN 'off'
+                WHEN b.linked_asset_id IS NOT NULL AND a.include_toggle = 'off' THEN 'off'
+                WHEN b.linked_liab_id IS NOT NULL AND l.include_toggle = 'off' THEN 'off'
+                ELSE b.include_toggle
+            END = 'on'
+
+            UNION ALL
+
+            SELECT 'liability', l.id, l.name, l.currency_code, l.monthly_cost_cents, l.principal_cents, NULL, NULL,
+                   l.scenario, l.scenario_mask, l.scenario_exclude_mask
+            FROM liabilities l
+            LEFT JOIN assets a ON l.linked_asset_id = a.id
+            WHERE l.planner_id = :planner_id
+            AND CASE
+                WHEN l.include_toggle = 'off' THEN 'off'
+                WHEN l.linked_asset_id IS NULL THEN l.include_toggle
+                WHEN a.include_toggle = 'off' THEN 'off'
+                ELSE l.include_toggle
+            END = 'on'
+
+            UNION ALL
+
+            SELECT 'asset', ast.id, ast.name, ast.currency_code, ast.sale_value_cents, NULL, NULL, NULL,
+                   ast.scenario, ast.scenario_mask, ast.scenario_exclude_mask
+            FROM assets ast
+            WHERE ast.planner_id = :planner_id AND ast.include_toggle = 'on'
+        ) i
+    ) membership
+    WHERE in_base != in_compare
+    """)
+
+# KPI component each item type contributes its amount to
+COMPONENT_BY_TYPE = {
+    "income": "income",
+    "expense": "expenses",
+    "bill": "bills",
+    "liability": "liabilities",
+    "asset": "asset_sales",
+}
+COMPONENTS = ("income", "expenses", "bills", "liabilities", "asset_sales", "liability_principal")
+
+def _uuid_str(value) -> Any:
+    return str(uuid.UUID(str(value))) if value is not None else None
+
+class ScenarioDiffService:
+    """Service for comparing the effective contents of two scenarios"""
+
+    @staticmethod
+    def diff(db: Session, base: ScenarioSettings, compare: ScenarioSettings) -> Dict[str, Any]:
+        """
+        Return the items whose effective inclusion differs between two scenarios of
+        the same planner, with per-category and total KPI deltas (compare - base).
+        Items keep their own currency; deltas are in the planner's reporting currency.
+        """
+        base_lineage = ScenarioMembershipService.lineage(db, base.planner_id, base.scenario)
+        compare_lineage = ScenarioMembershipService.lineage(db, base.planner_id, compare.scenario)
+        params = {
+            "planner_id": str(base.planner_id).replace('-', ''),
+            **lineage_params(base_lineage, "base"),
+            **lineage_params(compare_lineage, "compare"),
+        }
+        rows = db.execute(scenario_diff_query(base_lineage, compare_lineage), params).fetchall()
+        currency = FxService.planner_currency(db, base.planner_id)
+        today = utcnow().date()
+
+        # Deltas are accumulated in cents per item currency and converted once at the end
+        by_currency: Dict[Optional[str], Dict[str, int]] = {}
+        categories: Dict[Any, Dict[str, Any]] = {}
+        category_cents: Dict[Any, Dict[Optional[str], int]] = {}
+        items: List[Dict[str, Any]] = []
+
+        for row in rows:
+            sign = 1 if row.in_compare else -1
+            amount = row.amount or 0
+            principal = row.principal or 0
+            components = by_currency.setdefault(row.currency_code, dict.fromkeys(COMPONENTS, 0))
+
+            components[COMPONENT_BY_TYPE[row.item_type]] += sign * amount
+            if row.item_type == "liability":
+                components["liability_principal"] += sign * principal
+
+            if row.item_type in ("expense", "bill"):
+                category_key = _uuid_str(row.category_id)
+                category = categories.setdefault(category_key, {
+                    "category_id": category_key,
+                    "category_name": row.category_name,
+                    "monthly_delta": 0,
+                })
+                deltas = category_cents.setdefault(category_key, {})
+                deltas[row.currency_code] = deltas.get(row.currency_code, 0) + sign * amount
+
+            items.append({
+                "item_type": row.item_type,
+                "id": _uuid_str(row.id),
+                "name": row.name,
+                "currency_code": row.currency_code,
+                "amount": from_cents(amount),
+                "principal": from_cents(principal) if row.item_type == "liability" else None,
+                "category_id": _uuid_str(row.category_id),
+                "included_in": "compare" if row.in_compare else "base",
+            })
+
+        for category_key, category in categories.items():
+            category["monthly_delta"] = from_cents(
+                fx_rates.convert_grouped(category_cents[category_key].items(), currency, today)
+            )
+
+        totals = fx_rates.convert_cents(
+            [[components[name] for name in COMPONENTS] for components in by_currency.values()] or [[0] * len(COMPONENTS)],
+            list(by_currency) or [None], currency, today,
+        )
+        return {
+            "currency": currency,
+            "items": items,
+            "category_deltas": sorted(categories.values(), key=lambda c: abs(c["monthly_delta"]), reverse=True),
+            "totals_delta": EffectiveStatusService.build_totals_from_cents(*totals),
+        }
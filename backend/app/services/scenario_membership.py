@@ -0,0 +1,252 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import select, update, delete, text, bindparam
+from sqlalchemy.engine import Row
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import uuid
+
+from ..models.planner import ScenarioSettings, ScenarioItem
+from ..models.assets import Asset
+from ..models.liabilities import Liability
+from ..models.income import Income
+from ..models.expenses import Expense
+from ..models.bills import Bill
+from ..models.base import utcnow
+from .planner_cache import planner_cache
+
+# Bits 0-62 of a signed 64-bit integer are usable for scenario membership
+MAX_SCENARIOS = 63
+
+ITEM_MODELS = {
+    "asset": Asset,
+    "liability": Liability,
+    "income": Income,
+    "expense": Expense,
+    "bill": Bill,
+}
+
+# A scenario's lineage: (identifier, scenario_bit) from the scenario itself up to its
+# root ancestor. The bit is None for identifiers without a ScenarioSettings row.
+Lineage = List[Tuple[str, Optional[int]]]
+
+def scenario_membership_sql(alias: str, lineage: Lineage, prefix: str = "scenario") -> str:
+    """
+    SQL predicate selecting items that belong to the scenario described by lineage.
+    Levels are checked nearest first: a set scenario_exclude_mask bit hides the item,
+    a matching primary scenario or a set scenario_mask bit includes it. Items left
+    undecided by every level belong to the scenario only when tagged 'ALL', so forks
+    inherit their parent's overrides and only store their own.
+    Identifiers are bound as :{prefix}_0, :{prefix}_1, ... (see lineage_params).
+    """
+    if not lineage:
+        return "1 = 1"
+    branches = []
+    for depth, (identifier, bit) in enumerate(lineage):
+        own = f"{alias}.scenario = :{prefix}_{depth}"
+        if bit is not None:
+            flag = 1 << bit
+            branches.append(f"WHEN ({alias}.scenario_exclude_mask & {flag}) != 0 THEN 0")
+            own += f" OR ({alias}.scenario_mask & {flag}) != 0"
+        branches.append(f"WHEN {own} THEN 1")
+    return f"(CASE {' '.join(branches)} WHEN {alias}.scenario = 'ALL' THEN 1 ELSE 0 END) = 1"
+
+def lineage_params(lineage: Lineage, prefix: str = "scenario") -> Dict[str, str]:
+    """Bind parameters for scenario_membership_sql"""
+    return {f"{prefix}_{depth}": identifier for depth, (identifier, _) in enumerate(lineage)}
+
+class ScenarioMembershipService:
+    """Service for resolving item membership in an arbitrary number of scenarios per planner"""
+
+    @staticmethod
+    def allocate_bit(db: Session, planner_id: uuid.UUID) -> Optional[int]:
+        """Return the lowest scenario bit not used by the planner, or None when all are taken"""
+        used = set(db.execute(
+            select(ScenarioSettings.scenario_bit).where(ScenarioSettings.planner_id == planner_id)
+        ).scalars())
+        for bit in range(MAX_SCENARIOS):
+            if bit not in used:
+                return bit
+        return None
+
+    @staticmethod
+    def planner_scenarios(db: Session, planner_id: uuid.UUID) -> Dict[str, Tuple[int, Optional[str]]]:
+        """Map of scenario identifier to (scenario_bit, parent identifier), cached per planner"""
+        def load():
+            rows = db.execute(
+                select(ScenarioSettings.id, ScenarioSettings.scenario, ScenarioSettings.scenario_bit, ScenarioSettings.parent_id)
+                .where(ScenarioSettings.planner_id == planner_id)
+            ).all()
+            return ScenarioMembershipService.scenario_map(rows)
+        return planner_cache.get_or_compute(planner_id, ("scenarios",), load)
+
+    @staticmethod
+    def scenario_map(rows) -> Dict[str, Tuple[int, Optional[str]]]:
+        """planner_scenarios from already loaded scenario rows (id, scenario, scenario_bit, parent_id)"""
+        identifiers = {row.id: row.scenario for row in rows}
+        return {row.scenario: (row.scenario_bit, identifiers.get(row.parent_id)) for row in rows}
+
+    @staticmethod
+    def resolve_lineage(scenarios: Dict[str, Tuple[int, Optional[str]]], scenario: str) -> Lineage:
+        """Walk from a scenario to its root; 'ALL' has an empty lineage"""
+        if scenario == "ALL":
+            return []
+        lineage: Lineage = []
+        current: Optional[str] = scenario
+        while current is not None and len(lineage) < MAX_SCENARIOS:
+            bit, parent = scenarios.get(current, (None, None))
+            lineage.append((current, bit))
+            current = parent
+        return lineage
+
+    @staticmethod
+    def lineage(db: Session, planner_id: uuid.UUID, scenario: str) -> Lineage:
+        return ScenarioMembershipService.resolve_lineage(
+            ScenarioMembershipService.planner_scenarios(db, planner_id), scenario
+        )
+
+    @staticmethod
+    def membership_filter(db: Session, model, planner_id: uuid.UUID, scenario: str):
+        """ORM filter clause equivalent to scenario_membership_sql for list queries"""
+        lineage = ScenarioMembershipService.lineage(db, planner_id, scenario)
+        return text(scenario_membership_sql(model.__tablename__, lineage)).bindparams(**lineage_params(lineage))
+
+    @staticmethod
+    def set_membership(db: Session, item_type: str, item_id: uuid.UUID, scenario_bit: int, member: bool) -> bool:
+        """
+        Set or clear one scenario bit on an item, returning False when the item does not exist.
+        Adding an item also lifts an exclusion of it from that scenario.
+        """
+        model = ITEM_MODELS[item_type]
+        flag = 1 << scenario_bit
+        if member:
+            values = {
+                "scenario_mask": model.scenario_mask.op("|")(flag),
+                "scenario_exclude_mask": model.scenario_exclude_mask.op("&")(~flag),
+            }
+        else:
+            values = {"scenario_mask": model.scenario_mask.op("&")(~flag)}
+        result = db.execute(update(model.__table__).where(model.id == item_id).values(**values))
+        return result.rowcount > 0
+
+    @staticmethod
+    def set_exclusion(db: Session, scenario: ScenarioSettings, item_type: str, item_id: uuid.UUID, excluded: bool) -> bool:
+        """
+        Hide an item from a scenario even when it is tagged 'ALL' or inherited from a parent,
+        or lift that override. Returns False when the item does not exist.
+        """
+        model = ITEM_MODELS[item_type]
+        flag = 1 << scenario.scenario_bit
+        if excluded:
+            db.execute(delete(ScenarioItem).where(
+                ScenarioItem.scenario_id == scenario.id,
+                ScenarioItem.item_type == item_type,
+                ScenarioItem.item_id == item_id,
+            ))
+            values = {
+                "scenario_mask": model.scenario_mask.op("&")(~flag),
+                "scenario_exclude_mask": model.scenario_exclude_mask.op("|")(flag),
+            }
+        else:
+            values = {"scenario_exclude_mask": model.scenario_exclude_mask.op("&")(~flag)}
+        result = db.execute(update(model.__table__).where(model.id == item_id).values(**values))
+        return result.rowcount > 0
+
+    @staticmethod
+    def clear_bit(db: Session, planner_id: uuid.UUID, scenario_bit: int) -> None:
+        """Remove a scenario bit from every item of a planner"""
+        flag = 1 << scenario_bit
+        for model in ITEM_MODELS.values():
+            db.execute(
+                update(model.__table__)
+                .where(
+                    model.planner_id == planner_id,
+                    (model.scenario_mask.op("|")(model.scenario_exclude_mask)).op("&")(flag) != 0,
+                )
+                .values(
+                    scenario_mask=model.scenario_mask.op("&")(~flag),
+                    scenario_exclude_mask=model.scenario_exclude_mask.op("&")(~flag),
+                )
+            )
+
+    @staticmethod
+    def materialize(db: Session, scenario: ScenarioSettings, parent_lineage: Lineage) -> None:
+        """
+        Copy the membership a scenario would inherit from parent_lineage into its own bit,
+        server-side: one UPDATE per item table for the masks and one INSERT ... SELECT
+        for the scenario_items rows. Items tagged 'ALL' only need an exclusion when
+        the parent hides them.
+        """
+        flag = 1 << scenario.scenario_bit
+        id_expression = "gen_random_uuid()" if db.get_bind().dialect.name == "postgresql" else "lower(hex(randomblob(16)))"
+        params = {
+            "planner_id": str(scenario.planner_id).replace('-', ''),
+            "scenario_id": str(scenario.id).replace('-', ''),
+            "updated_at": utcnow(),
+            **lineage_params(parent_lineage),
+        }
+        for item_type, model in ITEM_MODELS.items():
+            table = model.__tablename__
+            inherited = scenario_membership_sql(table, parent_lineage)
+            db.execute(text(f"""
+                INSERT INTO scenario_items (id, item_id, item_type, scenario_id)
+                SELECT {id_expression}, {table}.id, :item_type, :scenario_id
+                FROM {table}
+                WHERE {table}.planner_id = :planner_id AND {table}.scenario != 'ALL' AND {inherited}
+            """), {**params, "item_type": item_type})
+            db.execute(text(f"""
+                UPDATE {table}
+                SET scenario_mask = CASE WHEN {table}.scenario != 'ALL' THEN scenario_mask | {flag} ELSE scenario_mask END,
+                    scenario_exclude_mask = CASE WHEN {table}.scenario = 'ALL' THEN scenario_exclude_mask | {flag} ELSE scenario_exclude_mask END,
+                    updated_at = :updated_at
+                WHERE {table}.planner_id = :planner_id
+                AND CASE WHEN {inherited} THEN {table}.scenario != 'ALL' ELSE {table}.scenario = 'ALL' END
+            """).bindparams(bindparam("updated_at", type_=model.updated_at.type)), params)
+
+    @staticmethod
+    def membership_vector(
+        primary: np.ndarray,
+        masks: np.ndarray,
+        exclude_masks: np.ndarray,
+        lineage: Lineage,
+    ) -> np.ndarray:
+        """Vectorized scenario_membership_sql over item columns"""
+        if not lineage:
+            return np.ones(len(primary), dtype=bool)
+        member = np.zeros(len(primary), dtype=bool)
+        decided = np.zeros(len(primary), dtype=bool)
+        for identifier, bit in lineage:
+            flag = 1 << bit if bit is not None else 0
+            excluded = (exclude_masks & flag) != 0
+            own = (primary == identifier) | ((masks & flag) != 0)
+            member |= ~decided & ~excluded & own
+            decided |= excluded | own
+        return member | (~decided & (primary == "ALL"))
+
+    @staticmethod
+    def membership_matrix(
+        primary: List[str],
+        masks: List[int],
+        exclude_masks: List[int],
+        lineages: List[Lineage],
+    ) -> np.ndarray:
+        """
+        Build an items x scenarios boolean matrix, one vectorized pass per scenario.
+        primary holds each item's scenario column, masks and exclude_masks its bit columns.
+        """
+        primary_array = np.array(primary, dtype=object)
+        mask_array = np.array(masks, dtype=np.int64)
+        exclude_array = np.array(exclude_masks, dtype=np.int64)
+        columns = [
+            ScenarioMembershipService.membership_vector(primary_array, mask_array, exclude_array, lineage)
+            for lineage in lineages
+        ]
+        return np.column_stack(columns) if columns else np.zeros((len(primary), 0), dtype=bool)
+
+    @staticmethod
+    def scenarios_for_planner(db: Session, planner_id: uuid.UUID) -> List[Row]:
+        """A planner's scenario rows in bit order, as Core rows"""
+        return db.execute(
+            select(*ScenarioSettings.__table__.columns)
+            .where(ScenarioSettings.planner_id == planner_id)
+            .order_by(ScenarioSettings.scenario_bit)
+        ).all()
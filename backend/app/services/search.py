@@ -0,0 +1,76 @@
+from sqlalchemy.orm import Session
+from sqlalchemy import text
+from typing import Any, Dict, List, Optional, Sequence
+import re
+import uuid
+
+from .scenario_membership import ITEM_MODELS
+
+# Words of a search query; everything else (FTS5 operators, quotes) is dropped
+_TERM = re.compile(r"\w+", re.UNICODE)
+
+def match_expression(query: str) -> str:
+    """
+    FTS5 MATCH expression for free text: every word must occur, the last one as a
+    prefix so results show up while the user is typing. Raises ValueError when the
+    query has no words.
+    """
+    terms = _TERM.findall(query)
+    if not terms:
+        raise ValueError("Search query must contain at least one word")
+    return " ".join([f'"{term}"' for term in terms[:-1]] + [f'"{terms[-1]}"*'])
+
+class SearchService:
+    """
+    Full-text search over the name and notes of a planner's items.
+
+    Each item table has an FTS5 index of its items' ids, names and notes, kept in
+    sync by triggers (models.search); one UNION ALL statement matches all of them,
+    joins the hits back on the item id and orders the mixed results by bm25 rank,
+    with a name match weighted above a notes match.
+    """
+
+    @staticmethod
+    def search(
+        db: Session,
+        planner_id: uuid.UUID,
+        query: str,
+        item_types: Optional[Sequence[str]] = None,
+        limit: int = 50,
+    ) -> List[Dict[str, Any]]:
+        """Best matches first; raises ValueError for an empty query or an unknown item type"""
+        item_types = list(item_types or ITEM_MODELS)
+        unknown = [item_type for item_type in item_types if item_type not in ITEM_MODELS]
+        if unknown:
+            raise ValueError(f"Unknown item type: {', '.join(unknown)}")
+
+        selects = []
+        for item_type in item_types:
+            table = ITEM_MODELS[item_type].__tablename__
+            index = f"{table}_search"
+            selects.append(f"""
+                SELECT '{item_type}' AS item_type, t.id, t.name, t.notes,
+                       snippet({index}, -1, '<mark>', '</mark>', '…', 12) AS snippet,
+                       bm25({index}, 0.0, 10.0, 1.0) AS rank
+                FROM {index}
+                JOIN {table} t ON t.id = {index}.id
+                WHERE {index} MATCH :match AND t.planner_id = :planner_id
+            """)
+        statement = text(" UNION ALL ".join(selects) + " ORDER BY rank LIMIT :limit")
+
+        rows = db.execute(statement, {
+            "match": match_expression(query),
+            "planner_id": str(planner_id).replace('-', ''),
+            "limit": limit,
+        }).fetchall()
+        return [
+            {
+                "item_type": row.item_type,
+                "id": str(uuid.UUID(str(row.id))),
+                "name": row.name,
+                "notes": row.notes,
+                "snippet": row.snippet,
+                "rank": row.rank,
+            }
+            for row in rows
+        ]
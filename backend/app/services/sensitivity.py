@@ -0,0 +1,87 @@
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+import uuid
+
+from .planner_snapshot import PlannerSnapshot
+from .forecast import ForecastService
+
+# Direction each item type moves the net cash flow when its amount grows
+SENSITIVITY_SIGNS = {"income": 1.0, "expense": -1.0, "bill": -1.0, "liability": -1.0}
+
+class SensitivityService:
+    """Tornado-style sensitivity of cash flow KPIs to every line item's amount"""
+
+    @staticmethod
+    def analyze(
+        snapshot: PlannerSnapshot,
+        scenario: str,
+        forecast_settings: Dict[str, Any],
+        percent: float = 10.0,
+        steps: int = 1,
+        limit: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Apply -percent..+percent (in `steps` increments each side) to every included
+        income, expense, bill and liability amount. The items x perturbations matrix of
+        net cash flow changes is one broadcast, and the 12-month forecast is broadcast
+        over it; drivers are ranked by the swing of their closing balance impact.
+        """
+        included = snapshot.included(scenario)
+        totals = snapshot.totals(scenario)
+        sale_month = ForecastService.sale_month(forecast_settings, scenario)
+        starting_cash = forecast_settings["starting_cash"]
+
+        items: List[Tuple[str, int]] = []
+        signed = []
+        for item_type, sign in SENSITIVITY_SIGNS.items():
+            rows = np.nonzero(included[item_type])[0]
+            items.extend((item_type, int(position)) for position in rows)
+            signed.append(sign * snapshot.tables[item_type].amounts[rows])
+        signed_amounts = np.concatenate(signed)
+
+        fractions = np.linspace(-percent, percent, 2 * steps + 1)
+        fractions = fractions[fractions != 0] / 100.0
+
+        # items x perturbations
+        cash_delta = signed_amounts[:, None] * fractions[None, :]
+        baseline_balances = ForecastService.balances(starting_cash, totals["net_cash_flow"], totals["net_value"], sale_month)
+        balances = ForecastService.balances(
+            starting_cash, totals["net_cash_flow"] + cash_delta, totals["net_value"], sale_month
+        )
+        closing_delta = balances[..., -1] - baseline_balances[-1]
+
+        swing = closing_delta.max(axis=1) - closing_delta.min(axis=1)
+        order = np.argsort(-swing, kind="stable")
+        if limit is not None:
+            order = order[:limit]
+
+        drivers = []
+        for row in order:
+            item_type, position = items[row]
+            table = snapshot.tables[item_type]
+            drivers.append({
+                "item_type": item_type,
+                "id": str(uuid.UUID(table.ids[position])),
+                "name": table.names[position],
+                "monthly_amount": float(table.amounts[position]),
+                "impacts": [
+                    {
+                        "percent": float(fraction * 100),
+                        "net_cash_flow_delta": float(cash_delta[row, column]),
+                        "closing_balance_delta": float(closing_delta[row, column]),
+                    }
+                    for column, fraction in enumerate(fractions)
+                ],
+                "closing_balance_swing": float(swing[row]),
+            })
+
+        return {
+            "percent": percent,
+            "steps": steps,
+            "baseline": {
+                "net_cash_flow": totals["net_cash_flow"],
+                "closing_balance": float(baseline_balances[-1]),
+            },
+            "item_count": len(signed_amounts),
+            "drivers": drivers,
+        }
@@ -0,0 +1,79 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable
+import asyncio
+import os
+
+from .metrics import metrics
+
+@dataclass
+class _PendingWrite:
+    values: Dict[str, Any]
+    future: asyncio.Future
+    merged: int = 1
+    closed: bool = False
+
+class WriteCoalescer:
+    """
+    Merges field-level edits to the same row that arrive within a short window.
+
+    The first PATCH for a row becomes the leader: it waits window_seconds, then applies
+    every field merged in the meantime (later values win) as one UPDATE through its own
+    session, which also means one cache invalidation. Later PATCHes for that row only
+    merge their fields and await the leader's result, so every caller responds with the
+    committed row and any request a client sends after its PATCH returns reads its write.
+    All state lives on the event loop thread, so no lock is needed.
+    """
+
+    def __init__(self, window_seconds: float = 0.02):
+        self.window_seconds = window_seconds
+        self._pending: Dict[Hashable, _PendingWrite] = {}
+
+    async def submit(self, key: Hashable, values: Dict[str, Any], flush: Callable[[Dict[str, Any]], Any]) -> Any:
+        """
+        Merge values into the pending write for key and return the flushed result.
+        flush receives the merged values and runs synchronously in the leader.
+        """
+        pending = self._pending.get(key)
+        if pending is not None and not pending.closed:
+            pending.values.update(values)
+            pending.merged += 1
+            metrics.increment("coalesced_writes", table=key[0] if isinstance(key, tuple) else key)
+            # Shield so a disconnecting follower does not cancel the shared result
+            return await asyncio.shield(pending.future)
+
+        pending = _PendingWrite(dict(values), asyncio.get_running_loop().create_future())
+        self._pending[key] = pending
+        try:
+            await asyncio.sleep(self.window_seconds)
+        finally:
+            # Flush even if the leader is cancelled: followers are waiting on it.
+            # No await between closing and flushing, so nothing merges into a closed write.
+            pending.closed = True
+            if self._pending.get(key) is pending:
+                del self._pending[key]
+            self._flush(key, pending, flush)
+        return pending.future.result()
+
+    @staticmethod
+    def _flush(key: Hashable, pending: _PendingWrite, flush: Callable[[Dict[str, Any]], Any]) -> None:
+        metrics.increment("coalesced_flushes", table=key[0] if isinstance(key, tuple) else key)
+        try:
+            result = flush(pending.values)
+        except Exception as exc:
+            pending.future.set_exception(exc)
+            if pending.merged == 1:
+                # Only the leader sees the error; mark it retrieved so asyncio does not warn
+                pending.future.exception()
+            raise
+        pending.future.set_result(result)
+
+    async def settle(self, key: Hashable) -> None:
+        """Wait for a pending write on key, so a read issued alongside a PATCH sees it"""
+        pending = self._pending.get(key)
+        if pending is not None:
+            try:
+                await asyncio.shield(pending.future)
+            except Exception:
+                pass
+
+write_coalescer = WriteCoalescer(window_seconds=float(os.getenv("WRITE_COALESCE_MS", "20")) / 1000.0)
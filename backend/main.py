@@ -1,18 +1,41 @@
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
+import os
 import uvicorn
 
 from app.database import engine
 from app.models import Base
-from app.routers import assets, liabilities, income, expenses, bills, categories, settings, kpis, scenarios
+from app.middleware import CompressionMiddleware, ProfilingMiddleware, compression_stats
+from app.services.metrics import metrics
+from app.services.fx import FxService, UnknownCurrencyError, FX_RATES_FILE
+from app.services.jobs import job_queue
+from app.services.kpi_history import KpiHistoryService
+from app.routers import assets, liabilities, income, expenses, bills, categories, settings, kpis, scenarios, planners, fx_rates, search, jobs
 
 # Create tables on startup
 Base.metadata.create_all(bind=engine)
 
+# Exchange rates come from a local file; POST /api/v1/fx-rates/reload picks up edits
+if os.path.exists(FX_RATES_FILE):
+    FxService.load_file(FX_RATES_FILE)
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Background job workers live as long as the app
+    await job_queue.start()
+    yield
+    await job_queue.stop()
+    # KPI history points still waiting out their delay
+    await asyncio.to_thread(KpiHistoryService.flush)
+
 app = FastAPI(
     title="Budget Planner API",
     description="A comprehensive budget planning and scenario simulation API",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -24,6 +47,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Opt-in request profiling (PROFILE_TOKEN); inside compression so profiles are compressed too
+app.add_middleware(ProfilingMiddleware)
+
+# Response compression (gzip, plus brotli when installed)
+app.add_middleware(CompressionMiddleware)
+
 # Include routers
 app.include_router(assets.router, prefix="/api/v1", tags=["assets"])
 app.include_router(liabilities.router, prefix="/api/v1", tags=["liabilities"])
@@ -34,6 +63,14 @@ app.include_router(categories.router, prefix="/api/v1", tags=["categories"])
 app.include_router(settings.router, prefix="/api/v1", tags=["settings"])
 app.include_router(kpis.router, prefix="/api/v1", tags=["kpis"])
 app.include_router(scenarios.router, prefix="/api/v1", tags=["scenarios"])
+app.include_router(planners.router, prefix="/api/v1", tags=["planners"])
+app.include_router(fx_rates.router, prefix="/api/v1", tags=["fx-rates"])
+app.include_router(search.router, prefix="/api/v1", tags=["search"])
+app.include_router(jobs.router, prefix="/api/v1", tags=["jobs"])
+
+@app.exception_handler(UnknownCurrencyError)
+async def unknown_currency_handler(request: Request, exc: UnknownCurrencyError):
+    return JSONResponse(status_code=422, content={"detail": str(exc)})
 
 @app.get("/")
 async def root():
@@ -43,5 +80,9 @@ async def root():
 async def health_check():
     return {"status": "healthy", "service": "budget-planner-api"}
 
+@app.get("/metrics")
+async def get_metrics():
+    return {"counters": metrics.snapshot(), "compression": compression_stats()}
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=3000, reload=True)
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Admin tooling for per-household SQLite shards (DATABASE_SHARDING=household).
+
+    python manage_shards.py list                 # households, planners and file size per shard
+    python manage_shards.py create-tables        # create missing tables in every shard
+    python manage_shards.py exec "<SQL>"         # run one statement against every shard
+    python manage_shards.py split                # move each household's rows from the
+                                                 # directory database into its shard
+    python manage_shards.py index-items          # enter every shard's item ids in the
+                                                 # directory (item_households)
+"""
+
+import os
+import sys
+import uuid
+
+from sqlalchemy import delete, select, text
+
+from app.database.connection import engine
+from app.database.sharding import ITEM_TABLES, ShardRouter
+from app.models import Base
+
+# Kept in the directory after a split: the planner -> household map and who owns what
+DIRECTORY_TABLES = ("app_users", "households", "household_members", "planners")
+# Only ever in the main database
+MAIN_TABLES = ("jobs", "item_households")
+
+def get_router() -> ShardRouter:
+    return ShardRouter(engine, os.getenv("SHARD_DIRECTORY", "./shards"))
+
+def list_shards():
+    router = get_router()
+    for household_key, shard_engine in router.iter_shards():
+        with shard_engine.connect() as connection:
+            planners = connection.execute(text("SELECT COUNT(*) FROM planners")).scalar()
+        size_kb = os.path.getsize(router.shard_path(household_key)) / 1024
+        print(f"{household_key}  planners={planners}  size={size_kb:.0f} KB")
+
+def create_tables():
+    for household_key, shard_engine in get_router().iter_shards():
+        Base.metadata.create_all(bind=shard_engine)
+        print(f"{household_key}: tables up to date")
+
+def exec_all(statement: str):
+    for household_key, shard_engine in get_router().iter_shards():
+        with shard_engine.begin() as connection:
+            result = connection.execute(text(statement))
+            if result.returns_rows:
+                for row in result:
+                    print(household_key, tuple(row))
+            else:
+                print(f"{household_key}: {result.rowcount} rows")
+
+def index_items(connection, household_id, item_ids) -> None:
+    """Enter item ids of one household in the directory; the caller commits"""
+    rows = [{"id": item_id, "household_id": household_id} for item_id in item_ids]
+    if rows:
+        connection.execute(Base.metadata.tables["item_households"].insert().prefix_with("OR REPLACE"), rows)
+
+def index_all():
+    """Enter the ids of every shard's items in the directory, e.g. for shards split before it existed"""
+    tables = Base.metadata.tables
+    with engine.begin() as directory:
+        for household_key, shard_engine in get_router().iter_shards():
+            with shard_engine.connect() as connection:
+                item_ids = [
+                    item_id for name in ITEM_TABLES
+                    for item_id in connection.execute(select(tables[name].c.id)).scalars()
+                ]
+            index_items(directory, uuid.UUID(household_key), item_ids)
+            print(f"{household_key}: {len(item_ids)} ids")
+
+def split():
+    """
+    Move every household's rows from the directory database into its shard. Planner
+    data is deleted from the directory once its shard has committed the copy; the
+    DIRECTORY_TABLES rows stay, copied, since the directory still routes planners,
+    and the moved items' ids are entered in item_households.
+    """
+    router = get_router()
+    tables = Base.metadata.tables
+    with engine.connect() as source:
+        households = source.execute(select(tables["households"].c.id)).scalars().all()
+        for household_id in households:
+            planners = tables["planners"]
+            planner_ids = source.execute(
+                select(planners.c.id).where(planners.c.household_id == household_id)
+            ).scalars().all()
+            scenario_ids = source.execute(
+                select(tables["scenario_settings"].c.id).where(tables["scenario_settings"].c.planner_id.in_(planner_ids))
+            ).scalars().all()
+            user_ids = set(source.execute(
+                select(tables["household_members"].c.user_id).where(tables["household_members"].c.household_id == household_id)
+            ).scalars())
+            user_ids.add(source.execute(
+                select(tables["households"].c.owner_user_id).where(tables["households"].c.id == household_id)
+            ).scalar())
+
+            scopes = {
+                "app_users": lambda t: t.c.id.in_(user_ids),
+                "households": lambda t: t.c.id == household_id,
+                "household_members": lambda t: t.c.household_id == household_id,
+                "planners": lambda t: t.c.household_id == household_id,
+                "scenario_items": lambda t: t.c.scenario_id.in_(scenario_ids),
+            }
+            copied = 0
+            moved = []
+            with router.engine(household_id).begin() as target:
+                for table in Base.metadata.sorted_tables:
+                    if table.name in MAIN_TABLES:
+                        continue
+                    if table.name in scopes:
+                        condition = scopes[table.name](table)
+                    elif "planner_id" in table.c:
+                        condition = table.c.planner_id.in_(planner_ids)
+                    else:
+                        continue
+                    # Generated columns (the *_cents money copies) are recomputed by the shard
+                    stored = [column for column in table.c if column.computed is None]
+                    rows = [dict(row._mapping) for row in source.execute(select(*stored).where(condition))]
+                    if rows:
+                        target.execute(table.insert().prefix_with("OR REPLACE"), rows)
+                        copied += len(rows)
+                        if table.name in ITEM_TABLES:
+                            index_items(source, household_id, [row["id"] for row in rows])
+                    if table.name not in DIRECTORY_TABLES:
+                        moved.append((table, condition))
+            # Children before parents, so no foreign key points at a deleted row
+            removed = 0
+            for table, condition in reversed(moved):
+                removed += source.execute(delete(table).where(condition)).rowcount
+            source.commit()
+            print(f"{household_id.hex}: {len(planner_ids)} planners, {copied} rows copied, {removed} removed from the directory")
+    router.dispose()
+
+if __name__ == "__main__":
+    command = sys.argv[1] if len(sys.argv) > 1 else "list"
+    if command == "list":
+        list_shards()
+    elif command == "create-tables":
+        create_tables()
+    elif command == "exec" and len(sys.argv) > 2:
+        exec_all(sys.argv[2])
+    elif command == "split":
+        split()
+    elif command == "index-items":
+        index_all()
+    else:
+        print(__doc__)
+        sys.exit(1)
@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""Add bill payment schedule columns (first_due_month, due_month_mask) to the bills table"""
+
+import sqlite3
+
+from app.services.bill_schedule import BillScheduleService
+
+def migrate_bill_schedule():
+    conn = sqlite3.connect('budget_planner.db')
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("PRAGMA table_info(bills)")
+        columns = [column[1] for column in cursor.fetchall()]
+        
+        if 'first_due_month' not in columns:
+            cursor.execute("ALTER TABLE bills ADD COLUMN first_due_month INTEGER NOT NULL DEFAULT 1")
+            print("Added first_due_month column")
+        
+        if 'due_month_mask' not in columns:
+            cursor.execute(f"ALTER TABLE bills ADD COLUMN due_month_mask INTEGER NOT NULL DEFAULT {0xFFF}")
+            print("Added due_month_mask column")
+        
+        # Backfill monthly averages that were previously patched on every read
+        cursor.execute("""
+            UPDATE bills
+            SET monthly_average = bill_amount * 1.0 / interval_months
+            WHERE monthly_average = 0 AND bill_amount > 0 AND interval_months > 0
+        """)
+        
+        # Precompute due month masks from the anchor month and interval
+        cursor.execute("SELECT id, first_due_month, interval_months FROM bills")
+        updates = [
+            (BillScheduleService.due_month_mask(first_due_month, interval_months), bill_id)
+            for bill_id, first_due_month, interval_months in cursor.fetchall()
+        ]
+        cursor.executemany("UPDATE bills SET due_month_mask = ? WHERE id = ?", updates)
+        print(f"Updated schedule for {len(updates)} bills")
+        
+        conn.commit()
+        print("Success!")
+        
+    except Exception as e:
+        print(f"Error: {e}")
+        conn.rollback()
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    migrate_bill_schedule()
@@ -0,0 +1,38 @@
+#!/usr/bin/env python3
+"""
+Database migration script for the category totals endpoint.
+Adds a (planner_id, category_id) index on the tables it groups by category.
+"""
+
+import sqlite3
+import os
+
+CATEGORY_TABLES = ["expenses", "bills"]
+
+def migrate_category_index():
+    """Add the planner/category indexes"""
+
+    db_path = "budget_planner.db"
+    if not os.path.exists(db_path):
+        print(f"Database file {db_path} not found!")
+        return
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    try:
+        for table in CATEGORY_TABLES:
+            print(f"Indexing {table}.category_id...")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_planner_category ON {table} (planner_id, category_id)")
+
+        conn.commit()
+        print("Migration completed successfully!")
+
+    except Exception as e:
+        print(f"Error during migration: {e}")
+        conn.rollback()
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    migrate_category_index()
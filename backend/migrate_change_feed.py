@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Database migration script for the planner change feed.
+Adds a (planner_id, updated_at) index on every table the feed reads and the
+change_tombstones table that records deletes.
+"""
+
+import sqlite3
+import os
+
+FEED_TABLES = ["scenario_settings", "categories", "assets", "liabilities", "income", "expenses", "bills"]
+
+def migrate_change_feed():
+    """Add updated_at indexes and the tombstone table"""
+
+    db_path = "budget_planner.db"
+    if not os.path.exists(db_path):
+        print(f"Database file {db_path} not found!")
+        return
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    try:
+        for table in FEED_TABLES:
+            print(f"Indexing {table}.updated_at...")
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS ix_{table}_planner_updated ON {table} (planner_id, updated_at)")
+
+        print("Creating change_tombstones table...")
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS change_tombstones (
+                id CHAR(32) NOT NULL PRIMARY KEY,
+                planner_id CHAR(32) NOT NULL REFERENCES planners(id),
+                entity_type VARCHAR NOT NULL,
+                entity_id CHAR(32) NOT NULL,
+                deleted_at DATETIME NOT NULL
+            )
+        """)
+        cursor.execute("CREATE INDEX IF NOT EXISTS ix_change_tombstones_planner_deleted ON change_tombstones (planner_id, deleted_at)")
+
+        conn.commit()
+        print("Migration completed successfully!")
+
+    except Exception as e:
+        print(f"Error during migration: {e}")
+        conn.rollback()
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    print("Starting change feed migration...")
+    migrate_change_feed()
+    print("Migration script completed.")
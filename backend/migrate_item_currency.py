@@ -0,0 +1,37 @@
+#!/usr/bin/env python3
+"""
+Add the per-item currency_code column to the item tables.
+
+Existing items keep NULL, which means the planner's reporting currency, so totals do
+not change until an item is given another currency. The fx_rates table itself is
+created by create_all on startup.
+"""
+
+import sqlite3
+
+ITEM_TABLES = ["assets", "liabilities", "income", "expenses", "bills"]
+
+def migrate_item_currency():
+    conn = sqlite3.connect('budget_planner.db')
+    cursor = conn.cursor()
+    
+    try:
+        for table in ITEM_TABLES:
+            cursor.execute(f"PRAGMA table_info({table})")
+            columns = [column[1] for column in cursor.fetchall()]
+            
+            if "currency_code" not in columns:
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN currency_code VARCHAR(3)")
+                print(f"Added {table}.currency_code")
+        
+        conn.commit()
+        print("Migration completed successfully!")
+        
+    except Exception as e:
+        print(f"Error during migration: {e}")
+        conn.rollback()
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    migrate_item_currency()
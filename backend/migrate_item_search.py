@@ -0,0 +1,33 @@
+#!/usr/bin/env python3
+"""
+Add the FTS5 search indexes and their sync triggers to the item tables, replacing
+indexes of an earlier layout (keyed on rowid), and fill them from the current rows.
+Safe to re-run.
+"""
+
+import sqlite3
+
+from app.models.search import SEARCH_TABLES, drop_search_ddl, search_ddl
+
+def migrate_item_search():
+    conn = sqlite3.connect('budget_planner.db')
+    cursor = conn.cursor()
+    
+    try:
+        for table in SEARCH_TABLES:
+            for statement in drop_search_ddl(table) + search_ddl(table):
+                cursor.execute(statement)
+            cursor.execute(f"INSERT INTO {table}_search(id, name, notes) SELECT id, name, notes FROM {table}")
+            print(f"Indexed {table}")
+        
+        conn.commit()
+        print("Migration completed successfully!")
+        
+    except Exception as e:
+        print(f"Error during migration: {e}")
+        conn.rollback()
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    migrate_item_search()
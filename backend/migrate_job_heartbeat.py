@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+"""
+Database migration script for job ownership.
+Adds the worker_id and heartbeat_at columns to the jobs table, so a starting process
+only queues again the running jobs whose worker is gone.
+"""
+
+import sqlite3
+import os
+
+def migrate_job_heartbeat():
+    """Add worker_id and heartbeat_at to jobs"""
+
+    db_path = "budget_planner.db"
+    if not os.path.exists(db_path):
+        print(f"Database file {db_path} not found!")
+        return
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("PRAGMA table_info(jobs)")
+        columns = [column[1] for column in cursor.fetchall()]
+        if not columns:
+            print("No jobs table yet; it is created with the new columns on startup.")
+            return
+
+        if "worker_id" not in columns:
+            print("Adding jobs.worker_id...")
+            cursor.execute("ALTER TABLE jobs ADD COLUMN worker_id VARCHAR")
+        if "heartbeat_at" not in columns:
+            print("Adding jobs.heartbeat_at...")
+            cursor.execute("ALTER TABLE jobs ADD COLUMN heartbeat_at DATETIME")
+
+        conn.commit()
+        print("Migration completed successfully!")
+
+    except Exception as e:
+        print(f"Error during migration: {e}")
+        conn.rollback()
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    print("Starting job heartbeat migration...")
+    migrate_job_heartbeat()
+    print("Migration script completed.")
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Add the generated *_cents columns (money in integer minor units) to the item tables.
+
+SQLite can only add generated columns as VIRTUAL; they are computed on read with the
+same expression as the STORED columns of new databases, so queries behave the same.
+"""
+
+import sqlite3
+
+# table -> money columns that get a <column>_cents copy
+MONEY_COLUMNS = {
+    "assets": ["sale_value"],
+    "liabilities": ["monthly_cost", "principal"],
+    "income": ["monthly_amount"],
+    "expenses": ["monthly_amount"],
+    "bills": ["bill_amount", "monthly_average"],
+}
+
+def migrate_money_cents():
+    conn = sqlite3.connect('budget_planner.db')
+    cursor = conn.cursor()
+    
+    try:
+        # Monthly averages used to be stored unrounded; keep them to the cent like new writes
+        cursor.execute("""
+            UPDATE bills
+            SET monthly_average = ROUND(monthly_average, 2), monthly_amount = ROUND(monthly_average, 2)
+            WHERE monthly_average != ROUND(monthly_average, 2)
+        """)
+        print(f"Rounded {cursor.rowcount} bill monthly averages")
+        
+        for table, money_columns in MONEY_COLUMNS.items():
+            # table_xinfo also lists generated columns, which table_info hides
+            cursor.execute(f"PRAGMA table_xinfo({table})")
+            columns = [column[1] for column in cursor.fetchall()]
+            
+            for column in money_columns:
+                if f"{column}_cents" not in columns:
+                    cursor.execute(
+                        f"ALTER TABLE {table} ADD COLUMN {column}_cents BIGINT "
+                        f"GENERATED ALWAYS AS (CAST(ROUND({column} * 100) AS BIGINT)) VIRTUAL"
+                    )
+                    print(f"Added {table}.{column}_cents")
+        
+        conn.commit()
+        print("Migration completed successfully!")
+        
+    except Exception as e:
+        print(f"Error during migration: {e}")
+        conn.rollback()
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    migrate_money_cents()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Database migration script for bitmask scenario membership.
+Adds scenario_settings.scenario_bit and a scenario_mask column on every item
+table, then backfills the masks from the scenario_items junction table.
+"""
+
+import sqlite3
+import os
+
+ITEM_TABLES = {
+    "asset": "assets",
+    "liability": "liabilities",
+    "income": "income",
+    "expense": "expenses",
+    "bill": "bills",
+}
+
+def migrate_scenario_bitmask():
+    """Add scenario bits and item scenario masks"""
+    
+    db_path = "budget_planner.db"
+    if not os.path.exists(db_path):
+        print(f"Database file {db_path} not found!")
+        return
+    
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+    
+    try:
+        cursor.execute("PRAGMA table_info(scenario_settings)")
+        columns = [column[1] for column in cursor.fetchall()]
+        
+        if 'scenario_bit' not in columns:
+            print("Adding scenario_bit column...")
+            cursor.execute("ALTER TABLE scenario_settings ADD COLUMN scenario_bit INTEGER")
+        
+        # Assign bits per planner in creation order
+        print("Assigning scenario bits...")
+        next_bit = {}
+        cursor.execute("SELECT planner_id, MAX(scenario_bit) FROM scenario_settings WHERE scenario_bit IS NOT NULL GROUP BY planner_id")
+        for planner_id, max_bit in cursor.fetchall():
+            next_bit[planner_id] = max_bit + 1
+        cursor.execute("SELECT id, planner_id FROM scenario_settings WHERE scenario_bit IS NULL ORDER BY created_at")
+        for scenario_id, planner_id in cursor.fetchall():
+            bit = next_bit.get(planner_id, 0)
+            if bit >= 63:
+                print(f"  Skipping scenario {scenario_id}: planner already has 63 scenarios")
+                continue
+            cursor.execute("UPDATE scenario_settings SET scenario_bit = ? WHERE id = ?", (bit, scenario_id))
+            next_bit[planner_id] = bit + 1
+        
+        cursor.execute("""
+            CREATE UNIQUE INDEX IF NOT EXISTS ix_scenario_settings_planner_bit
+            ON scenario_settings(planner_id, scenario_bit)
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS ix_scenario_items_scenario_item
+            ON scenario_items(scenario_id, item_type, item_id)
+        """)
+        
+        for item_type, table in ITEM_TABLES.items():
+            cursor.execute(f"PRAGMA table_info({table})")
+            columns = [column[1] for column in cursor.fetchall()]
+            if 'scenario_mask' not in columns:
+                print(f"Adding scenario_mask column to {table}...")
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN scenario_mask BIGINT NOT NULL DEFAULT 0")
+            
+            # Rebuild masks from the junction table
+            print(f"Backfilling {table}.scenario_mask...")
+            cursor.execute(f"""
+                UPDATE {table}
+                SET scenario_mask = COALESCE((
+                    SELECT SUM(1 << ss.scenario_bit)
+                    FROM scenario_items si
+                    JOIN scenario_settings ss ON ss.id = si.scenario_id
+                    WHERE si.item_type = ? AND si.item_id = {table}.id
+                    AND ss.scenario_bit IS NOT NULL
+                ), 0)
+            """, (item_type,))
+        
+        conn.commit()
+        print("Migration completed successfully!")
+        
+    except Exception as e:
+        print(f"Error during migration: {e}")
+        conn.rollback()
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    print("Starting scenario bitmask migration...")
+    migrate_scenario_bitmask()
+    print("Migration script completed.")
@@ -0,0 +1,51 @@
+#!/usr/bin/env python3
+"""
+Database migration script for copy-on-write scenario forks.
+Adds scenario_settings.parent_id and a scenario_exclude_mask column on every
+item table. Existing scenarios have no parent and no exclusions.
+"""
+
+import sqlite3
+import os
+
+ITEM_TABLES = ["assets", "liabilities", "income", "expenses", "bills"]
+
+def migrate_scenario_forks():
+    """Add scenario parents and item exclusion masks"""
+
+    db_path = "budget_planner.db"
+    if not os.path.exists(db_path):
+        print(f"Database file {db_path} not found!")
+        return
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("PRAGMA table_info(scenario_settings)")
+        columns = [column[1] for column in cursor.fetchall()]
+
+        if 'parent_id' not in columns:
+            print("Adding parent_id column...")
+            cursor.execute("ALTER TABLE scenario_settings ADD COLUMN parent_id CHAR(32) REFERENCES scenario_settings(id)")
+
+        for table in ITEM_TABLES:
+            cursor.execute(f"PRAGMA table_info({table})")
+            columns = [column[1] for column in cursor.fetchall()]
+            if 'scenario_exclude_mask' not in columns:
+                print(f"Adding scenario_exclude_mask column to {table}...")
+                cursor.execute(f"ALTER TABLE {table} ADD COLUMN scenario_exclude_mask BIGINT NOT NULL DEFAULT 0")
+
+        conn.commit()
+        print("Migration completed successfully!")
+
+    except Exception as e:
+        print(f"Error during migration: {e}")
+        conn.rollback()
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    print("Starting scenario fork migration...")
+    migrate_scenario_forks()
+    print("Migration script completed.")
@@ -71,6 +71,8 @@ def create_seed_data():
             id=uuid.uuid4(),
             planner_id=planner.id,
             scenario="A",
+            display_name="Keep everything",
+            scenario_bit=0,
             sale_month=0  # No sales
         )
         db.add(scenario_a)
@@ -79,6 +81,8 @@ def create_seed_data():
             id=uuid.uuid4(),
             planner_id=planner.id,
             scenario="B",
+            display_name="Sell in month 3",
+            scenario_bit=1,
             sale_month=3  # Sell in month 3
         )
         db.add(scenario_b)
@@ -87,6 +91,8 @@ def create_seed_data():
             id=uuid.uuid4(),
             planner_id=planner.id,
             scenario="C",
+            display_name="Sell in month 1",
+            scenario_bit=2,
             sale_month=1  # Sell in month 1
         )
         db.add(scenario_c)
@@ -262,6 +268,8 @@ def create_seed_data():
             interval_months=12,
             monthly_average=Decimal("100.00"),
             monthly_amount=Decimal("100.00"),  # Legacy field
+            first_due_month=3,
+            due_month_mask=0b000000000100,  # March
             category_id=categories[0].id,  # Housing category
             linked_asset_id=house.id,
             notes="Annual home insurance premium"
@@ -278,6 +286,8 @@ def create_seed_data():
             interval_months=12,
             monthly_average=Decimal("200.00"),
             monthly_amount=Decimal("200.00"),  # Legacy field
+            first_due_month=9,
+            due_month_mask=0b000100000000,  # September
             category_id=categories[0].id,  # Housing category
             linked_asset_id=house.id,
             notes="Annual property tax"
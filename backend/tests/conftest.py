@@ -0,0 +1,39 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND)
+
+# The app binds its engine at import, so the test database is chosen before importing it
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(prefix="budget-planner-tests-"), "test.db")
+os.environ["FX_RATES_FILE"] = os.path.join(BACKEND, "fx_rates.csv")
+os.environ["JOB_WORKERS"] = "0"
+os.environ["KPI_HISTORY_DELAY_SECONDS"] = "3600"  # Tests record scheduled KPI history with flush()
+
+from fastapi.testclient import TestClient
+from sqlalchemy import delete
+
+import main
+import seed_data
+from app.database import engine
+from app.models import Base, FxRate
+from app.services.kpi_history import KpiHistoryService
+from app.services.planner_cache import planner_cache
+
+PLANNER_ID = "550e8400-e29b-41d4-a716-446655440000"  # Planner created by seed_data.py
+API = "/api/v1"
+
+@pytest.fixture
+def client():
+    """A client on a freshly seeded database"""
+    with engine.begin() as connection:
+        for table in reversed(Base.metadata.sorted_tables):
+            if table is not FxRate.__table__:
+                connection.execute(delete(table))
+    planner_cache.clear()
+    KpiHistoryService.clear()
+    seed_data.create_seed_data()
+    return TestClient(main.app)
@@ -0,0 +1,72 @@
+import asyncio
+import gzip
+import zlib
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from conftest import API, PLANNER_ID
+from app.middleware import CompressionMiddleware
+
+CHUNK = b'{"row": "' + b"x" * 2000 + b'"}\n'
+
+async def _rows():
+    for _ in range(3):
+        yield CHUNK
+
+def _app(**options):
+    app = Starlette(routes=[
+        Route("/stream", lambda request: StreamingResponse(_rows(), media_type="application/x-ndjson")),
+        Route("/text-stream", lambda request: StreamingResponse(_rows(), media_type="text/plain")),
+        Route("/small", lambda request: JSONResponse({"ok": True})),
+    ])
+    return CompressionMiddleware(app, enable_brotli=False, **options)
+
+def test_streamed_bodies_are_compressed_chunk_by_chunk():
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    async def receive():
+        await asyncio.Event().wait()  # The client never disconnects
+
+    scope = {"type": "http", "method": "GET", "path": "/text-stream", "headers": [(b"accept-encoding", b"gzip")], "query_string": b""}
+    asyncio.run(_app()(scope, receive, send))
+
+    start, *bodies = sent
+    headers = dict(start["headers"])
+    assert headers[b"content-encoding"] == b"gzip"
+    assert b"content-length" not in headers
+    assert headers[b"vary"] == b"Accept-Encoding"
+    # Every chunk went out on its own, flushed so it decodes without the rest
+    chunks = [message["body"] for message in bodies if message["body"]]
+    assert len(chunks) >= 3
+    decoder = zlib.decompressobj(31)
+    assert decoder.decompress(chunks[0]) == CHUNK
+    assert gzip.decompress(b"".join(chunks)) == CHUNK * 3
+
+def test_streams_of_other_types_pass_through():
+    response = TestClient(_app()).get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert "vary" not in response.headers
+    assert response.content == CHUNK * 3
+
+def test_uncompressed_responses_vary_on_accept_encoding():
+    client = TestClient(_app())
+    small = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+    assert small.headers["vary"] == "Accept-Encoding"
+
+    identity = client.get("/text-stream", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in identity.headers
+    assert identity.headers["vary"] == "Accept-Encoding"
+    assert identity.content == CHUNK * 3
+
+def test_api_responses_carry_vary_with_or_without_compression(client):
+    for accept_encoding in ("gzip", "identity"):
+        response = client.get(f"{API}/expenses", params={"planner_id": PLANNER_ID}, headers={"Accept-Encoding": accept_encoding})
+        assert response.status_code == 200
+        assert "Accept-Encoding" in response.headers["vary"]
@@ -0,0 +1,96 @@
+from datetime import datetime, timezone
+import time
+
+from conftest import API, PLANNER_ID
+
+def _expense(client, name):
+    expenses = client.get(f"{API}/expenses", params={"planner_id": PLANNER_ID}).json()
+    return next((expense for expense in expenses if expense["name"] == name), None)
+
+def _monthly_expenses(client, **params):
+    response = client.get(f"{API}/kpis/monthly-totals", params={"planner_id": PLANNER_ID, **params})
+    assert response.status_code == 200, response.text
+    return response.json()["totals"]["monthly_expenses"]
+
+def _now():
+    now = datetime.now(timezone.utc).isoformat()
+    time.sleep(0.01)  # Keeps the next write's timestamp strictly after it
+    return now
+
+def test_as_of_before_the_first_logged_change_returns_the_baseline(client):
+    original = _monthly_expenses(client)
+    before = _now()
+    groceries = _expense(client, "Groceries")
+    assert client.patch(f"{API}/expenses/{groceries['id']}", json={"monthly_amount": "700"}).status_code == 200
+
+    assert _monthly_expenses(client) == original + 100
+    assert _monthly_expenses(client, as_of=before) == original
+    assert _monthly_expenses(client, as_of=_now()) == original + 100
+
+def test_as_of_before_the_log_leaves_out_rows_created_later(client):
+    before = _now()
+    created = client.post(f"{API}/expenses", json={
+        "planner_id": PLANNER_ID, "name": "Gym", "include_toggle": "on", "scenario": "ALL", "monthly_amount": "40",
+    })
+    assert created.status_code == 200
+
+    dashboard = client.get(f"{API}/planners/{PLANNER_ID}/dashboard", params={"as_of": before}).json()
+    assert "Gym" not in [expense["name"] for expense in dashboard["expenses"]]
+    assert "Groceries" in [expense["name"] for expense in dashboard["expenses"]]
+
+def test_as_of_between_changes_replays_events(client):
+    groceries = _expense(client, "Groceries")
+    original = _monthly_expenses(client)
+    client.patch(f"{API}/expenses/{groceries['id']}", json={"monthly_amount": "700"})
+    between = _now()
+    client.patch(f"{API}/expenses/{groceries['id']}", json={"monthly_amount": "900"})
+
+    assert _monthly_expenses(client, as_of=between) == original + 100
+    assert _monthly_expenses(client) == original + 300
+
+def test_undo_reverts_an_update(client):
+    groceries = _expense(client, "Groceries")
+    original = _monthly_expenses(client)
+    client.patch(f"{API}/expenses/{groceries['id']}", json={"monthly_amount": "700", "notes": "changed"})
+
+    response = client.post(f"{API}/planners/{PLANNER_ID}/undo")
+    assert response.status_code == 200
+    assert response.json()["events"] == 1
+    restored = _expense(client, "Groceries")
+    assert restored["monthly_amount"] == groceries["monthly_amount"]
+    assert restored["notes"] == groceries["notes"]
+    assert _monthly_expenses(client) == original
+
+def test_undo_restores_a_deleted_item(client):
+    groceries = _expense(client, "Groceries")
+    original = _monthly_expenses(client)
+    assert client.delete(f"{API}/expenses/{groceries['id']}").status_code == 200
+    assert _expense(client, "Groceries") is None
+
+    assert client.post(f"{API}/planners/{PLANNER_ID}/undo").status_code == 200
+    restored = _expense(client, "Groceries")
+    assert restored["id"] == groceries["id"]
+    assert restored["created_at"] == groceries["created_at"]
+    assert _monthly_expenses(client) == original
+
+def test_undo_removes_a_created_item(client):
+    original = _monthly_expenses(client)
+    created = client.post(f"{API}/expenses", json={
+        "planner_id": PLANNER_ID, "name": "Gym", "include_toggle": "on", "scenario": "ALL", "monthly_amount": "40",
+    }).json()
+
+    assert client.post(f"{API}/planners/{PLANNER_ID}/undo").status_code == 200
+    assert client.get(f"{API}/expenses/{created['id']}").status_code == 404
+    assert _monthly_expenses(client) == original
+
+def test_undo_walks_back_in_order_and_stops_at_the_start(client):
+    groceries = _expense(client, "Groceries")
+    client.patch(f"{API}/expenses/{groceries['id']}", json={"monthly_amount": "700"})
+    client.patch(f"{API}/expenses/{groceries['id']}", json={"monthly_amount": "900"})
+
+    client.post(f"{API}/planners/{PLANNER_ID}/undo")
+    assert float(_expense(client, "Groceries")["monthly_amount"]) == 700
+    client.post(f"{API}/planners/{PLANNER_ID}/undo")
+    assert float(_expense(client, "Groceries")["monthly_amount"]) == float(groceries["monthly_amount"])
+    # Undos are logged but never undone themselves
+    assert client.post(f"{API}/planners/{PLANNER_ID}/undo").status_code == 404
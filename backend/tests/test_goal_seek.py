@@ -0,0 +1,115 @@
+from itertools import combinations
+import uuid
+
+import numpy as np
+import pytest
+
+from conftest import API, PLANNER_ID
+from app.database import SessionLocal
+from app.services.forecast import ForecastService
+from app.services.goal_seek import CUTTABLE_TYPES, GoalSeekService
+from app.services.planner_snapshot import PlannerSnapshot
+
+def _create(client, path, **fields):
+    response = client.post(f"{API}/{path}", json={"planner_id": PLANNER_ID, "include_toggle": "on", "scenario": "ALL", **fields})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def _add_boat(client):
+    """An unsold asset whose upkeep only counts once it is sold"""
+    boat = _create(client, "assets", name="Boat", include_toggle="off", sale_value="50000")
+    _create(client, "expenses", name="Boat upkeep", monthly_amount="3000", linked_asset_id=boat["id"])
+
+def _add_caravan(client):
+    """An unsold asset carrying a loan, with an expense on that loan"""
+    caravan = _create(client, "assets", name="Caravan", include_toggle="off", sale_value="30000")
+    loan = _create(client, "liabilities", name="Caravan Loan", monthly_cost="900", principal="20000", linked_asset_id=caravan["id"])
+    _create(client, "expenses", name="Caravan Insurance", monthly_amount="1500", linked_liab_id=loan["id"])
+
+def _add_bill(client):
+    _create(client, "bills", name="Internet", bill_amount="240", interval_months=3)
+
+def _value(snapshot, scenario, settings, by_balance, changes):
+    """The goal value after flipping the given items, computed from scratch on a copy"""
+    sandbox = snapshot.copy()
+    for item_type, position in changes:
+        table = sandbox.tables[item_type]
+        sandbox.apply_override(item_type, table.ids[position], include_toggle="off" if table.toggles[position] else "on")
+    totals = sandbox.totals(scenario)
+    if not by_balance:
+        return totals["net_cash_flow"]
+    sale_month = ForecastService.sale_month(settings, scenario)
+    return float(ForecastService.balances(settings["starting_cash"], totals["net_cash_flow"], totals["net_value"], sale_month).min())
+
+def _brute_force(snapshot, scenario, settings, target, by_balance):
+    """Smallest change set reaching the target, trying every subset of every cuttable item and unsold asset"""
+    membership = snapshot.membership(scenario)
+    candidates = [
+        (item_type, int(position))
+        for item_type in CUTTABLE_TYPES
+        for position in np.nonzero(snapshot.tables[item_type].toggles & membership[item_type])[0]
+    ]
+    if by_balance and ForecastService.sale_month(settings, scenario):
+        table = snapshot.tables["asset"]
+        candidates += [("asset", int(position)) for position in np.nonzero(~table.toggles & membership["asset"])[0]]
+    for size in range(len(candidates) + 1):
+        values = [_value(snapshot, scenario, settings, by_balance, changes) for changes in combinations(candidates, size)]
+        if values and max(values) >= target - 1e-6:
+            return size, max(values)
+    return None, None
+
+def _solve_and_check(scenario, target, by_balance):
+    with SessionLocal() as db:
+        snapshot = PlannerSnapshot.load(db, uuid.UUID(PLANNER_ID))
+        settings = ForecastService.settings(db, uuid.UUID(PLANNER_ID))
+    solution = GoalSeekService.solve(
+        snapshot, scenario, settings,
+        min_closing_balance=target if by_balance else None,
+        target_net_cash_flow=None if by_balance else target,
+    )
+    size, best = _brute_force(snapshot, scenario, settings, target, by_balance)
+
+    assert solution["optimal"]
+    assert solution["feasible"] == (size is not None)
+    if size is not None:
+        assert len(solution["changes"]) == size
+        assert solution["value"] >= target - 1e-6
+        assert solution["value"] == pytest.approx(_value(snapshot, scenario, settings, by_balance, solution["changes"]))
+    return solution, best
+
+def test_a_sale_is_combined_with_cutting_the_cost_it_revives(client):
+    _add_boat(client)
+    solution, best = _solve_and_check("C", 328000, by_balance=True)
+
+    assert solution["feasible"]
+    assert best == pytest.approx(328270)
+    with SessionLocal() as db:
+        snapshot = PlannerSnapshot.load(db, uuid.UUID(PLANNER_ID))
+    names = {snapshot.tables[item_type].names[position] for item_type, position in solution["changes"]}
+    assert {"Boat", "Boat upkeep"} <= names
+
+@pytest.mark.parametrize("extras", [(), (_add_boat,), (_add_caravan,), (_add_boat, _add_caravan, _add_bill)])
+@pytest.mark.parametrize("scenario", ["A", "B", "C"])
+def test_solve_matches_brute_force(client, extras, scenario):
+    for add in extras:
+        add(client)
+    with SessionLocal() as db:
+        snapshot = PlannerSnapshot.load(db, uuid.UUID(PLANNER_ID))
+        settings = ForecastService.settings(db, uuid.UUID(PLANNER_ID))
+    baseline_balance = _value(snapshot, scenario, settings, True, [])
+    baseline_cash = _value(snapshot, scenario, settings, False, [])
+
+    for step in (1000, 20000, 100000, 250000, 400000):
+        _solve_and_check(scenario, baseline_balance + step, by_balance=True)
+    for step in (100, 1000, 3000, 10000):
+        _solve_and_check(scenario, baseline_cash + step, by_balance=False)
+
+def test_goal_seek_endpoint(client):
+    _add_boat(client)
+    response = client.post(f"{API}/kpis/goal-seek", json={
+        "planner_id": PLANNER_ID, "scenario": "C", "min_closing_balance": "328000",
+    })
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["feasible"] and body["optimal"]
+    assert {change["name"] for change in body["changes"]} >= {"Boat", "Boat upkeep"}
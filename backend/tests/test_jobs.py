@@ -0,0 +1,60 @@
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+import uuid
+
+from sqlalchemy import update
+
+from conftest import PLANNER_ID
+from app.database import engine
+from app.models import Job
+from app.models.base import utcnow
+from app.services.jobs import JOB_STALE_SECONDS, JobQueue
+
+PLANNER = uuid.UUID(PLANNER_ID)
+
+def _submit(queue):
+    return uuid.UUID(queue.submit(PLANNER, "forecast", {"scenario": "ALL"})["id"])
+
+def _stamp(job_id, **values):
+    with engine.begin() as connection:
+        connection.execute(update(Job).where(Job.id == job_id).values(**values))
+
+def test_only_jobs_of_a_silent_worker_are_queued_again(client):
+    queue = JobQueue(1)
+    alive, gone = _submit(queue), _submit(queue)
+    _stamp(alive, status="running", worker_id="sibling", heartbeat_at=utcnow())
+    _stamp(gone, status="running", worker_id="crashed", heartbeat_at=utcnow() - timedelta(seconds=JOB_STALE_SECONDS + 1))
+
+    assert JobQueue._requeue_stale() == 1
+    assert JobQueue.get(alive)["status"] == "running"
+    assert JobQueue.get(gone)["status"] == "queued"
+
+def test_a_job_claimed_by_another_worker_is_not_finished_twice(client):
+    first, second = JobQueue(1), JobQueue(1)
+    job_id = _submit(first)
+    job = first._claim()
+    assert job.id == job_id
+
+    # The first worker went quiet, its job was queued again and the second one claimed it
+    _stamp(job_id, status="queued", worker_id=None)
+    assert second._claim().id == job_id
+    first._run(job)
+    assert JobQueue.get(job_id)["status"] == "running"
+
+    second._run(job)
+    assert JobQueue.get(job_id)["status"] == "succeeded"
+
+def test_failures_are_retried_once_by_concurrent_workers(client):
+    queue = JobQueue(8)
+    job_id = _submit(queue)
+    assert queue._claim().id == job_id
+    queue._failures[job_id] = ("forecast", "Job could not be completed: database is locked")
+
+    with ThreadPoolExecutor(8) as pool:
+        for future in [pool.submit(queue._retry_failures) for _ in range(8)]:
+            future.result()
+
+    assert queue._failures == {}
+    job = JobQueue.get(job_id)
+    assert job["status"] == "failed"
+    assert job["error"] == "Job could not be completed: database is locked"
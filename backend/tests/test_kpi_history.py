@@ -0,0 +1,107 @@
+import uuid
+
+import pytest
+from sqlalchemy import insert, select
+
+from conftest import API, PLANNER_ID
+from app.database import SessionLocal
+from app.models.kpi_history import KpiHistory
+from app.services.kpi_history import DAY_SECONDS, PERIOD_SECONDS, RAW_DAYS, RETENTION_DAYS, KpiHistoryService
+
+PLANNER = uuid.UUID(PLANNER_ID)
+NOW = 1_800_000_000 - 1_800_000_000 % PERIOD_SECONDS  # The start of a period
+
+def _points(scenario="ALL"):
+    with SessionLocal() as db:
+        return db.execute(
+            select(KpiHistory.period_start, KpiHistory.net_cash_flow)
+            .where(KpiHistory.planner_id == PLANNER, KpiHistory.scenario == scenario)
+            .order_by(KpiHistory.period_start)
+        ).all()
+
+def _groceries(client):
+    expenses = client.get(f"{API}/expenses", params={"planner_id": PLANNER_ID}).json()
+    return next(expense for expense in expenses if expense["name"] == "Groceries")
+
+def _record(now):
+    with SessionLocal() as db:
+        KpiHistoryService.record(db, PLANNER, now=now)
+
+def test_writes_schedule_one_recording_off_the_request(client):
+    groceries = _groceries(client)
+    client.patch(f"{API}/expenses/{groceries['id']}", json={"monthly_amount": "700"})
+    client.patch(f"{API}/expenses/{groceries['id']}", json={"monthly_amount": "800"})
+    assert _points() == []
+
+    KpiHistoryService.flush()
+    points = _points()
+    assert len(points) == 1
+    assert points[0].net_cash_flow == client.get(
+        f"{API}/kpis/monthly-totals", params={"planner_id": PLANNER_ID}
+    ).json()["totals"]["net_cash_flow"]
+
+def test_a_period_keeps_its_last_value(client):
+    groceries = _groceries(client)
+    _record(NOW)
+    first = _points()[0].net_cash_flow
+    client.patch(f"{API}/expenses/{groceries['id']}", json={"monthly_amount": "700"})
+    _record(NOW + PERIOD_SECONDS / 2)
+    assert _points() == [(NOW, first - 100)]
+
+    client.patch(f"{API}/expenses/{groceries['id']}", json={"monthly_amount": "800"})
+    _record(NOW + PERIOD_SECONDS)
+    assert _points() == [(NOW, first - 100), (NOW + PERIOD_SECONDS, first - 200)]
+
+def test_compaction_keeps_the_last_point_per_old_day_and_drops_expired_ones(client):
+    old_day = NOW - int(RAW_DAYS + 2) * DAY_SECONDS
+    old_day -= old_day % DAY_SECONDS
+    recent = NOW - DAY_SECONDS
+    expired = NOW - int(RETENTION_DAYS + 1) * DAY_SECONDS
+    rows = [
+        (expired, 1.0),
+        (old_day, 2.0), (old_day + 3600, 3.0), (old_day + 7200, 4.0),
+        (recent, 5.0), (recent + 3600, 6.0),
+    ]
+    with SessionLocal() as db:
+        db.execute(insert(KpiHistory), [
+            {"planner_id": PLANNER, "scenario": "ALL", "period_start": period, "net_cash_flow": value, "net_value": 0.0}
+            for period, value in rows
+        ])
+        KpiHistoryService.compact(db, PLANNER, NOW)
+        db.commit()
+
+    assert _points() == [(old_day + 7200, 4.0), (recent, 5.0), (recent + 3600, 6.0)]
+
+@pytest.mark.parametrize("method", ["lttb", "bucket"])
+def test_history_range_is_downsampled(client, method):
+    with SessionLocal() as db:
+        db.execute(insert(KpiHistory), [
+            {"planner_id": PLANNER, "scenario": "ALL", "period_start": NOW + hour * 3600,
+             "net_cash_flow": float(hour % 24), "net_value": float(hour)}
+            for hour in range(1000)
+        ])
+        db.commit()
+        series = KpiHistoryService.history(db, PLANNER, "ALL", NOW + 100 * 3600, NOW + 899 * 3600, 50, method)
+
+    for column in ("net_cash_flow", "net_value"):
+        stamps = [stamp for stamp, _ in series[column]]
+        assert 3 <= len(stamps) <= 50
+        assert stamps == sorted(stamps)
+        assert NOW + 100 * 3600 <= stamps[0] and stamps[-1] <= NOW + 899 * 3600
+    if method == "lttb":
+        # The first and last points of the range are kept, and every point is a raw one
+        assert series["net_value"][0] == [NOW + 100 * 3600, 100.0]
+        assert series["net_value"][-1] == [NOW + 899 * 3600, 899.0]
+        assert all(value == (stamp - NOW) / 3600 for stamp, value in series["net_value"])
+    else:
+        # Bucket averages of a straight line stay on it, half a bucket past each bucket start
+        width = 799 * 3600 / 50
+        assert all(
+            value == pytest.approx((stamp - NOW) / 3600 + width / 7200, abs=1)
+            for stamp, value in series["net_value"]
+        )
+
+def test_history_endpoint(client):
+    response = client.get(f"{API}/kpis/history", params={"planner_id": PLANNER_ID, "points": 10})
+    assert response.status_code == 200
+    assert response.json()["series"] == {"net_cash_flow": [], "net_value": []}
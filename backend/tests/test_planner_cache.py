@@ -0,0 +1,75 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+import uuid
+
+import pytest
+
+from app.services.metrics import metrics
+from app.services.planner_cache import PlannerCache
+
+PLANNER = uuid.uuid4()
+
+class _Computation:
+    """A computation that blocks until released and counts its runs"""
+
+    def __init__(self, result="snapshot"):
+        self.result = result
+        self.runs = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self):
+        self.runs += 1
+        self.started.set()
+        assert self.release.wait(5)
+        if isinstance(self.result, Exception):
+            raise self.result
+        return self.result
+
+def _wait_for_waiters(kind, before, count):
+    deadline = time.monotonic() + 5
+    while metrics.get("single_flight_coalesced", kind=kind) < before + count:
+        assert time.monotonic() < deadline, "callers never joined the computation"
+        time.sleep(0.005)
+
+@pytest.mark.parametrize("outcome", ["snapshot", ValueError("Planner not found")])
+def test_concurrent_callers_share_one_computation(outcome):
+    cache, compute = PlannerCache(), _Computation(outcome)
+    before = metrics.get("single_flight_coalesced", kind="shared")
+    with ThreadPoolExecutor(8) as pool:
+        futures = [pool.submit(cache.coalesce, PLANNER, ("shared", "ALL"), compute) for _ in range(8)]
+        _wait_for_waiters("shared", before, 7)
+        compute.release.set()
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except ValueError as error:
+                results.append(error)
+
+    assert compute.runs == 1
+    assert results == [outcome] * 8
+
+def test_get_or_compute_stores_the_shared_result():
+    cache, compute = PlannerCache(), _Computation()
+    compute.release.set()
+    assert cache.get_or_compute(PLANNER, "snapshot", compute) == "snapshot"
+    assert cache.get_or_compute(PLANNER, "snapshot", compute) == "snapshot"
+    assert compute.runs == 1
+
+def test_invalidate_during_a_computation_discards_its_result():
+    cache, stale = PlannerCache(), _Computation("stale")
+    with ThreadPoolExecutor(1) as pool:
+        future = pool.submit(cache.get_or_compute, PLANNER, "snapshot", stale)
+        assert stale.started.wait(5)
+        cache.invalidate(PLANNER)
+
+        # A caller arriving after the write does not join the stale computation
+        fresh = _Computation("fresh")
+        fresh.release.set()
+        assert cache.coalesce(PLANNER, "snapshot", fresh) == "fresh"
+        stale.release.set()
+        assert future.result() == "stale"
+
+    assert cache.get(PLANNER, "snapshot") is None
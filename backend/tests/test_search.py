@@ -0,0 +1,45 @@
+from sqlalchemy import text
+
+from conftest import API, PLANNER_ID
+from app.database import engine
+
+def _search(client, q, **params):
+    response = client.get(f"{API}/search", params={"planner_id": PLANNER_ID, "q": q, **params})
+    assert response.status_code == 200, response.text
+    return [(result["item_type"], result["name"]) for result in response.json()["results"]]
+
+def _create_expense(client, name, notes=None):
+    response = client.post(f"{API}/expenses", json={
+        "planner_id": PLANNER_ID, "name": name, "notes": notes, "include_toggle": "on", "scenario": "ALL", "monthly_amount": "10",
+    })
+    assert response.status_code == 200, response.text
+    return response.json()
+
+def test_search_matches_prefixes_across_item_types(client):
+    assert ("expense", "Groceries") in _search(client, "groc")
+    assert _search(client, "groc", item_type="bill") == []
+
+def test_index_follows_renames_and_deletes(client):
+    gym = _create_expense(client, "Gym membership", notes="Climbing hall")
+    assert _search(client, "climbing") == [("expense", "Gym membership")]
+
+    client.patch(f"{API}/expenses/{gym['id']}", json={"name": "Bouldering pass"})
+    assert _search(client, "gym") == []
+    assert _search(client, "boulder") == [("expense", "Bouldering pass")]
+
+    client.delete(f"{API}/expenses/{gym['id']}")
+    assert _search(client, "boulder") == []
+
+def test_hits_stay_on_their_items_after_vacuum(client):
+    created = [_create_expense(client, f"Subscription {word}") for word in ("alpha", "bravo", "charlie", "delta")]
+    client.delete(f"{API}/expenses/{created[0]['id']}")
+    client.delete(f"{API}/expenses/{created[2]['id']}")
+    # VACUUM may renumber the rowids of tables without an INTEGER PRIMARY KEY
+    with engine.connect() as connection:
+        connection.execution_options(isolation_level="AUTOCOMMIT").execute(text("VACUUM"))
+
+    results = client.get(f"{API}/search", params={"planner_id": PLANNER_ID, "q": "subscription"}).json()["results"]
+    assert sorted((result["id"], result["name"]) for result in results) == sorted(
+        (item["id"], item["name"]) for item in (created[1], created[3])
+    )
+    assert _search(client, "delta") == [("expense", "Subscription delta")]
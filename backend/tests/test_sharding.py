@@ -0,0 +1,79 @@
+import uuid
+
+import pytest
+from sqlalchemy import func, select
+
+from conftest import API, PLANNER_ID
+import manage_shards
+from app.database import connection, engine
+from app.database.sharding import ShardRouter
+from app.models import Expense, ItemHousehold, Planner
+from app.routers import kpis, scenarios
+from app.services import crud
+
+@pytest.fixture
+def sharded(client, tmp_path, monkeypatch):
+    """The seeded planner split into its household's shard, served with DATABASE_SHARDING=household"""
+    monkeypatch.setenv("SHARD_DIRECTORY", str(tmp_path))
+    manage_shards.split()
+    router = ShardRouter(engine, str(tmp_path))
+    monkeypatch.setattr(connection, "shard_router", router)
+    for module in (kpis, scenarios, crud):
+        monkeypatch.setattr(module, "shard_router", router)
+    # Item ids resolve through the directory, never by opening every shard
+    monkeypatch.setattr(router, "iter_shards", None)
+    yield router
+    router.dispose()
+
+def _count(bind, model, *criteria):
+    with bind.connect() as db:
+        return db.execute(select(func.count()).select_from(model).where(*criteria)).scalar()
+
+def _shard_engine(router):
+    return router.engine(router.household_for_planner(PLANNER_ID))
+
+def test_split_moves_planner_data_out_of_the_directory(sharded):
+    assert _count(engine, Expense) == 0
+    assert _count(engine, Planner, Planner.id == uuid.UUID(PLANNER_ID)) == 1
+    assert _count(_shard_engine(sharded), Expense) == 2
+    with _shard_engine(sharded).connect() as shard:
+        expense_ids = shard.execute(select(Expense.id)).scalars().all()
+    assert _count(engine, ItemHousehold, ItemHousehold.id.in_(expense_ids)) == 2
+
+def test_created_items_are_entered_in_the_directory(client, sharded):
+    created = client.post(f"{API}/expenses", json={
+        "planner_id": PLANNER_ID, "name": "Gym", "include_toggle": "on", "scenario": "ALL", "monthly_amount": "40",
+    }).json()
+    assert _count(engine, ItemHousehold, ItemHousehold.id == uuid.UUID(created["id"])) == 1
+    sharded._directory.clear()  # Resolved from the directory table, not the entry cached on create
+    assert client.patch(f"{API}/expenses/{created['id']}", json={"monthly_amount": "45"}).status_code == 200
+
+    scenario = client.post(f"{API}/scenarios", json={
+        "planner_id": PLANNER_ID, "scenario": "D", "display_name": "Downsize", "sale_month": 2,
+    })
+    assert scenario.status_code == 200, scenario.text
+    renamed = client.put(f"{API}/scenarios/{scenario.json()['id']}", json={"display_name": "Renamed"})
+    assert renamed.status_code == 200, renamed.text
+
+def test_item_routes_without_a_planner_find_the_shard(client, sharded):
+    expenses = client.get(f"{API}/expenses", params={"planner_id": PLANNER_ID}).json()
+    groceries = next(expense for expense in expenses if expense["name"] == "Groceries")
+
+    response = client.patch(f"{API}/expenses/{groceries['id']}", json={"monthly_amount": "650"})
+    assert response.status_code == 200, response.text
+    assert client.get(f"{API}/expenses/{groceries['id']}").json()["monthly_amount"] == "650.00"
+    assert _count(_shard_engine(sharded), Expense, Expense.monthly_amount == 650) == 1
+
+    assert client.delete(f"{API}/expenses/{groceries['id']}").status_code == 200
+    assert _count(_shard_engine(sharded), Expense) == 1
+
+def test_scenario_update_without_a_planner_finds_the_shard(client, sharded):
+    scenarios = client.get(f"{API}/scenarios", params={"planner_id": PLANNER_ID}).json()
+    response = client.put(f"{API}/scenarios/{scenarios[0]['id']}", json={"display_name": "Renamed"})
+    assert response.status_code == 200, response.text
+    assert response.json()["display_name"] == "Renamed"
+
+def test_unresolved_household_is_rejected(client, sharded):
+    assert client.get(f"{API}/expenses/{uuid.uuid4()}").status_code == 400
+    assert client.get(f"{API}/expenses", params={"planner_id": str(uuid.uuid4())}).status_code == 400
+    assert client.get(f"{API}/expenses", headers={"X-Household-Id": str(uuid.uuid4())}, params={"planner_id": PLANNER_ID}).status_code == 400
@@ -0,0 +1,80 @@
+import asyncio
+
+import httpx
+import pytest
+from sqlalchemy import event
+
+from conftest import API, PLANNER_ID
+import main
+from app.database import engine
+from app.services.write_coalescer import WriteCoalescer, write_coalescer
+
+@pytest.fixture
+def window(monkeypatch):
+    """A window wide enough for every request of a test to arrive in it"""
+    monkeypatch.setattr(write_coalescer, "window_seconds", 0.2)
+
+@pytest.fixture
+def expense_updates():
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if statement.startswith("UPDATE expenses"):
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
+
+def _groceries(client):
+    expenses = client.get(f"{API}/expenses", params={"planner_id": PLANNER_ID}).json()
+    return next(expense for expense in expenses if expense["name"] == "Groceries")
+
+async def _concurrently(*requests):
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=main.app), base_url="http://test") as http:
+        return await asyncio.gather(*(request(http) for request in requests))
+
+async def _after(seconds, request):
+    await asyncio.sleep(seconds)
+    return await request
+
+def test_concurrent_patches_to_one_item_share_one_update(client, window, expense_updates):
+    url = f"{API}/expenses/{_groceries(client)['id']}"
+    responses = asyncio.run(_concurrently(
+        lambda http: http.patch(url, json={"monthly_amount": "650"}),
+        lambda http: http.patch(url, json={"name": "Food"}),
+        lambda http: http.patch(url, json={"monthly_amount": "700"}),
+    ))
+
+    assert len(expense_updates) == 1
+    for response in responses:
+        assert response.status_code == 200, response.text
+        # Every caller answers with the committed row, later values winning
+        assert (response.json()["name"], response.json()["monthly_amount"]) == ("Food", "700.00")
+
+def test_a_read_alongside_a_patch_sees_the_write(client, window):
+    url = f"{API}/expenses/{_groceries(client)['id']}"
+    _, read = asyncio.run(_concurrently(
+        lambda http: http.patch(url, json={"monthly_amount": "650"}),
+        lambda http: _after(0.05, http.get(url)),
+    ))
+    assert read.json()["monthly_amount"] == "650.00"
+
+def test_followers_see_the_leaders_error():
+    coalescer = WriteCoalescer(window_seconds=0.05)
+    flushed = []
+
+    def flush(values):
+        flushed.append(values)
+        raise ValueError("Expense not found")
+
+    async def run():
+        return await asyncio.gather(
+            coalescer.submit(("expenses", 1), {"name": "Food"}, flush),
+            coalescer.submit(("expenses", 1), {"monthly_amount": 650}, flush),
+            return_exceptions=True,
+        )
+
+    leader, follower = asyncio.run(run())
+    assert flushed == [{"name": "Food", "monthly_amount": 650}]
+    assert isinstance(leader, ValueError) and follower is leader